@@ -6,10 +6,14 @@ import os
 import spacy
 from spacy.tokens import DocBin
 import json
-import subprocess
 from pathlib import Path
 import re
 import random
+from treino import argumentos_retomada, config_padrao_ner, preparar_corpus, treinar
+from corpus_multirrotulo import corpus_com_sinteticos
+from registro_log import obter_logger
+
+log = obter_logger("Treinando_CID")
 
 # Função para extrair texto de forma segura
 def extrair_texto(item):
@@ -107,17 +111,32 @@ def gerar_dados_sinteticos():
     
     return dados_sinteticos
 
+padrao_cid_valido = re.compile(r'[A-Z]\d+(\.\d+)?')
+
+# Mantém os spans de CID, reancorando no código os que não começam nele
+def reparar_cid(texto, entities):
+    entidades_ajustadas = []
+    for ent in entities:
+        if isinstance(ent, list) and len(ent) > 2 and ent[2] == 'CID':
+            texto_entidade = texto[ent[0]:ent[1]]
+            if not padrao_cid_valido.match(texto_entidade):
+                novos_cids = ajustar_anotacoes_cid(texto, [ent])
+                if novos_cids:
+                    entidades_ajustadas.extend(novos_cids)
+                    continue
+            entidades_ajustadas.append(ent)
+    return entidades_ajustadas
+
 # Função para carregar e ajustar os dados
 def carregar_dados(filepath):
     with open(filepath, 'r', encoding='utf-8') as f:
         data = json.load(f)
     
     treinamentos = []
-    padrao_cid = re.compile(r'[A-Z]\d+(\.\d+)?')
     
     for i, item in enumerate(data):
         if len(item) < 2:
-            print(f"Item {i} inválido: não possui elementos suficientes")
+            log.warning("Item %s inválido: não possui elementos suficientes", i)
             continue
             
         texto = extrair_texto(item)
@@ -132,56 +151,23 @@ def carregar_dados(filepath):
         elif isinstance(anotacao, dict) and 'entities' in anotacao:
             entities = anotacao['entities']
         
-        entidades_ajustadas = []
-        for ent in entities:
-            if isinstance(ent, list) and len(ent) > 2 and ent[2] == 'CID':
-                texto_entidade = texto[ent[0]:ent[1]]
-                if not padrao_cid.match(texto_entidade):
-                    novos_cids = ajustar_anotacoes_cid(texto, [ent])
-                    if novos_cids:
-                        entidades_ajustadas.extend(novos_cids)
-                        continue
-                entidades_ajustadas.append(ent)
+        entidades_ajustadas = reparar_cid(texto, entities)
         
         if entidades_ajustadas:
             treinamentos.append((texto, {'entities': entidades_ajustadas}))
     
     print(f"Total de itens processados: {len(treinamentos)}")
     if treinamentos:
-        print(f"Primeiro item processado: {treinamentos[0][0][:50]}...")
-        print(f"Entidades do primeiro item: {treinamentos[0][1]['entities']}")
+        log.debug("Primeiro item processado: %.50s...", treinamentos[0][0])
+        log.debug("Entidades do primeiro item: %s", treinamentos[0][1]["entities"])
     return treinamentos
 
-# Carregar e aumentar dados de treino e validação
-base_train = carregar_dados("ner_treino_split.json")
-base_dev = carregar_dados("ner_validacao_split.json")
-
-# Gerar dados sintéticos
-dados_sinteticos = gerar_dados_sinteticos()
-
-# Combinar dados originais com sintéticos
-train_data = base_train + dados_sinteticos
-dev_data = base_dev + dados_sinteticos
-
-print(f"\nDados de treino aumentados: {len(base_train)} originais + {len(dados_sinteticos)} sintéticos = {len(train_data)} total")
-print(f"Dados de validação aumentados: {len(base_dev)} originais + {len(dados_sinteticos)} sintéticos = {len(dev_data)} total")
-
-# Inicializar pipeline com NER
-nlp = spacy.blank("pt")
-if "ner" not in nlp.pipe_names:
-    ner = nlp.add_pipe("ner", last=True)
-else:
-    ner = nlp.get_pipe("ner")
-
-# Adicionar rótulo "CID"
-ner.add_label("CID")
-
 # Criar DocBin (formato otimizado para spaCy)
-def criar_docbin(data):
+def criar_docbin(nlp, data):
     doc_bin = DocBin()
     for texto, anotacao in data:
         if not isinstance(texto, str):
-            print(f"Texto inválido encontrado: {texto}")
+            log.warning("Texto inválido encontrado: %r", texto)
             continue
             
         doc = nlp.make_doc(texto)
@@ -197,32 +183,33 @@ def criar_docbin(data):
         doc_bin.add(doc)
     return doc_bin
 
-# Salvar os dados em formato spaCy
-criar_docbin(train_data).to_disk("train_CID.spacy")
-criar_docbin(dev_data).to_disk("dev_CID.spacy")
-
-# Obter o diretório atual do script
-diretorio_atual = os.path.dirname(os.path.abspath(__file__))
-
-# Criar caminho para salvar o modelo
-caminho_modelo = os.path.join(diretorio_atual, "modelo_NER_CID")
-
-# Gera o arquivo de configuração
-subprocess.run([
-    "spacy", "init", "config",
-    "--lang", "pt",
-    "--pipeline", "ner",
-    "--force",
-    "config.cfg"
-])
-
-# Treinar o modelo
-subprocess.run([
-    "spacy", "train",
-    "config.cfg",
-    "--output", caminho_modelo,
-    "--paths.train", "train_CID.spacy",
-    "--paths.dev", "dev_CID.spacy"
-])
-
-print(f"Modelo treinado salvo em: {caminho_modelo}")
\ No newline at end of file
+if __name__ == "__main__":
+    args_treino = argumentos_retomada()
+
+    # Gerar dados sintéticos
+    dados_sinteticos = gerar_dados_sinteticos()
+
+    # Pipeline em branco, só para tokenizar os DocBins
+    nlp = spacy.blank("pt")
+
+    corpus_train, corpus_dev = corpus_com_sinteticos(
+        "CID", nlp, lambda dados: criar_docbin(nlp, dados), dados_sinteticos, dados_sinteticos)
+
+    # DocBins em memória (também salvos em disco; na retomada, reaproveitados)
+    train_db = preparar_corpus("train_CID.spacy", lambda: corpus_train, args_treino.retomar)
+    dev_db = preparar_corpus("dev_CID.spacy", lambda: corpus_dev, args_treino.retomar)
+
+    # Obter o diretório atual do script
+    diretorio_atual = os.path.dirname(os.path.abspath(__file__))
+
+    # Criar caminho para salvar o modelo
+    caminho_modelo = os.path.join(diretorio_atual, "modelo_NER_CID")
+
+    # Treinar o modelo em processo (config = spacy init config --lang pt --pipeline ner)
+    metricas = treinar(
+        config_padrao_ner(), caminho_modelo, train_db, dev_db,
+        checkpoint_a_cada=args_treino.checkpoint_a_cada, retomar=args_treino.retomar
+    )
+
+    print(f"Modelo treinado salvo em: {caminho_modelo}")
+    print(f"Métricas: {json.dumps(metricas, indent=2, ensure_ascii=False)}")
@@ -413,6 +413,17 @@ from spacy.training.example import Example
 from pathlib import Path
 import copy
 from spacy.pipeline import EntityRuler
+import os
+import shutil
+import argparse
+from banco_nomes import carregar_banco, amostrar_nomes
+from gazetteer_nomes import adicionar_gazetteer
+from checkpoints import salvar_checkpoint, carregar_checkpoint, ultimo_checkpoint
+from telemetria_treino import TelemetriaTreino
+from duplicatas import treino_e_validacao
+from registro_log import obter_logger
+
+log = obter_logger("Treinando_NOME_PACIENTE")
 
 # =============================================================================
 # Função para carregar dataset
@@ -424,7 +435,7 @@ def carregar_dados(filepath):
     treinamentos = []
     for i, item in enumerate(data):
         if not isinstance(item, list) or len(item) < 2:
-            print(f"⚠️ Item {i} inválido: {item}")
+            log.warning("Item %s inválido: %.200r", i, item)
             continue
 
         texto, anotacao = item[0], item[1]
@@ -440,10 +451,21 @@ def carregar_dados(filepath):
 # =============================================================================
 # Geração de dados sintéticos
 # =============================================================================
-def gerar_dados_sinteticos(base_data, n_variacoes=3):
+def gerar_dados_sinteticos(base_data, n_variacoes=3, n_nomes_banco=0):
     prefixos = ["o(a) paciente", "paciente", "Paciente:", "Identifico o paciente", "Nome do paciente"]
     pronomes = ["Sr.", "Sra.", "Dr.", "Dra.", "Srta.", ""]
-    clinicas = ["Clínica Santa Maria", "Hospital São João", "Laboratório Vida"]
+    clinicas = carregar_banco()["clinicas"].tolist()
+
+    def montar(nome, label):
+        prefixo = random.choice(prefixos)
+        pronome = random.choice(pronomes)
+        clinica = random.choice(clinicas)
+        dia = f"{random.randint(1,28):02d}/{random.randint(1,12):02d}/2024"
+
+        novo_texto = f"{prefixo} {pronome} {nome} esteve em consulta na {clinica} no dia {dia}."
+        novo_start = novo_texto.find(nome)
+        novo_end = novo_start + len(nome)
+        return (novo_texto, {"entities": [(novo_start, novo_end, label)]})
 
     novos = []
     for texto, anotacao in base_data:
@@ -452,16 +474,11 @@ def gerar_dados_sinteticos(base_data, n_variacoes=3):
             nome = texto[start:end]
 
             for _ in range(n_variacoes):
-                prefixo = random.choice(prefixos)
-                pronome = random.choice(pronomes)
-                clinica = random.choice(clinicas)
-                dia = f"{random.randint(1,28):02d}/{random.randint(1,12):02d}/2024"
-
-                novo_texto = f"{prefixo} {pronome} {nome} esteve em consulta na {clinica} no dia {dia}."
-                novo_start = novo_texto.find(nome)
-                novo_end = novo_start + len(nome)
+                novos.append(montar(nome, label))
 
-                novos.append((novo_texto, {"entities": [(novo_start, novo_end, label)]}))
+    # Nomes inéditos do banco compartilhado (aumenta a diversidade de nomes)
+    for nome in amostrar_nomes(n_nomes_banco):
+        novos.append(montar(nome, "NOME_PACIENTE"))
     return novos
 
 # =============================================================================
@@ -501,31 +518,6 @@ def criar_docbin(data, output_file):
     doc_bin.to_disk(output_file)
     print(f"💾 Arquivo {output_file} gerado com {len(doc_bin)} exemplos")
 
-# =============================================================================
-# EntityRuler com Regex
-# =============================================================================
-def adicionar_entity_ruler(nlp):
-    if "ner" in nlp.pipe_names:
-        ruler = nlp.add_pipe("entity_ruler", before="ner")
-    else:
-        ruler = nlp.add_pipe("entity_ruler", last=True)
-
-    patterns = []
-
-    # Regex após "paciente"
-    nome_regex = r"(?<=paciente\s(?:Sr\.|Sra\.|Srta\.|Dr\.|Dra\.)?\s*)([A-ZÁÉÍÓÚÂÊÔÃÕÇ][a-záéíóúâêôãõç]+(?:\s(?:da|de|do|dos|das|e|[A-ZÁÉÍÓÚÂÊÔÃÕÇ][a-záéíóúâêôãõç]+))+)"
-    patterns.append({"label": "NOME_PACIENTE", "pattern": {"REGEX": nome_regex}})
-
-    # Regex após "Nome do paciente"
-    patterns.append({
-        "label": "NOME_PACIENTE",
-        "pattern": {"REGEX": r"(?<=Nome do paciente\s)([A-ZÁÉÍÓÚÂÊÔÃÕÇ][a-záéíóúâêôãõç]+(?:\s(?:da|de|do|dos|das|e|[A-ZÁÉÍÓÚÂÊÔÃÕÇ][a-záéíóúâêôãõç]+))*)"}
-    })
-
-    ruler.add_patterns(patterns)
-    print("✅ EntityRuler adicionado para NOME_PACIENTE")
-
-
 # =============================================================================
 # Avaliação (Precision, Recall, F1)
 # =============================================================================
@@ -554,21 +546,36 @@ def avaliar(nlp, validation_data):
 # MAIN
 # =============================================================================
 if __name__ == "__main__":
-    treino_path = "nome_treino/ner_treino_nome_paciente_expandido.json"
-    valid_path = "nome_treino/ner_validacao_nome_paciente_expandido.json"
+    parser = argparse.ArgumentParser(description="Treino do NER de NOME_PACIENTE")
+    parser.add_argument("--retomar", action="store_true", help="continua do último checkpoint salvo")
+    parser.add_argument("--checkpoint-a-cada", type=int, default=2000, help="exemplos entre checkpoints")
+    parser.add_argument("--dir-checkpoints", default="checkpoints_nome_paciente")
+    parser.add_argument("--telemetria", default="telemetria_nome_paciente.csv", help="CSV/JSONL com velocidade e memória por época")
+    args = parser.parse_args()
+
+    checkpoint = ultimo_checkpoint(args.dir_checkpoints) if args.retomar else None
+    dir_melhor = os.path.join(args.dir_checkpoints, "melhor")
 
-    base_train = carregar_dados(treino_path)
-    base_dev = carregar_dados(valid_path)
+    if checkpoint is None:
+        random.seed(42)
+        treino_path = "nome_treino/ner_treino_nome_paciente_expandido.json"
+        valid_path = "nome_treino/ner_validacao_nome_paciente_expandido.json"
 
-    dados_sinteticos = gerar_dados_sinteticos(base_train, n_variacoes=5)
-    train_data = base_train + dados_sinteticos
-    dev_data = base_dev
+        base_train = carregar_dados(treino_path)
+        base_dev = carregar_dados(valid_path)
 
-    print(f"📊 Treino original: {len(base_train)} | Sintéticos: {len(dados_sinteticos)} | Total: {len(train_data)}")
-    print(f"📊 Validação: {len(dev_data)}")
+        dados_sinteticos = gerar_dados_sinteticos(base_train, n_variacoes=5, n_nomes_banco=len(base_train))
+        # O _expandido repete textos dos originais: treino sem duplicatas e validação sem cópias do treino
+        train_data, dev_data = treino_e_validacao(base_train, dados_sinteticos, base_dev, nome="NOME_PACIENTE")
 
-    criar_docbin(train_data, "train_nome_paciente.spacy")
-    criar_docbin(dev_data, "dev_nome_paciente.spacy")
+        print(f"📊 Treino original: {len(base_train)} | Sintéticos: {len(dados_sinteticos)} | Total: {len(train_data)}")
+        print(f"📊 Validação: {len(dev_data)}")
+
+        criar_docbin(train_data, "train_nome_paciente.spacy")
+        criar_docbin(dev_data, "dev_nome_paciente.spacy")
+    else:
+        # Na retomada os dados vêm dos .spacy já gerados (os sintéticos não são sorteados de novo)
+        print(f"♻️ Retomando de {checkpoint}")
 
     # Preparar pipeline
     nlp = spacy.blank("pt")
@@ -579,8 +586,9 @@ if __name__ == "__main__":
     else:
         ner = nlp.get_pipe("ner")
 
-    # só depois adiciona o entity_ruler
-    adicionar_entity_ruler(nlp)
+    # só depois adiciona o gazetteer de nomes (completa o NER; vai salvo junto do modelo)
+    adicionar_gazetteer(nlp)
+    print("✅ Gazetteer de nomes adicionado para NOME_PACIENTE")
 
 
     # Carregar dados
@@ -605,27 +613,57 @@ if __name__ == "__main__":
 
     # Treinamento
     optimizer = nlp.begin_training()
-    best_f1 = 0.0
-    patience, no_improvement = 10, 0
+    patience = 10
     best_model = None
+    estado = {"passo": 0, "epoca": 0, "posicao": 0, "ordem": None, "losses": {},
+              "best_f1": 0.0, "no_improvement": 0}
+
+    if checkpoint is not None:
+        estado = carregar_checkpoint(checkpoint, nlp, optimizer)
+        if os.path.isdir(dir_melhor):
+            best_model = spacy.load(dir_melhor)
+
+    passo = estado["passo"]
+    best_f1, no_improvement = estado["best_f1"], estado["no_improvement"]
+
+    telemetria = TelemetriaTreino(args.telemetria, extras=["loss", "f1"], continuar=checkpoint is not None)
 
     print("\n🚀 Iniciando treinamento...")
     print("=" * 60)
 
-    for epoch in range(50):
-        random.shuffle(train_examples)
-        losses = {}
-        for text, annotations in train_examples:
+    for epoch in range(estado["epoca"], 50):
+        if estado["ordem"] is not None:
+            # Continua a época interrompida, na mesma ordem
+            ordem, inicio, losses = estado["ordem"], estado["posicao"], estado["losses"]
+            estado["ordem"] = None
+        else:
+            ordem = list(range(len(train_examples)))
+            random.shuffle(ordem)
+            inicio, losses = 0, {}
+
+        for k in range(inicio, len(ordem)):
+            text, annotations = train_examples[ordem[k]]
             doc = nlp.make_doc(text)
             example = Example.from_dict(doc, annotations)
-            nlp.update([example], sgd=optimizer, losses=losses, drop=0.3)
+            with telemetria.passo(len(doc), 1):
+                nlp.update([example], sgd=optimizer, losses=losses, drop=0.3)
+            passo += 1
+
+            if passo % args.checkpoint_a_cada == 0:
+                salvar_checkpoint(args.dir_checkpoints, passo, nlp, optimizer, {
+                    "epoca": epoch, "posicao": k + 1, "ordem": ordem, "losses": losses,
+                    "best_f1": best_f1, "no_improvement": no_improvement,
+                })
 
-        precision, recall, f1, tp, fp, fn = avaliar(nlp, dev_examples)
-        print(f"Época {epoch+1} | Loss: {losses.get('ner',0):.4f} | P: {precision:.4f} R: {recall:.4f} F1: {f1:.4f} | TP={tp} FP={fp} FN={fn}")
+        with telemetria.avaliacao():
+            precision, recall, f1, tp, fp, fn = avaliar(nlp, dev_examples)
+        vel = telemetria.fim_epoca(epoch + 1, loss=round(losses.get("ner", 0), 4), f1=round(f1, 4))
+        print(f"Época {epoch+1} | Loss: {losses.get('ner',0):.4f} | P: {precision:.4f} R: {recall:.4f} F1: {f1:.4f} | TP={tp} FP={fp} FN={fn} | {vel['palavras_s']:.0f} palavras/s")
 
         if f1 > best_f1:
             best_f1 = f1
             best_model = copy.deepcopy(nlp)
+            best_model.to_disk(dir_melhor)
             no_improvement = 0
             print("  ⭐ Novo melhor modelo salvo!")
         else:
@@ -641,7 +679,10 @@ if __name__ == "__main__":
     if not output_dir.exists():
         output_dir.mkdir()
     nlp.to_disk(output_dir)
+    # Treino concluído: um --retomar depois disso começa do zero
+    shutil.rmtree(args.dir_checkpoints, ignore_errors=True)
 
+    telemetria.imprimir_resumo()
     print("=" * 60)
     print(f"✅ Treinamento finalizado! Modelo salvo em {output_dir}")
     print(f"🏆 Melhor F1: {best_f1:.4f}")
@@ -15,9 +15,10 @@ import os
 import re
 import json
 import random
-import subprocess
 import spacy
 from spacy.tokens import DocBin
+from treino import argumentos_retomada, config_padrao_ner, preparar_corpus, treinar
+from corpus_multirrotulo import corpus_com_sinteticos
 
 # -------------------------------
 # Utilidades
@@ -109,6 +110,31 @@ def corrigir_ou_inferir_tempo(texto):
             return [[pos[0], pos[1], "TEMPO_AFASTAMENTO"]]
     return []
 
+def reparar_tempo(texto, entities):
+    """
+    Spans de TEMPO_AFASTAMENTO de um texto: mantém os que parecem duração,
+    repara os suspeitos pela âncora e, sem nenhum, tenta inferir.
+    """
+    ents_tempo = []
+    # 1) coleta as spans existentes de TEMPO_AFASTAMENTO
+    for ent in entities:
+        if isinstance(ent, list) and len(ent) >= 3 and ent[2] == "TEMPO_AFASTAMENTO":
+            # pequeno sanity-check: a substring deve parecer duração
+            trecho = texto[ent[0]:ent[1]]
+            if PADRAO_NUM_UNID_RE.search(trecho) or PADRAO_TEXTO.search(trecho):
+                ents_tempo.append(ent)
+            else:
+                # repara via âncora se o rótulo original é suspeito
+                reparo = corrigir_ou_inferir_tempo(texto)
+                if reparo:
+                    ents_tempo.extend(reparo)
+        # ignora outras entidades
+
+    # 2) se não havia label, tenta inferir
+    if not ents_tempo:
+        ents_tempo.extend(corrigir_ou_inferir_tempo(texto))
+    return ents_tempo
+
 def carregar_dados(filepath):
     """
     Lê o JSON, mantém/ajusta APENAS a entidade TEMPO_AFASTAMENTO.
@@ -134,25 +160,7 @@ def carregar_dados(filepath):
         elif isinstance(anotacao, dict) and "entities" in anotacao:
             entities = anotacao["entities"]
 
-        ents_tempo = []
-        # 1) coleta as spans existentes de TEMPO_AFASTAMENTO
-        for ent in entities:
-            if isinstance(ent, list) and len(ent) >= 3 and ent[2] == "TEMPO_AFASTAMENTO":
-                # pequeno sanity-check: a substring deve parecer duração
-                trecho = texto[ent[0]:ent[1]]
-                if PADRAO_NUM_UNID_RE.search(trecho) or PADRAO_TEXTO.search(trecho):
-                    ents_tempo.append(ent)
-                else:
-                    # repara via âncora se o rótulo original é suspeito
-                    reparo = corrigir_ou_inferir_tempo(texto)
-                    if reparo:
-                        ents_tempo.extend(reparo)
-            # ignora outras entidades
-
-        # 2) se não havia label, tenta inferir
-        if not ents_tempo:
-            inferidas = corrigir_ou_inferir_tempo(texto)
-            ents_tempo.extend(inferidas)
+        ents_tempo = reparar_tempo(texto, entities)
 
         if ents_tempo:
             saida.append((texto, {"entities": ents_tempo}))
@@ -210,22 +218,13 @@ def gerar_dados_sinteticos(n=80):
 # Pipeline de treino
 # -------------------------------
 if __name__ == "__main__":
-    # Carrega bases
-    base_train = carregar_dados("ner_treino_split.json")
-    base_dev = carregar_dados("ner_validacao_split.json")
+    args_treino = argumentos_retomada()
 
     # Aumento sintético
     sint = gerar_dados_sinteticos(n=120)
-    train_data = base_train + sint
-    dev_data = base_dev + sint[: max(60, len(sint)//3)]
-
-    print(f"Treino: {len(base_train)} originais + {len(sint)} sintéticos = {len(train_data)}")
-    print(f"Validação: {len(base_dev)} originais + {len(dev_data)-len(base_dev)} sintéticos = {len(dev_data)}")
 
-    # NER em branco (pt)
+    # Pipeline em branco (pt), só para tokenizar; o label vem do corpus no init
     nlp = spacy.blank("pt")
-    ner = nlp.add_pipe("ner", last=True)
-    ner.add_label("TEMPO_AFASTAMENTO")
 
     # DocBins
     def criar_docbin(data):
@@ -241,22 +240,18 @@ if __name__ == "__main__":
             db.add(doc)
         return db
 
-    criar_docbin(train_data).to_disk("train_TEMPO.spacy")
-    criar_docbin(dev_data).to_disk("dev_TEMPO.spacy")
+    corpus_train, corpus_dev = corpus_com_sinteticos(
+        "TEMPO", nlp, criar_docbin, sint, sint[: max(60, len(sint)//3)], "TEMPO_AFASTAMENTO")
 
-    # Config + treino
-    out_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "modelo_NER_TEMPO_AFASTAMENTO")
+    train_db = preparar_corpus("train_TEMPO.spacy", lambda: corpus_train, args_treino.retomar)
+    dev_db = preparar_corpus("dev_TEMPO.spacy", lambda: corpus_dev, args_treino.retomar)
 
-    subprocess.run([
-        "spacy", "init", "config",
-        "--lang", "pt", "--pipeline", "ner", "--force", "config_tempo.cfg"
-    ], check=True)
+    # Config + treino (em processo)
+    out_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "modelo_NER_TEMPO_AFASTAMENTO")
 
-    subprocess.run([
-        "spacy", "train", "config_tempo.cfg",
-        "--output", out_dir,
-        "--paths.train", "train_TEMPO.spacy",
-        "--paths.dev", "dev_TEMPO.spacy"
-    ], check=True)
+    metricas = treinar(
+        config_padrao_ner(), out_dir, train_db, dev_db,
+        checkpoint_a_cada=args_treino.checkpoint_a_cada, retomar=args_treino.retomar
+    )
 
-    print(f"✅ Modelo treinado em: {out_dir}")
+    print(f"✅ Modelo treinado em: {out_dir} | melhor score: {metricas['melhor_score']:.4f}")
@@ -2,20 +2,13 @@ import os
 import spacy
 from spacy.tokens import DocBin
 import json
-import subprocess
 import re
 import random
 from datetime import datetime, timedelta
-import locale
-from faker import Faker
-
-fake = Faker('pt_BR')  # inicializar Faker com localidade brasileira
-
-# Configurar locale para português
-try:
-    locale.setlocale(locale.LC_TIME, 'pt_BR.UTF-8')
-except:
-    locale.setlocale(locale.LC_TIME, 'pt_BR')
+from config_treino import salvar_config
+from treino import argumentos_retomada, preparar_corpus, treinar
+from corpus_multirrotulo import corpus_com_sinteticos
+from banco_nomes import amostrar_nomes
 
 # Função para extrair texto de forma segura
 def extrair_texto(item):
@@ -68,8 +61,11 @@ def gerar_dados_sinteticos_documento(num_exemplos=500):
         "{documento} declaro para os devidos fins que o paciente"
     ]
     
+    # Nomes para os exemplos negativos, amostrados de uma vez do banco
+    nomes = amostrar_nomes(num_exemplos)
+    
     dados_sinteticos = []
-    for _ in range(num_exemplos):
+    for i in range(num_exemplos):
         # Exemplo positivo
         doc = random.choice(documentos)
         template = random.choice(templates)
@@ -84,7 +80,7 @@ def gerar_dados_sinteticos_documento(num_exemplos=500):
         dados_sinteticos.append((texto, {'entities': entities}))
         
         # Exemplo negativo (sem entidades)
-        texto_negativo = f"Paciente {fake.name()} compareceu para consulta"
+        texto_negativo = f"Paciente {nomes[i]} compareceu para consulta"
         dados_sinteticos.append((texto_negativo, {'entities': []}))
     
     return dados_sinteticos
@@ -140,165 +136,58 @@ def criar_docbin(nlp, data, labels):
     return doc_bin
 
 # Função para treinar modelo
-def treinar_modelo(tipo, train_data, dev_data, label):
+def treinar_modelo(tipo, corpus_train, corpus_dev, checkpoint_a_cada=0, retomar=False):
     # Diretório para salvar o modelo
     caminho_modelo = f"modelo_NER_{tipo}"
     
-    # Configuração otimizada para CPU
-    config_content = f"""
-    [paths]
-    train = "train_{tipo}.spacy"
-    dev = "dev_{tipo}.spacy"
-    
-    [system]
-    gpu_allocator = null
-    
-    [nlp]
-    lang = "pt"
-    pipeline = ["tok2vec","ner"]
-    
-    [components]
-    
-    [components.tok2vec]
-    factory = "tok2vec"
-    
-    [components.tok2vec.model]
-    @architectures = "spacy.Tok2Vec.v2"
-    
-    [components.tok2vec.model.embed]
-    @architectures = "spacy.MultiHashEmbed.v2"
-    width = 96
-    attrs = ["NORM","PREFIX","SUFFIX","SHAPE"]
-    rows = [5000,1000,2500,2500]
-    include_static_vectors = false
-    
-    [components.tok2vec.model.encode]
-    @architectures = "spacy.MaxoutWindowEncoder.v2"
-    width = 96
-    depth = 4
-    window_size = 1
-    maxout_pieces = 3
-    
-    [components.ner]
-    factory = "ner"
-    
-    [components.ner.model]
-    @architectures = "spacy.TransitionBasedParser.v2"
-    state_type = "ner"
-    extra_state_tokens = false
-    hidden_width = 64
-    maxout_pieces = 2
-    use_upper = true
-    nO = null
-    
-    [components.ner.model.tok2vec]
-    @architectures = "spacy.Tok2VecListener.v1"
-    width = ${{components.tok2vec.model.encode.width}}
-    
-    [corpora]
-    
-    [corpora.train]
-    @readers = "spacy.Corpus.v1"
-    path = ${{paths.train}}
+    # Configuração otimizada para CPU (ver config_treino.py)
+    config_path = salvar_config(f"config_{tipo}.cfg", f"train_{tipo}.spacy", f"dev_{tipo}.spacy")
     
-    [corpora.dev]
-    @readers = "spacy.Corpus.v1"
-    path = ${{paths.dev}}
+    # DocBins (o label vem do corpus no init)
+    train_db = preparar_corpus(f"train_{tipo}.spacy", lambda: corpus_train, retomar)
+    dev_db = preparar_corpus(f"dev_{tipo}.spacy", lambda: corpus_dev, retomar)
     
-    [training]
-    dev_corpus = "corpora.dev"
-    train_corpus = "corpora.train"
-    seed = 42
-    gpu_allocator = null
-    accumulate_gradient = 1
-    patience = 1600
-    max_epochs = 50
-    max_steps = 20000
-    
-    [training.batcher]
-    @batchers = "spacy.batch_by_words.v1"
-    discard_oversize = false
-    tolerance = 0.2
-    size = 1000
-    
-    [training.optimizer]
-    @optimizers = "Adam.v1"
-    beta1 = 0.9
-    beta2 = 0.999
-    L2_is_weight_decay = true
-    L2 = 0.01
-    grad_clip = 1.0
-    use_averages = false
-    eps = 0.00000001
-    learn_rate = 0.001
-    
-    [training.logger]
-    @loggers = "spacy.ConsoleLogger.v1"
-    progress_bar = false
-    
-    [initialize]
-    vectors = null
-    """
-    
-    # Salvar configuração
-    config_path = f"config_{tipo}.cfg"
-    with open(config_path, "w", encoding="utf-8") as f:
-        f.write(config_content)
-    
-    # Inicializar pipeline
-    nlp = spacy.blank("pt")
-    if "ner" not in nlp.pipe_names:
-        ner = nlp.add_pipe("ner")
-    else:
-        ner = nlp.get_pipe("ner")
-    
-    ner.add_label(label)
-    
-    # Criar DocBins
-    criar_docbin(nlp, train_data, [label]).to_disk(f"train_{tipo}.spacy")
-    criar_docbin(nlp, dev_data, [label]).to_disk(f"dev_{tipo}.spacy")
-    
-    # Treinar o modelo
-    subprocess.run([
-        "spacy", "train",
-        config_path,
-        "--output", caminho_modelo,
-        "--gpu-id", "-1"  # Forçar uso de CPU
-    ])
+    # Treinar o modelo em processo (CPU, com checkpoints)
+    metricas = treinar(config_path, caminho_modelo, train_db, dev_db,
+                       checkpoint_a_cada=checkpoint_a_cada, retomar=retomar)
     
+    print(f"Métricas: {json.dumps(metricas, indent=2, ensure_ascii=False)}")
     print(f"\nModelo treinado para {tipo} salvo em: {caminho_modelo}")
     return caminho_modelo
 
-# =======================
-# Treino TIPO_DOC
-# =======================
-print("\n" + "="*50)
-print("INICIANDO TREINAMENTO PARA TIPO_DOC")
-print("="*50)
-
-# Carregar dados
-base_train_data = carregar_dados_documento("ner_treino_split.json")
-base_dev_data = carregar_dados_documento("ner_validacao_split.json")
+if __name__ == "__main__":
+    args_treino = argumentos_retomada()
 
-# Gerar dados sintéticos
-dados_sinteticos_doc = gerar_dados_sinteticos_documento(800)
+    # =======================
+    # Treino TIPO_DOC
+    # =======================
+    print("\n" + "="*50)
+    print("INICIANDO TREINAMENTO PARA TIPO_DOC")
+    print("="*50)
 
-# Combinar dados
-train_data_doc = base_train_data + dados_sinteticos_doc
-dev_data_doc = base_dev_data + dados_sinteticos_doc[:200]  # Usar apenas parte para validação
+    # Gerar dados sintéticos
+    dados_sinteticos_doc = gerar_dados_sinteticos_documento(800)
 
-print(f"Dados de treino para TIPO_DOC: {len(train_data_doc)}")
-print(f"Dados de validação para TIPO_DOC: {len(dev_data_doc)}")
-
-# Treinar modelo TIPO_DOC
-caminho_modelo_doc = treinar_modelo(
-    tipo="DOCUMENTO",
-    train_data=train_data_doc,
-    dev_data=dev_data_doc,
-    label="TIPO_DOC"
-)
+    # Pipeline em branco, só para tokenizar os DocBins
+    nlp = spacy.blank("pt")
 
-print("\n" + "="*50)
-print("TREINAMENTO CONCLUÍDO COM SUCESSO!")
-print("="*50)
-print(f"Modelo para tipos de documento: {caminho_modelo_doc}")
\ No newline at end of file
+    train_doc, dev_doc = corpus_com_sinteticos(
+        "DOCUMENTO", nlp, lambda dados: criar_docbin(nlp, dados, ["TIPO_DOC"]),
+        dados_sinteticos_doc, dados_sinteticos_doc[:200], "TIPO_DOC")
+
+    print(f"Dados de treino para TIPO_DOC: {len(train_doc)}")
+    print(f"Dados de validação para TIPO_DOC: {len(dev_doc)}")
+
+    # Treinar modelo TIPO_DOC
+    caminho_modelo_doc = treinar_modelo(
+        tipo="DOCUMENTO",
+        corpus_train=train_doc,
+        corpus_dev=dev_doc,
+        checkpoint_a_cada=args_treino.checkpoint_a_cada,
+        retomar=args_treino.retomar
+    )
+
+    print("\n" + "="*50)
+    print("TREINAMENTO CONCLUÍDO COM SUCESSO!")
+    print("="*50)
+    print(f"Modelo para tipos de documento: {caminho_modelo_doc}")
\ No newline at end of file
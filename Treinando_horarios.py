@@ -2,10 +2,14 @@ import os
 import spacy
 from spacy.tokens import DocBin
 import json
-import subprocess
 import re
 import random
 from datetime import time, timedelta
+from treino import argumentos_retomada, config_padrao_ner, preparar_corpus, treinar
+from duplicatas import treino_e_validacao
+from registro_log import obter_logger
+
+log = obter_logger("Treinando_horarios")
 
 # Função para extrair texto de forma segura
 def extrair_texto(item):
@@ -123,21 +127,20 @@ def carregar_dados_horarios(filepath):
                         item = json.loads(line)
                         data.append(item)
                     except json.JSONDecodeError as e:
-                        print(f"Erro ao decodificar linha: {line}\nErro: {e}")
+                        log.warning("Erro ao decodificar linha: %.200s (%s)", line, e)
     else:  # Assume formato JSON padrão
         try:
             with open(filepath, 'r', encoding='utf-8') as f:
                 data = json.load(f)
         except json.JSONDecodeError as e:
-            print(f"Erro ao carregar JSON: {e}")
+            log.error("Erro ao carregar JSON %s: %s", filepath, e)
             return []
     
     treinamentos = []
     
     for i, item in enumerate(data):
         if not isinstance(item, list) or len(item) < 2:
-            print(f"Item {i} inválido: não é uma lista ou não possui elementos suficientes")
-            print(f"Conteúdo do item: {item}")
+            log.warning("Item %s inválido: não é uma lista ou não possui elementos suficientes: %.200r", i, item)
             continue
             
         texto = extrair_texto(item)
@@ -172,42 +175,17 @@ def carregar_dados_horarios(filepath):
         if entidades_validas:
             treinamentos.append((texto, {'entities': entidades_validas}))
         else:
-            print(f"Item {i} não possui entidades válidas: {entities}")
+            log.warning("Item %s não possui entidades válidas: %s", i, entities)
     
     print(f"Total de itens processados em {filepath}: {len(treinamentos)}")
     return treinamentos
 
-# Carregar dados de treino e validação
-base_train = carregar_dados_horarios("horarios_train_data/labeled_dataset_horarios_corrigido.json")
-base_dev = carregar_dados_horarios("horarios_train_data/spacy_dataset_horarios_dev.jsonl")
-
-# Gerar dados sintéticos
-dados_sinteticos = gerar_dados_sinteticos_horario()
-
-# Combinar dados originais com sintéticos
-train_data = base_train + dados_sinteticos
-dev_data = base_dev + dados_sinteticos
-
-print(f"\nDados de treino aumentados: {len(base_train)} originais + {len(dados_sinteticos)} sintéticos = {len(train_data)} total")
-print(f"Dados de validação aumentados: {len(base_dev)} originais + {len(dados_sinteticos)} sintéticos = {len(dev_data)} total")
-
-# Inicializar pipeline com NER
-nlp = spacy.blank("pt")
-if "ner" not in nlp.pipe_names:
-    ner = nlp.add_pipe("ner", last=True)
-else:
-    ner = nlp.get_pipe("ner")
-
-# Adicionar rótulos para horários
-ner.add_label("HORARIO_INICIO_ATENDIMENTO")
-ner.add_label("HORARIO_FIM_ATENDIMENTO")
-
 # Criar DocBin (formato otimizado para spaCy)
-def criar_docbin(data):
+def criar_docbin(nlp, data):
     doc_bin = DocBin()
     for texto, anotacao in data:
         if not isinstance(texto, str):
-            print(f"Texto inválido encontrado: {texto}")
+            log.warning("Texto inválido encontrado: %r", texto)
             continue
             
         doc = nlp.make_doc(texto)
@@ -223,32 +201,38 @@ def criar_docbin(data):
         doc_bin.add(doc)
     return doc_bin
 
-# Salvar os dados em formato spaCy
-criar_docbin(train_data).to_disk("train_horarios.spacy")
-criar_docbin(dev_data).to_disk("dev_horarios.spacy")
-
-# Obter o diretório atual do script
-diretorio_atual = os.path.dirname(os.path.abspath(__file__))
-
-# Criar caminho para salvar o modelo
-caminho_modelo = os.path.join(diretorio_atual, "modelo_NER_horarios")
-
-# Gera o arquivo de configuração
-subprocess.run([
-    "spacy", "init", "config",
-    "--lang", "pt",
-    "--pipeline", "ner",
-    "--force",
-    "config_horarios.cfg"
-])
-
-# Treinar o modelo
-subprocess.run([
-    "spacy", "train",
-    "config_horarios.cfg",
-    "--output", caminho_modelo,
-    "--paths.train", "train_horarios.spacy",
-    "--paths.dev", "dev_horarios.spacy"
-])
-
-print(f"Modelo treinado salvo em: {caminho_modelo}")
\ No newline at end of file
+if __name__ == "__main__":
+    args_treino = argumentos_retomada()
+
+    # Carregar dados de treino e validação
+    base_train = carregar_dados_horarios("horarios_train_data/labeled_dataset_horarios_corrigido.json")
+    base_dev = carregar_dados_horarios("horarios_train_data/spacy_dataset_horarios_dev.jsonl")
+
+    # Gerar dados sintéticos
+    dados_sinteticos = gerar_dados_sinteticos_horario()
+
+    # Combinar dados originais com sintéticos
+    # Corpus real sem duplicatas; a validação não repete nada do treino (nem os sintéticos)
+    train_data, dev_data = treino_e_validacao(base_train, dados_sinteticos, base_dev, dados_sinteticos, "HORARIOS")
+
+    # Pipeline em branco, só para tokenizar os DocBins
+    nlp = spacy.blank("pt")
+
+    # DocBins em memória (também salvos em disco; na retomada, reaproveitados)
+    train_db = preparar_corpus("train_horarios.spacy", lambda: criar_docbin(nlp, train_data), args_treino.retomar)
+    dev_db = preparar_corpus("dev_horarios.spacy", lambda: criar_docbin(nlp, dev_data), args_treino.retomar)
+
+    # Obter o diretório atual do script
+    diretorio_atual = os.path.dirname(os.path.abspath(__file__))
+
+    # Criar caminho para salvar o modelo
+    caminho_modelo = os.path.join(diretorio_atual, "modelo_NER_horarios")
+
+    # Treinar o modelo em processo (config = spacy init config --lang pt --pipeline ner)
+    metricas = treinar(
+        config_padrao_ner(), caminho_modelo, train_db, dev_db,
+        checkpoint_a_cada=args_treino.checkpoint_a_cada, retomar=args_treino.retomar
+    )
+
+    print(f"Modelo treinado salvo em: {caminho_modelo}")
+    print(f"Métricas: {json.dumps(metricas, indent=2, ensure_ascii=False)}")
@@ -1,6 +1,20 @@
+import os
 import spacy
-import json
 import re
+import argparse
+from pacote_modelos import CAMINHOS_MODELOS, CAMINHO_PACOTE, carregar_pacote
+from lotes_por_tamanho import pipe_por_tamanho
+from fragmentos_texto import MAX_CHARS, SOBREPOSICAO, SpanGlobal, dividir_texto, spans_globais
+from normalizacao_ocr import normalizar, TextoNormalizado
+from resultado_extracao import ENTIDADES, SEM_CONFIANCA, ResultadoExtracao
+from confianca_ner import BEAM_WIDTH, docs_com_confianca
+from cascata_modelos import Cascata, expandir
+from palavras_chave import termo_invalido_no_nome, tipo_documento, tipos_no_texto
+from gazetteer_nomes import adicionar_gazetteer
+from serializacao import BACKEND_JSON, para_json, salvar
+from registro_log import Preguicoso, configurar_logs, obter_logger
+
+log = obter_logger("app_OCR")
 
 # Função para validar e limpar datas
 def limpar_data(texto_data):
@@ -35,23 +49,9 @@ def processar_cid(texto_cid):
         return cid_limpo
     return None
 
-# Função para validar o tipo de documento
+# Função para validar o tipo de documento (vocabulário fechado, sem diferenciar caixa/acentos)
 def validar_tipo_documento(texto):
-    padrao = re.compile(
-        r'^(?:'
-        r'RELAT[ÓO]RIO\s*M[ÉE]DICO|'    
-        r'DECLARA[CÇ][ÃA]O\s*M[ÉE]DICA?|'
-        r'ATESTADO\s*M[ÉE]DICO|'
-        r'RECEITU[AÁ]RIO\s*M[ÉE]DICO|'
-        r'LAUDO\s*M[ÉE]DICO|'
-        r'DECLARACAO|'
-        r'ATESTADO|'
-        r'RELAT[ÓO]RIO|'
-        r'DECLARA[CÇ][ÃA]O'
-        r')$',
-        re.IGNORECASE
-    )
-    return bool(padrao.match(texto.strip()))
+    return tipo_documento(texto) is not None
 
 
 def validar_nome_paciente(nome):
@@ -59,18 +59,9 @@ def validar_nome_paciente(nome):
     if re.search(r'\b(?:Dr|Dra|Drª|Dr\.|Dra\.|CRM|CRF|Enf|Fisioter|Nutr)\b', nome, re.IGNORECASE):
         return False
     
-    # Verificar se contém termos médicos ou administrativos
-    termos_invalidos = [
-        "afastamento", "indicado", "necessário", "tratamento", "diagnóstico", "repouso",
-        "paciente", "compareceu", "atendimento", "consult", "avaliação", "clínica", "hospital",
-        "unidade", "serviço", "período", "dias", "dia", "CID", "crm", "código", "documento",
-        "declaro", "consta", "confirmo", "atesto", "realizou", "avaliado", "diagnosticado",
-        "recomendado", "indicado", "necessario", "realizado", "acompanhamento", "cuidados",
-        "dieta", "protocolo", "fins", "devidos", "fim", "inicio", "manhã", "tarde", "noite",
-        "horário", "cpf", "laudo", "atestado", "declaração", "relatório", "receituário"
-    ]
-    
-    if any(termo in nome.lower() for termo in termos_invalidos):
+    # Verificar se contém termos médicos/administrativos ou partes de endereço
+    # (palavras inteiras e prefixos de palavras_chave.py, uma passada cada)
+    if termo_invalido_no_nome(nome):
         return False
     
     # Verificar padrões inválidos
@@ -90,11 +81,6 @@ def validar_nome_paciente(nome):
     if len(partes) < 2:  # Deve ter pelo menos nome e sobrenome
         return False
     
-    # Verificar partes inválidas
-    partes_invalidas = ["cidade", "estado", "país", "rua", "avenida", "bairro", "nº", "número"]
-    if any(parte in nome.lower() for parte in partes_invalidas):
-        return False
-    
     # Verificar se cada parte tem pelo menos 2 caracteres
     if any(len(parte) < 2 for parte in partes):
         return False
@@ -108,25 +94,23 @@ def validar_nome_paciente(nome):
 
 
 # Carregar todos os modelos treinados individualmente por entidade
-modelos = {
-    "CID": spacy.load("modelo_NER_CID/model-last"),
-    "NOME_PACIENTE": spacy.load("modelo_NER_NOME_PACIENTE"),
-    "DATA": spacy.load("modelo_NER_DATA/model-last"),   
-    "TIPO_DOC": spacy.load("modelo_NER_DOCUMENTO/model-last"),
-    "TEMPO_AFASTAMENTO": spacy.load("modelo_NER_TEMPO_AFASTAMENTO/model-last"),
-    "CRM": spacy.load("modelo_NER_CONSELHOS/model-last"),
-    "HORARIOS": spacy.load("modelo_NER_horarios/model-last"),
-    # "HORARIO_INICIO_ATENDIMENTO": spacy.load("modelo_NER_HORARIOS/model-last"),
-    # "HORARIO_FIM_ATENDIMENTO": spacy.load("modelo_NER_HORARIOS/model-last"),
-}
-
-
-# Entidades esperadas
-ENTIDADES_ESPERADAS = [
-    "NOME_PACIENTE", "CID", "DATA", "TIPO_DOC",
-    "TEMPO_AFASTAMENTO", "CRM", 
-    "HORARIO_INICIO_ATENDIMENTO", "HORARIO_FIM_ATENDIMENTO"
-]
+def carregar_modelos(caminho_pacote=CAMINHO_PACOTE):
+    """
+    Carrega os modelos a partir do pacote único (se existir) ou, como antes,
+    dos diretórios de cada modelo.
+    """
+    if caminho_pacote and os.path.exists(caminho_pacote):
+        modelos = carregar_pacote(caminho_pacote)
+    else:
+        modelos = {entidade: spacy.load(caminho) for entidade, caminho in CAMINHOS_MODELOS.items()}
+    # Modelos de NOME_PACIENTE salvos antes do gazetteer ganham o componente aqui
+    if "NOME_PACIENTE" in modelos:
+        adicionar_gazetteer(modelos["NOME_PACIENTE"])
+    return modelos
+
+
+# Entidades esperadas (a ordem é o id do label em ResultadoExtracao)
+ENTIDADES_ESPERADAS = list(ENTIDADES)
 
 # def extrair_entidades_multimodelo(texto, modelos):
 #     entidades = {ent: [] for ent in ENTIDADES_ESPERADAS}
@@ -181,12 +165,105 @@ ENTIDADES_ESPERADAS = [
 
     #return entidades
 
-def extrair_entidades_multimodelo(texto, modelos):
+def extrair_entidades_multimodelo(texto, modelos, **kwargs):
+    return extrair_entidades_lote([texto], modelos, **kwargs)[0]
+
+def extrair_entidades_lote(textos, modelos, **kwargs):
+    """Como extrair_resultados, mas devolve os dicts de strings de cada texto."""
+    return [resultado.entidades for resultado in extrair_resultados(textos, modelos, **kwargs)]
+
+def extrair_resultados(textos, modelos, batch_size=64, max_chars=MAX_CHARS, sobreposicao=SOBREPOSICAO,
+                       n_process=1, normalizar_ocr=True, ids=None, confianca=False, beam_width=BEAM_WIDTH,
+                       cascata=None, tipo_doc_por_vocabulario=False):
+    """
+    Versão em lote: os textos passam pela normalização de OCR
+    (normalizacao_ocr.py), os longos são divididos em fragmentos de até
+    'max_chars' (fragmentos_texto.py) e cada modelo roda um nlp.pipe sobre
+    todos os fragmentos, agrupados por tamanho (lotes_por_tamanho.py).
+    Retorna um ResultadoExtracao por texto (spans como offsets, strings
+    criadas sob demanda), na ordem de 'textos'; 'ids' padrão: 1..n.
+
+    Com confianca=True o NER de cada modelo também decodifica com beam
+    (confianca_ner.py, sempre em um processo) e cada entidade sai com a sua
+    probabilidade; ver separar_para_revisao().
+
+    Com uma 'cascata' (cascata_modelos.Cascata), cada modelo só roda nos
+    fragmentos em que o seu gatilho aparece; nos outros o doc fica só
+    tokenizado, sem entidades.
+
+    Com tipo_doc_por_vocabulario=True o modelo TIPO_DOC não roda: o tipo é
+    a primeira ocorrência do vocabulário fechado (palavras_chave.py), o que
+    basta em texto limpo.
+    """
+    normalizados = [normalizar(texto) if normalizar_ocr else TextoNormalizado(texto, texto, []) for texto in textos]
+    fragmentos = [dividir_texto(norm.texto, max_chars, sobreposicao) for norm in normalizados]
+    planos = [frag.texto for frags in fragmentos for frag in frags]
+
+    docs_por_modelo, confiancas_por_modelo = {}, {}
+    for entidade, nlp_model in modelos.items():
+        if tipo_doc_por_vocabulario and entidade == "TIPO_DOC":
+            continue
+        indices = cascata.ativos(entidade, planos) if cascata else range(len(planos))
+        textos_modelo = [planos[i] for i in indices] if cascata else planos
+        if confianca:
+            docs, confiancas = docs_com_confianca(nlp_model, textos_modelo, batch_size=batch_size, beam_width=beam_width)
+        else:
+            docs = pipe_por_tamanho(nlp_model, textos_modelo, batch_size=batch_size, n_process=n_process)
+        if cascata:
+            docs = expandir(docs, indices, len(planos), lambda i, nlp=nlp_model: nlp.make_doc(planos[i]))
+            if confianca:
+                confiancas = expandir(confiancas, indices, len(planos), lambda i: {})
+        docs_por_modelo[entidade] = docs
+        if confianca:
+            confiancas_por_modelo[entidade] = confiancas
+
+    resultados = []
+    posicao = 0
+    for id_texto, norm, frags in zip(ids or range(1, len(textos) + 1), normalizados, fragmentos):
+        fim = posicao + len(frags)
+        spans = {entidade: spans_globais(frags, docs[posicao:fim]) for entidade, docs in docs_por_modelo.items()}
+        if tipo_doc_por_vocabulario:
+            spans["TIPO_DOC"] = [SpanGlobal(ini, fim_tipo, "TIPO_DOC", norm.texto[ini:fim_tipo])
+                                 for ini, fim_tipo, _ in tipos_no_texto(norm.texto)[:1]]
+        confiancas = None
+        if confianca:
+            # Offsets globais; na sobreposição entre fragmentos fica a maior probabilidade
+            # (SEM_CONFIANCA, dos spans do gazetteer, só fica se nenhum fragmento pontuou o span)
+            confiancas = {}
+            for lista in confiancas_por_modelo.values():
+                for frag, conf in zip(frags, lista[posicao:fim]):
+                    for (inicio, fim_span, label), p in conf.items():
+                        chave = (frag.inicio + inicio, frag.inicio + fim_span, label)
+                        confiancas[chave] = max(p, confiancas.get(chave, SEM_CONFIANCA))
+            if tipo_doc_por_vocabulario:
+                confiancas.update(((s.start_char, s.end_char, s.label_), 1.0) for s in spans["TIPO_DOC"])
+        resultados.append(ResultadoExtracao.de_entidades(id_texto, norm, entidades_dos_spans(spans), spans, confiancas))
+        posicao = fim
+    return resultados
+
+def separar_para_revisao(resultados, limiares=None):
+    """
+    (automaticos, revisao): os resultados com alguma entidade abaixo do
+    limiar da sua entidade ('limiares' {entidade: mínimo}, padrão
+    LIMIAR_REVISAO) vão para revisão; os demais seguem sem revisão.
+    """
+    automaticos, revisao = [], []
+    for resultado in resultados:
+        (revisao if resultado.precisa_revisao(limiares) else automaticos).append(resultado)
+    return automaticos, revisao
+
+def _limiar(valor):
+    entidade, _, minimo = valor.partition("=")
+    if entidade not in ENTIDADES or not minimo:
+        raise argparse.ArgumentTypeError(f"use ENTIDADE=valor com uma de {', '.join(ENTIDADES)}")
+    return entidade, float(minimo)
+
+def entidades_dos_spans(spans):
+    """Pós-processa as entidades de um texto ({entidade: spans de cada modelo})."""
     entidades = {ent: [] for ent in ENTIDADES_ESPERADAS}
     
-    for entidade, nlp_model in modelos.items():
-        doc = nlp_model(texto)
-        for ent in doc.ents:
+    for entidade, ents in spans.items():
+        for ent in ents:
             texto_ent = ent.text.strip()
             label_ent = ent.label_
             
@@ -213,7 +290,8 @@ def extrair_entidades_multimodelo(texto, modelos):
             #         entidades["NOME_PACIENTE"].append(texto_ent)
             
             elif entidade == "NOME_PACIENTE":
-                print(f"[DEBUG] Modelo NOME_PACIENTE encontrou: '{texto_ent}'")
+                # Formatado só com NIVEL_LOG=DEBUG (ou --debug)
+                log.debug("Modelo NOME_PACIENTE encontrou: %r", texto_ent)
                 if texto_ent not in entidades["NOME_PACIENTE"]:
                     entidades["NOME_PACIENTE"].append(texto_ent)
 
@@ -249,6 +327,21 @@ def extrair_entidades_multimodelo(texto, modelos):
     return entidades
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extrai as entidades dos exemplos de atestados")
+    parser.add_argument("--saida", default="resultados_entidades.json", help=".json, .jsonl ou .msgpack")
+    parser.add_argument("--debug", action="store_true", help="logs em nível DEBUG e JSON indentado (o mesmo que NIVEL_LOG=DEBUG)")
+    parser.add_argument("--confianca", action="store_true", help="probabilidade de cada entidade pelo beam do NER")
+    parser.add_argument("--limiar", type=_limiar, action="append", default=[], metavar="ENTIDADE=VALOR",
+                        help="confiança mínima sem revisão (implica --confianca; padrão 0.8)")
+    parser.add_argument("--revisao", help="grava à parte os resultados que precisam de revisão")
+    parser.add_argument("--sem-cascata", action="store_true", help="roda todos os modelos em todos os textos")
+    parser.add_argument("--tipo-doc-vocabulario", action="store_true", help="TIPO_DOC pelo vocabulário fechado, sem o modelo")
+    args = parser.parse_args()
+    if args.debug:
+        configurar_logs("DEBUG")
+    limiares = dict(args.limiar)
+    usar_confianca = args.confianca or bool(limiares) or bool(args.revisao)
+
     exemplos = [
         #01 - Não tem CID
         "ATESTADO Atesto para os devidos fins que FLAVIO AUGUSTO BERNASKI DA SILVA compareceu para atendimento psicológico no dia 05/04/2023 das 11h30 às 12:00.",
@@ -333,23 +426,39 @@ if __name__ == "__main__":
     #     print(json.dumps(entidades, indent=4, ensure_ascii=False))
         
     
+    modelos = carregar_modelos(os.environ.get("PACOTE_MODELOS", CAMINHO_PACOTE))
+
     resultados = []  # Lista para acumular os resultados
 
-    for i, texto in enumerate(exemplos, start=1):
-        entidades = extrair_entidades_multimodelo(texto, modelos)
-        resultado = {
-            "id": i,
-            "texto": texto,
-            "entidades": entidades
-        }
+    # Todos os exemplos de uma vez, em lotes agrupados por tamanho
+    # Cada modelo só roda nos textos em que o seu gatilho aparece (cascata_modelos.py)
+    cascata = None if args.sem_cascata else Cascata()
+    extraidos = extrair_resultados(exemplos, modelos, confianca=usar_confianca, cascata=cascata,
+                                   tipo_doc_por_vocabulario=args.tipo_doc_vocabulario)
+    for resultado in extraidos:
+        # JSON: entidades + valores tipados (datas ISO, horários HH:MM, dias, CRM)
+        resultado = resultado.para_json(limiares=limiares)
         resultados.append(resultado)
 
-        # Ainda imprime no console para depuração
-        print(f"\n--- Exemplo {i} ---")
-        print(json.dumps(entidades, indent=4, ensure_ascii=False))
+        # JSON indentado por exemplo só no nível DEBUG (serializado só se for emitido)
+        log.debug(
+            "Exemplo %s:\n%s", resultado["id"],
+            Preguicoso(lambda r=resultado: para_json(r["entidades"], pretty=True).decode("utf-8")),
+        )
+
+    # Compacto por padrão (indentado com --debug); backend: orjson/msgspec/json
+    salvar(resultados, args.saida, pretty=args.debug)
+
+    if usar_confianca:
+        _, revisao = separar_para_revisao(extraidos, limiares)
+        print(f"🔎 {len(revisao)} de {len(extraidos)} documentos com entidades abaixo do limiar")
+        if args.revisao:
+            salvar([r.para_json(limiares=limiares) for r in revisao], args.revisao, pretty=args.debug)
+            print(f"   Para revisão em '{args.revisao}'")
 
-    # Salvar em JSON no final
-    with open("resultados_entidades.json", "w", encoding="utf-8") as f:
-        json.dump(resultados, f, indent=4, ensure_ascii=False)
+    if cascata:
+        for entidade, c in cascata.resumo().items():
+            log.info("Cascata %s: %d executados, %d pulados (%.0f%%)",
+                     entidade, c["executados"], c["pulados"], 100 * c["fracao_pulada"])
 
-    print("\n✅ Resultados salvos em 'resultados_entidades.json'")
+    print(f"\n✅ Resultados salvos em '{args.saida}' (JSON: {BACKEND_JSON})")
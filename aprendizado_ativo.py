@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Amostragem ativa: quais atestados ainda não rotulados vale mais rotular.
+
+Os modelos atuais rodam sobre o pool em lote (nlp.pipe por tamanho, com a
+mesma normalização e fragmentação da extração) e cada documento recebe um
+score de incerteza:
+- beam: cada span previsto soma 1 - |2p - 1| (1 com p = 0.5, 0 com certeza)
+  e conta 1 se o beam nem contém o span do guloso; spans que só o beam
+  considera somam o mesmo termo; spans sem confiança (os que o
+  gazetteer acrescenta depois do NER) ficam de fora;
+- conflito entre modelos: spans de modelos diferentes sobrepostos;
+- conflito regra x modelo: o pós-processamento do app_OCR rejeita o span do
+  modelo (processar_cid, limpar_data, validar_tipo_documento,
+  validar_nome_paciente) ou o gatilho da entidade aparece no texto e o
+  modelo não previu nada.
+
+Os top-k vão para um .jsonl no formato de treino ([texto, {"entities": ...}])
+com as previsões como pré-anotação, mais o score e os motivos.
+
+Uso:
+    python aprendizado_ativo.py pool.jsonl --k 50 --saida para_rotular.jsonl \\
+        --excluir ner_treino_split.json ner_validacao_split.json
+"""
+
+import os
+import re
+import json
+import argparse
+
+from app_OCR import carregar_modelos, processar_cid, limpar_data, validar_tipo_documento, validar_nome_paciente
+from confianca_ner import BEAM_WIDTH, docs_com_confianca
+from resultado_extracao import SEM_CONFIANCA
+from duplicatas import deduplicar_dados, sem_vazamento
+from fragmentos_texto import dividir_texto
+from normalizacao_ocr import normalizar
+from pacote_modelos import CAMINHO_PACOTE
+
+PESO_CONFLITO_MODELOS = 1.0
+PESO_CONFLITO_REGRA = 1.0
+
+# Span do modelo que o pós-processamento aceita
+VALIDADORES = {
+    "CID": lambda texto: processar_cid(texto) is not None,
+    "DATA": lambda texto: limpar_data(texto) is not None,
+    "TIPO_DOC": validar_tipo_documento,
+    "NOME_PACIENTE": validar_nome_paciente,
+}
+
+# Indício no texto de que o modelo deveria ter achado algo
+GATILHOS_REGRA = {
+    "CID": re.compile(r"\bCID\s*[:_\-]?\s*[A-Z]\d{2}", re.IGNORECASE),
+    "DATA": re.compile(r"\b\d{1,2}[/\-.]\d{1,2}[/\-.]\d{2,4}\b"),
+    "HORARIOS": re.compile(r"\b(?:[01]?\d|2[0-3])\s*[:h]\s*[0-5]\d\b"),
+    "TEMPO_AFASTAMENTO": re.compile(r"\bafastamento\s+de\b", re.IGNORECASE),
+    "CRM": re.compile(r"\b(?:CRM|CREFITO|COREN|CRO|CRP|CRFa)\b", re.IGNORECASE),
+}
+
+
+def _incerteza(p):
+    return 1.0 - abs(2.0 * p - 1.0)
+
+
+def _sobreposicoes(spans):
+    """Pares de spans de modelos diferentes que se sobrepõem."""
+    todos = sorted((ini, fim, entidade) for entidade, lista in spans.items() for ini, fim, *_ in lista)
+    conflitos = 0
+    for i, (ini, fim, entidade) in enumerate(todos):
+        for ini2, fim2, entidade2 in todos[i + 1:]:
+            if ini2 >= fim:
+                break
+            if entidade2 != entidade:
+                conflitos += 1
+    return conflitos
+
+
+def _conflitos_regra(texto, spans):
+    motivos = []
+    for entidade, lista in spans.items():
+        validar = VALIDADORES.get(entidade)
+        if validar:
+            motivos.extend(f"{entidade} rejeitado: {s[3]!r}" for s in lista if not validar(s[3].strip()))
+        gatilho = GATILHOS_REGRA.get(entidade)
+        if gatilho and not lista and gatilho.search(texto):
+            motivos.append(f"{entidade}: padrão no texto sem previsão do modelo")
+    return motivos
+
+
+def pontuar(textos, modelos, batch_size=64, beam_width=BEAM_WIDTH):
+    """Um dict por texto: score, componentes, motivos e as previsões (offsets do texto original)."""
+    normalizados = [normalizar(texto) for texto in textos]
+    fragmentos = [dividir_texto(norm.texto) for norm in normalizados]
+    planos = [frag.texto for frags in fragmentos for frag in frags]
+
+    por_modelo = {
+        entidade: docs_com_confianca(nlp, planos, batch_size=batch_size, beam_width=beam_width)
+        for entidade, nlp in modelos.items()
+    }
+
+    resultados = []
+    posicao = 0
+    for texto, norm, frags in zip(textos, normalizados, fragmentos):
+        fim = posicao + len(frags)
+        spans, incerteza = {}, 0.0
+        for entidade, (docs, confiancas) in por_modelo.items():
+            lista = []
+            for frag, doc, confianca in zip(frags, docs[posicao:fim], confiancas[posicao:fim]):
+                previstos = set()
+                for ent in doc.ents:
+                    chave = (ent.start_char, ent.end_char, ent.label_)
+                    previstos.add(chave)
+                    p = confianca.get(chave, 0.0)
+                    lista.append((frag.inicio + ent.start_char, frag.inicio + ent.end_char, ent.label_, ent.text, p))
+                    if p == SEM_CONFIANCA:
+                        continue  # span do gazetteer: o beam não o pontua, não conta como incerteza
+                    # p = 0: o guloso previu um span que o beam nem considera
+                    incerteza += _incerteza(p) if p > 0 else 1.0
+                incerteza += sum(_incerteza(p) for chave, p in confianca.items() if chave not in previstos)
+            spans[entidade] = lista
+        posicao = fim
+
+        conflitos = _sobreposicoes(spans)
+        motivos = _conflitos_regra(norm.texto, spans)
+        entities = sorted(
+            [*norm.para_original(ini, fim_), label]
+            for lista in spans.values() for ini, fim_, label, *_ in lista
+        )
+        resultados.append({
+            "texto": texto,
+            "score": round(incerteza + PESO_CONFLITO_MODELOS * conflitos + PESO_CONFLITO_REGRA * len(motivos), 4),
+            "incerteza_beam": round(incerteza, 4),
+            "conflitos_modelos": conflitos,
+            "motivos": motivos,
+            "entities": entities,
+        })
+    return resultados
+
+
+def selecionar(textos, modelos, k=50, excluir=(), **kwargs):
+    """
+    Os k documentos mais informativos do pool (score decrescente). Textos
+    repetidos no pool ou já presentes em 'excluir' (dados rotulados) saem antes.
+    """
+    pool = deduplicar_dados(list(textos))
+    if excluir:
+        pool = sem_vazamento(pool, list(excluir))
+    pontuados = pontuar(pool, modelos, **kwargs)
+    return sorted(pontuados, key=lambda r: r["score"], reverse=True)[:k]
+
+
+def ler_pool(caminho):
+    """Textos de um .txt (um por linha), .jsonl ou .json (strings, {"texto": ...} ou [texto, ...])."""
+    with open(caminho, "r", encoding="utf-8") as f:
+        if caminho.endswith(".txt"):
+            return [linha.strip() for linha in f if linha.strip()]
+        itens = [json.loads(linha) for linha in f if linha.strip()] if caminho.endswith(".jsonl") else json.load(f)
+    textos = []
+    for item in itens:
+        if isinstance(item, dict):
+            item = item.get("texto") or item.get("text")
+        elif isinstance(item, list) and item:
+            item = item[0]
+        if isinstance(item, str):
+            textos.append(item)
+    return textos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seleciona os documentos mais informativos para rotular")
+    parser.add_argument("pool", help=".txt, .jsonl ou .json com textos não rotulados")
+    parser.add_argument("--k", type=int, default=50)
+    parser.add_argument("--saida", default="para_rotular.jsonl")
+    parser.add_argument("--excluir", nargs="*", default=[], help="arquivos já rotulados (não voltam para rotulação)")
+    parser.add_argument("--beam-width", type=int, default=BEAM_WIDTH)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    modelos = carregar_modelos(os.environ.get("PACOTE_MODELOS", CAMINHO_PACOTE))
+    rotulados = [texto for caminho in args.excluir for texto in ler_pool(caminho)]
+    escolhidos = selecionar(
+        ler_pool(args.pool), modelos, k=args.k, excluir=rotulados,
+        batch_size=args.batch_size, beam_width=args.beam_width,
+    )
+
+    with open(args.saida, "w", encoding="utf-8") as f:
+        for r in escolhidos:
+            anotacao = {"entities": r["entities"], "score": r["score"], "motivos": r["motivos"]}
+            f.write(json.dumps([r["texto"], anotacao], ensure_ascii=False) + "\n")
+
+    for r in escolhidos[:10]:
+        print(f"{r['score']:7.3f} | beam {r['incerteza_beam']:.2f} | conflitos {r['conflitos_modelos']} | "
+              f"{len(r['motivos'])} regras | {r['texto'][:60]!r}")
+    print(f"\n✅ {len(escolhidos)} documentos para rotular em '{args.saida}'")
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Avaliação comum dos modelos NER: precisão/recall/F1 sobre um DocBin de
+validação e velocidade de inferência (docs/s e palavras/s) em CPU.
+
+Usado pelos relatórios de quantização, destilação e sweep.
+"""
+
+import time
+from spacy.tokens import DocBin
+from spacy.training import Example
+
+
+def carregar_docs(nlp, caminho_docbin):
+    """Lê um .spacy com o vocab do modelo avaliado."""
+    return list(DocBin().from_disk(caminho_docbin).get_docs(nlp.vocab))
+
+
+def medir_velocidade(nlp, textos, batch_size=64, repeticoes=1):
+    """Retorna (docs/s, palavras/s) de nlp.pipe sobre 'textos'."""
+    palavras = 0
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for doc in nlp.pipe(textos, batch_size=batch_size):
+            palavras += len(doc)
+    duracao = max(time.perf_counter() - inicio, 1e-9)
+    return len(textos) * repeticoes / duracao, palavras / duracao
+
+
+def avaliar_docbin(nlp, caminho_docbin, batch_size=64):
+    """
+    Avalia 'nlp' contra as entidades anotadas no DocBin.
+    Retorna dict com p, r, f1, docs_s e palavras_s.
+    """
+    referencias = carregar_docs(nlp, caminho_docbin)
+    exemplos = [Example(nlp.make_doc(ref.text), ref) for ref in referencias]
+    scores = nlp.evaluate(exemplos, batch_size=batch_size)
+
+    docs_s, palavras_s = medir_velocidade(nlp, [ref.text for ref in referencias], batch_size)
+    return {
+        "p": scores.get("ents_p") or 0.0,
+        "r": scores.get("ents_r") or 0.0,
+        "f1": scores.get("ents_f") or 0.0,
+        "docs_s": docs_s,
+        "palavras_s": palavras_s,
+    }
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+Banco de nomes brasileiros e preenchimentos para os geradores sintéticos.
+
+Em vez de chamar o Faker a cada exemplo (lento por chamada e pesado para
+importar), o banco é construído uma única vez como arrays NumPy, salvo em
+disco e amostrado por índices. Não depende de locale do sistema.
+
+Uso:
+    from banco_nomes import amostrar_nomes, amostrar
+    nomes = amostrar_nomes(100)
+    clinicas = amostrar("clinicas", 10)
+
+Saída em disco:
+- banco_nomes.npz (cache reconstruído automaticamente se ausente)
+"""
+
+import os
+import random
+import numpy as np
+
+CAMINHO_BANCO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "banco_nomes.npz")
+TAMANHO_PADRAO = 20000
+VERSAO_BANCO = 1
+
+# -------------------------------
+# Listas base (usadas quando o Faker não está instalado)
+# -------------------------------
+PRIMEIROS_NOMES = [
+    "Ana", "Maria", "Julia", "Beatriz", "Fernanda", "Mariana", "Patrícia", "Juliana",
+    "Camila", "Amanda", "Sofia", "Gabriela", "Larissa", "Letícia", "Isabela", "Vitória",
+    "Yara", "Pietra", "Raimunda", "Francisca", "Antônia", "Luiza", "Helena", "Alice",
+    "Carlos", "João", "Pedro", "Lucas", "Gustavo", "Rafael", "Rodrigo", "Paulo",
+    "André", "Anderson", "Marcos", "Daniel", "Felipe", "Gabriel", "Henrique", "Eduardo",
+    "Ricardo", "Roberto", "Tiago", "Flávio", "Vinicius", "Matheus", "José", "Francisco",
+    "Antônio", "Luiz", "Miguel", "Arthur", "Heitor", "Bernardo", "Davi", "Samuel",
+]
+
+SOBRENOMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Lima", "Pereira", "Costa", "Ferreira",
+    "Rodrigues", "Almeida", "Nascimento", "Carvalho", "Gomes", "Martins", "Araújo",
+    "Ribeiro", "Barbosa", "Rocha", "Dias", "Mendonça", "Fontes", "Nunes", "Moreira",
+    "Peixoto", "Lustosa", "Bernaski", "Saulo", "Fernandes", "Moraes", "Porto",
+    "Albuquerque", "Masson", "Schiavon", "Bressan", "Silveira", "Cavalcanti", "Monteiro",
+    "Teixeira", "Cardoso", "Correia", "Mendes", "Freitas", "Barros", "Pinto", "Vieira",
+]
+
+CLINICAS = [
+    "Clínica Santa Maria", "Hospital São João", "Laboratório Vida", "Clínica Saúde",
+    "Hospital das Clínicas", "Unidade Básica de Saúde", "Policlínica Central",
+    "Clínica Bem Estar", "Hospital Santa Casa", "Centro Médico Esperança",
+]
+
+CIDADES = [
+    "Recife", "Palmares", "Maringá", "Belo Horizonte", "São Paulo", "Rio de Janeiro",
+    "Curitiba", "Salvador", "Fortaleza", "Porto Alegre", "Goiânia", "Manaus",
+    "Florianópolis", "Natal", "Vitória", "Cuiabá", "Maceió", "Brasília",
+]
+
+# Meses em português, para formatar datas sem depender de locale
+MESES = [
+    "janeiro", "fevereiro", "março", "abril", "maio", "junho",
+    "julho", "agosto", "setembro", "outubro", "novembro", "dezembro",
+]
+MESES_ABREV = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
+
+# Cache em memória: carregado uma vez por processo
+_BANCO = None
+
+
+def _listas_faker():
+    """Retorna (primeiros nomes, sobrenomes) do provider pt_BR do Faker, se instalado."""
+    try:
+        from faker.providers.person.pt_BR import Provider
+    except ImportError:
+        return PRIMEIROS_NOMES, SOBRENOMES
+    primeiros = list(Provider.first_names_female) + list(Provider.first_names_male)
+    return primeiros, list(Provider.last_names)
+
+
+def construir_banco(tamanho=TAMANHO_PADRAO, semente=42):
+    """
+    Constrói o banco completo como dicionário de arrays NumPy.
+    Os nomes completos combinam um primeiro nome com 1 a 3 sobrenomes.
+    """
+    rng = np.random.default_rng(semente)
+    primeiros, sobrenomes = _listas_faker()
+    primeiros = np.array(sorted(set(primeiros)))
+    sobrenomes = np.array(sorted(set(sobrenomes)))
+
+    idx_primeiro = rng.integers(0, len(primeiros), size=tamanho)
+    qtd_sobrenomes = rng.integers(1, 4, size=tamanho)
+    idx_sobrenomes = rng.integers(0, len(sobrenomes), size=(tamanho, 3))
+
+    nomes = [
+        " ".join([primeiros[i]] + list(sobrenomes[idx_sobrenomes[k, :qtd_sobrenomes[k]]]))
+        for k, i in enumerate(idx_primeiro)
+    ]
+
+    return {
+        "versao": np.array([VERSAO_BANCO]),
+        "nomes": np.array(nomes),
+        "primeiros_nomes": primeiros,
+        "sobrenomes": sobrenomes,
+        "clinicas": np.array(CLINICAS),
+        "cidades": np.array(CIDADES),
+    }
+
+
+def carregar_banco(caminho=CAMINHO_BANCO, tamanho=TAMANHO_PADRAO):
+    """Carrega o banco do disco; se não existir (ou for de outra versão), constrói e salva."""
+    global _BANCO
+    if _BANCO is not None:
+        return _BANCO
+
+    if os.path.exists(caminho):
+        with np.load(caminho, allow_pickle=False) as arquivo:
+            banco = {chave: arquivo[chave] for chave in arquivo.files}
+        if int(banco.get("versao", [0])[0]) == VERSAO_BANCO:
+            _BANCO = banco
+            return _BANCO
+
+    banco = construir_banco(tamanho)
+    np.savez(caminho, **banco)
+    _BANCO = banco
+    return _BANCO
+
+
+def amostrar(categoria, n, rng=None):
+    """
+    Amostra n valores (com reposição) de uma categoria do banco. Sem 'rng',
+    a semente vem do módulo random: random.seed() nos scripts de treino
+    também fixa estas amostras.
+    """
+    valores = carregar_banco()[categoria]
+    rng = rng if rng is not None else np.random.default_rng(random.getrandbits(64))
+    return valores[rng.integers(0, len(valores), size=n)].tolist()
+
+
+def amostrar_nomes(n, rng=None):
+    """Amostra n nomes completos de pessoas."""
+    return amostrar("nomes", n, rng)
+
+
+def formatar_data(data, formato):
+    """strftime com %B/%b em português, sem precisar de locale.setlocale."""
+    formato = formato.replace("%B", MESES[data.month - 1]).replace("%b", MESES_ABREV[data.month - 1])
+    return data.strftime(formato)
+
+
+if __name__ == "__main__":
+    banco = carregar_banco()
+    print(f"✅ Banco de nomes em {CAMINHO_BANCO}: {len(banco['nomes'])} nomes")
+    print(f"Exemplos: {amostrar_nomes(5)}")
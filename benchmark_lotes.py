@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark dos lotes agrupados por tamanho (lotes_por_tamanho.py) sobre a
+distribuição real de tamanhos dos atestados.
+
+Compara, para os mesmos textos:
+- treino: spacy.batch_by_words (size=1000) x atestados.LotesPorTamanho.v1
+  -> nº de lotes, desperdício de padding e maior lote (n_docs * maior doc)
+- inferência: nlp.pipe na ordem original x pipe_por_tamanho
+  -> padding dos lotes de batch_size docs e docs/s de cada modelo
+
+Uso:
+    python benchmark_lotes.py
+    python benchmark_lotes.py corpus.jsonl --batch-size 64 --repeticoes 3 --sem-modelos
+"""
+
+import os
+import json
+import random
+import argparse
+
+from spacy.util import minibatch, minibatch_by_words
+
+from app_OCR import carregar_modelos
+from avaliacao import medir_velocidade
+from destilar_modelos import ler_corpus
+from lotes_por_tamanho import lotes_por_tamanho, desperdicio_padding, tamanho_item
+from pacote_modelos import CAMINHO_PACOTE
+
+CORPORA_PADRAO = [
+    "ner_treino_split.json", "ner_validacao_split.json",
+    "ner_treino_nome_paciente_expandido.json", "ner_validacao_nome_paciente_expandido.json",
+]
+
+
+def distribuicao(tamanhos):
+    ordenados = sorted(tamanhos)
+    def p(q):
+        return ordenados[min(len(ordenados) - 1, int(q * (len(ordenados) - 1)))]
+    return {"n": len(ordenados), "min": ordenados[0], "p25": p(0.25), "p50": p(0.5),
+            "p90": p(0.9), "p99": p(0.99), "max": ordenados[-1]}
+
+
+def resumo_lotes(lotes):
+    custos = [len(lote) * max(tamanho_item(t) for t in lote) for lote in lotes]
+    return {"lotes": len(lotes), "padding": desperdicio_padding(lotes), "maior_lote": max(custos)}
+
+
+def comparar_treino(textos, tamanho=1000):
+    embaralhados = textos[:]
+    random.Random(0).shuffle(embaralhados)
+    por_palavras = list(minibatch_by_words(embaralhados, size=tamanho, tolerance=0.2, get_length=tamanho_item))
+    por_tamanho = list(lotes_por_tamanho(embaralhados, tamanho))
+    return {"batch_by_words": resumo_lotes(por_palavras), "por_tamanho": resumo_lotes(por_tamanho)}
+
+
+def comparar_inferencia(textos, batch_size):
+    ordenados = sorted(textos, key=len)
+    return {
+        "ordem_original": resumo_lotes(list(minibatch(textos, batch_size))),
+        "por_tamanho": resumo_lotes(list(minibatch(ordenados, batch_size))),
+    }
+
+
+def medir_modelos(modelos, textos, batch_size, repeticoes):
+    """docs/s de cada modelo: ordem original x ordenado por tamanho."""
+    ordenados = sorted(textos, key=len)
+    medidas = {}
+    for entidade, nlp in modelos.items():
+        list(nlp.pipe(textos[:batch_size]))  # aquecimento
+        original, _ = medir_velocidade(nlp, textos, batch_size, repeticoes)
+        por_tamanho, _ = medir_velocidade(nlp, ordenados, batch_size, repeticoes)
+        medidas[entidade] = {"original_docs_s": original, "por_tamanho_docs_s": por_tamanho,
+                             "ganho": por_tamanho / max(original, 1e-9)}
+    return medidas
+
+
+def imprimir_relatorio(resultado):
+    d = resultado["distribuicao"]
+    print("\n" + "=" * 72)
+    print(f"Tamanho (palavras) de {d['n']} textos: min={d['min']} p25={d['p25']} p50={d['p50']} "
+          f"p90={d['p90']} p99={d['p99']} max={d['max']}")
+    print("-" * 72)
+    print(f"{'cenário':<34} | {'lotes':>6} | {'padding':>8} | {'maior lote':>10}")
+    print("-" * 72)
+    for cenario in ("treino", "inferencia"):
+        for nome, r in resultado[cenario].items():
+            print(f"{cenario + ' / ' + nome:<34} | {r['lotes']:>6} | {r['padding']:>7.1%} | {r['maior_lote']:>10}")
+    if resultado.get("modelos"):
+        print("-" * 72)
+        print(f"{'modelo':<18} | {'original docs/s':>15} | {'por tamanho docs/s':>18} | {'ganho':>6}")
+        for entidade, m in resultado["modelos"].items():
+            print(f"{entidade:<18} | {m['original_docs_s']:>15.1f} | {m['por_tamanho_docs_s']:>18.1f} | "
+                  f"{m['ganho']:>5.2f}x")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de lotes agrupados por tamanho")
+    parser.add_argument("corpus", nargs="*", default=None)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--tamanho-treino", type=int, default=1000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--sem-modelos", action="store_true", help="só o padding, sem medir os modelos")
+    parser.add_argument("--pacote", default=os.environ.get("PACOTE_MODELOS", CAMINHO_PACOTE))
+    args = parser.parse_args()
+
+    textos = ler_corpus(args.corpus or [c for c in CORPORA_PADRAO if os.path.exists(c)])
+    resultado = {
+        "distribuicao": distribuicao([tamanho_item(t) for t in textos]),
+        "treino": comparar_treino(textos, args.tamanho_treino),
+        "inferencia": comparar_inferencia(textos, args.batch_size),
+    }
+    if not args.sem_modelos:
+        resultado["modelos"] = medir_modelos(carregar_modelos(args.pacote), textos, args.batch_size, args.repeticoes)
+
+    imprimir_relatorio(resultado)
+    with open("benchmark_lotes.json", "w", encoding="utf-8") as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print("\n✅ Resultados salvos em 'benchmark_lotes.json'")
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Triagem barata antes dos modelos: quais dos sete modelos podem achar algo
+em cada texto.
+
+Cada modelo tem um gatilho (regex compilada, aplicada ao texto já
+normalizado); se o gatilho não aparece no fragmento, o modelo não roda
+nele e o fragmento fica sem entidades daquele modelo. Os gatilhos são
+largos de propósito (um falso positivo só custa rodar o modelo; um falso
+negativo perde a entidade):
+- CID: a palavra CID ou um código (letra + 2 dígitos);
+- TEMPO_AFASTAMENTO: a âncora "afastamento" (PADRAO_ANCORA do treino),
+  repouso/licença, número + unidade ou período/turno;
+- HORARIOS: dígitos com ":" ou "h" (ou "09 00", formato dos exemplos);
+- DATA: dígitos com separador, "dd de mês" ou nome de mês;
+- CRM: a sigla de um dos conselhos;
+- TIPO_DOC: um dos termos do vocabulário de tipos;
+- NOME_PACIENTE: sem gatilho (sempre roda).
+
+Os contadores (executados/pulados por modelo) acumulam entre chamadas.
+
+Uso:
+    cascata = Cascata()
+    resultados = extrair_resultados(textos, modelos, cascata=cascata)
+    print(cascata.resumo())
+"""
+
+import re
+from collections import Counter
+
+GATILHOS = {
+    "CID": re.compile(r"\bCID\b|\b[A-Z]\d{2}(?:\.\d{1,3})?\b", re.IGNORECASE),
+    "TEMPO_AFASTAMENTO": re.compile(
+        r"afastament|repouso|licen[çc]a|per[ií]odo|turno|"
+        r"\b\d{1,3}\s*(?:\([^)]{0,20}\)\s*)?(?:dias?|horas?|semanas?|m[êe]s(?:es)?)\b",
+        re.IGNORECASE,
+    ),
+    "HORARIOS": re.compile(r"\d\s*[:hH]\s*\d|\b\d{1,2}\s\d{2}\b"),
+    "DATA": re.compile(
+        r"\d{1,2}\s*[/\-.]\s*\d{1,2}|\b\d{1,2}\s+de\s+\w{3,9}|"
+        r"\b(?:jan|fev|mar|abr|mai|jun|jul|ago|set|out|nov|dez)[a-zç]*\b",
+        re.IGNORECASE,
+    ),
+    "CRM": re.compile(r"\b(?:CRM|CREFITO|COREN|CRO|CRP|CRFa)\b", re.IGNORECASE),
+    "TIPO_DOC": re.compile(r"atestad|declara[çc][ãa]o|declaracao|relat[óo]rio|receitu[áa]rio|laudo", re.IGNORECASE),
+    "NOME_PACIENTE": None,
+}
+
+
+class Cascata:
+    def __init__(self, gatilhos=None):
+        self.gatilhos = dict(GATILHOS, **(gatilhos or {}))
+        self.executados = Counter()
+        self.pulados = Counter()
+
+    def precisa(self, entidade, texto):
+        gatilho = self.gatilhos.get(entidade)
+        return gatilho is None or gatilho.search(texto) is not None
+
+    def modelos_para(self, texto, entidades):
+        """Entidades (chaves de 'modelos') cujo gatilho aparece no texto."""
+        return [entidade for entidade in entidades if self.precisa(entidade, texto)]
+
+    def ativos(self, entidade, textos):
+        """Índices dos textos em que o modelo da entidade deve rodar (e atualiza os contadores)."""
+        indices = [i for i, texto in enumerate(textos) if self.precisa(entidade, texto)]
+        self.executados[entidade] += len(indices)
+        self.pulados[entidade] += len(textos) - len(indices)
+        return indices
+
+    def resumo(self):
+        """{entidade: {"executados", "pulados", "fracao_pulada"}}."""
+        resumo = {}
+        for entidade in sorted(self.executados.keys() | self.pulados.keys()):
+            total = self.executados[entidade] + self.pulados[entidade]
+            resumo[entidade] = {
+                "executados": self.executados[entidade],
+                "pulados": self.pulados[entidade],
+                "fracao_pulada": round(self.pulados[entidade] / total, 4) if total else 0.0,
+            }
+        return resumo
+
+
+def expandir(valores, indices, total, vazio):
+    """Lista de tamanho 'total' com valores[k] na posição indices[k] e vazio(i) nas demais."""
+    saida = [None] * total
+    for i, valor in zip(indices, valores):
+        saida[i] = valor
+    return [vazio(i) if valor is None else valor for i, valor in enumerate(saida)]
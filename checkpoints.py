@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Checkpoints de treino em disco: modelo, estado do otimizador, estado dos
+geradores aleatórios e o estado do loop (época, passo, melhor F1...).
+
+Layout (um diretório por checkpoint, o mais recente é o de maior passo):
+    <diretorio>/passo-000500/modelo/        -> nlp.to_disk
+    <diretorio>/passo-000500/otimizador.pkl -> momentos do Adam etc.
+    <diretorio>/passo-000500/gradientes.pkl -> gradientes ainda não aplicados
+    <diretorio>/passo-000500/rng.pkl        -> random + numpy (+ início da época em curso)
+    <diretorio>/passo-000500/estado.json    -> estado do loop
+
+O otimizador do thinc indexa seus momentos por (id do nó, parâmetro) e o id
+muda a cada processo; por isso as chaves são gravadas como
+(componente, índice do nó no walk, parâmetro) e remapeadas na retomada.
+
+Os gradientes também vão para o checkpoint: o tok2vec compartilhado aplica
+os seus antes de o NER retropropagar pelo listener, então o que o NER manda
+a ele num passo só entra no otimizador no passo seguinte.
+"""
+
+import os
+import copy
+import json
+import random
+import shutil
+import pickle
+
+import numpy as np
+
+from pacote_modelos import iterar_parametros
+
+PREFIXO = "passo-"
+
+
+# -------------------------------
+# Otimizador
+# -------------------------------
+def _mapa_ids(nlp):
+    """id do nó -> (componente, índice no walk)."""
+    return {no.id: (comp, i) for comp, i, _, no in iterar_parametros(nlp)}
+
+
+def _remapear(estado, mapa):
+    """Troca as chaves (nó, parâmetro) dos dicionários do otimizador usando 'mapa'."""
+    novo = {}
+    for atributo, valor in estado.items():
+        if isinstance(valor, dict) and valor and all(isinstance(k, tuple) and len(k) == 2 for k in valor):
+            remapeado = copy.copy(valor)  # preserva o default_factory dos defaultdict
+            remapeado.clear()
+            for (no, nome), v in valor.items():
+                if no in mapa:
+                    remapeado[(mapa[no], nome)] = v
+            novo[atributo] = remapeado
+        else:
+            novo[atributo] = valor
+    return novo
+
+
+def _atributos(optimizer):
+    """Atributos do otimizador (o do thinc usa __slots__, sem __dict__), menos 'ops' e os não definidos."""
+    nomes = getattr(type(optimizer), "__slots__", None) or vars(optimizer)
+    return {nome: getattr(optimizer, nome) for nome in nomes if nome != "ops" and hasattr(optimizer, nome)}
+
+
+def estado_otimizador(nlp, optimizer):
+    """Estado do otimizador com chaves estáveis entre processos."""
+    return _remapear(_atributos(optimizer), _mapa_ids(nlp))
+
+
+def aplicar_estado_otimizador(nlp, optimizer, estado):
+    inverso = {pos: id_no for id_no, pos in _mapa_ids(nlp).items()}
+    for atributo, valor in _remapear(estado, inverso).items():
+        setattr(optimizer, atributo, valor)
+
+
+def gradientes(nlp):
+    """Gradientes acumulados nos nós, por (componente, índice do nó, parâmetro)."""
+    return {
+        (comp, i, nome): np.array(no.get_grad(nome))
+        for comp, i, nome, no in iterar_parametros(nlp)
+        if no.has_grad(nome)
+    }
+
+
+def aplicar_gradientes(nlp, grads):
+    for comp, i, nome, no in iterar_parametros(nlp):
+        if (comp, i, nome) in grads:
+            no.set_grad(nome, no.ops.asarray(grads[(comp, i, nome)]))
+
+
+# -------------------------------
+# Salvar / carregar
+# -------------------------------
+def salvar_checkpoint(diretorio, passo, nlp, optimizer, estado_loop, manter=2, inicio_epoca=None):
+    """
+    Grava um checkpoint atômico (diretório temporário + rename) e apaga os antigos.
+    'inicio_epoca': o que for preciso para refazer o embaralhamento da época em
+    curso (em treino.py: random.getstate() e a ordem dos exemplos).
+    """
+    destino = os.path.join(diretorio, f"{PREFIXO}{passo:06d}")
+    temporario = destino + ".tmp"
+    shutil.rmtree(temporario, ignore_errors=True)
+    os.makedirs(temporario)
+
+    nlp.to_disk(os.path.join(temporario, "modelo"))
+    with open(os.path.join(temporario, "otimizador.pkl"), "wb") as f:
+        pickle.dump(estado_otimizador(nlp, optimizer), f)
+    with open(os.path.join(temporario, "gradientes.pkl"), "wb") as f:
+        pickle.dump(gradientes(nlp), f)
+    with open(os.path.join(temporario, "rng.pkl"), "wb") as f:
+        pickle.dump({"random": random.getstate(), "numpy": np.random.get_state(), "epoca": inicio_epoca}, f)
+    with open(os.path.join(temporario, "estado.json"), "w", encoding="utf-8") as f:
+        json.dump({"passo": passo, **estado_loop}, f, ensure_ascii=False)
+
+    shutil.rmtree(destino, ignore_errors=True)
+    os.rename(temporario, destino)
+
+    for antigo in listar_checkpoints(diretorio)[:-manter]:
+        shutil.rmtree(antigo, ignore_errors=True)
+    return destino
+
+
+def listar_checkpoints(diretorio):
+    """Checkpoints completos, do mais antigo para o mais recente."""
+    if not os.path.isdir(diretorio):
+        return []
+    nomes = sorted(n for n in os.listdir(diretorio) if n.startswith(PREFIXO) and not n.endswith(".tmp"))
+    return [os.path.join(diretorio, n) for n in nomes]
+
+
+def ultimo_checkpoint(diretorio):
+    checkpoints = listar_checkpoints(diretorio)
+    return checkpoints[-1] if checkpoints else None
+
+
+def ler_estado(caminho):
+    """Estado do loop salvo no checkpoint (sem tocar em modelo, otimizador nem RNG)."""
+    with open(os.path.join(caminho, "estado.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def carregar_checkpoint(caminho, nlp, optimizer):
+    """
+    Restaura pesos, gradientes, otimizador e RNG em 'nlp'/'optimizer' (já criados com a
+    mesma config). Retorna o estado do loop salvo.
+
+    O RNG volta ao estado do passo salvo: o que precisa de outro estado (o
+    embaralhamento da época, com ler_inicio_epoca) deve rodar antes desta chamada.
+    """
+    nlp.from_disk(os.path.join(caminho, "modelo"))
+    with open(os.path.join(caminho, "otimizador.pkl"), "rb") as f:
+        aplicar_estado_otimizador(nlp, optimizer, pickle.load(f))
+    with open(os.path.join(caminho, "gradientes.pkl"), "rb") as f:
+        aplicar_gradientes(nlp, pickle.load(f))
+    estado = ler_estado(caminho)
+    restaurar_rng(caminho)
+    return estado
+
+
+def _ler_rng(caminho):
+    with open(os.path.join(caminho, "rng.pkl"), "rb") as f:
+        return pickle.load(f)
+
+
+def restaurar_rng(caminho):
+    rng = _ler_rng(caminho)
+    random.setstate(rng["random"])
+    np.random.set_state(rng["numpy"])
+
+
+def ler_inicio_epoca(caminho):
+    """Estado do início da época salva, gravado em salvar_checkpoint (None se não foi gravado)."""
+    return _ler_rng(caminho).get("epoca")
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Confiança das entidades pelo beam search do NER.
+
+O componente "ner" dos modelos é treinado no modo guloso, mas o mesmo
+modelo pode decodificar com beam: cada análise do beam tem uma
+probabilidade e a confiança de um span (start, end, label) é a soma das
+probabilidades das análises que o contêm (EntityRecognizer.scored_ents).
+
+docs_com_confianca() roda o pipeline uma vez até o NER (tok2vec, entity
+ruler...), aplica o NER guloso (as mesmas entidades de nlp.pipe) e o beam
+sobre os mesmos docs, sem recalcular o tok2vec. Os spans acrescentados
+por componentes depois do NER (gazetteer de nomes) não passam pelo beam e
+saem com SEM_CONFIANCA: não mandam o resultado para revisão.
+"""
+
+from spacy.util import minibatch
+
+from lotes_por_tamanho import pipe_por_tamanho
+from resultado_extracao import SEM_CONFIANCA
+
+BEAM_WIDTH = 16
+BEAM_DENSITY = 0.0001
+
+
+def docs_com_confianca(nlp, textos, batch_size=64, beam_width=BEAM_WIDTH, beam_density=BEAM_DENSITY):
+    """
+    (docs, confiancas): os docs com as entidades do NER guloso, na ordem de
+    'textos', e para cada doc {(start_char, end_char, label): probabilidade}
+    (SEM_CONFIANCA nos spans que não vieram do NER).
+    """
+    nomes = nlp.pipe_names
+    posicao_ner = nomes.index("ner")
+    depois = nomes[posicao_ner + 1:]
+    ner = nlp.get_pipe("ner")
+
+    docs = pipe_por_tamanho(nlp, textos, batch_size=batch_size, disable=["ner", *depois])
+
+    confiancas, do_ner = [], []
+    for lote in minibatch(docs, batch_size):
+        ner.set_annotations(lote, ner.predict(lote))
+        beams = ner.beam_parse(lote, beam_width=beam_width, beam_density=beam_density)
+        for doc, pontos in zip(lote, ner.scored_ents(beams)):
+            confiancas.append({
+                (doc[inicio:fim].start_char, doc[inicio:fim].end_char, label): min(prob, 1.0)
+                for (inicio, fim, label), prob in pontos.items()
+            })
+            do_ner.append({(ent.start_char, ent.end_char, ent.label_) for ent in doc.ents})
+
+    # Componentes depois do NER (se houver) rodam sobre os docs já anotados
+    for nome in depois:
+        docs = list(nlp.get_pipe(nome).pipe(docs))
+    if depois:
+        for doc, conf, spans_ner in zip(docs, confiancas, do_ner):
+            for ent in doc.ents:
+                chave = (ent.start_char, ent.end_char, ent.label_)
+                if chave not in spans_ner:
+                    conf[chave] = SEM_CONFIANCA
+    return docs, confiancas
+
+
+def confianca_do_span(confiancas, start_char, end_char, label):
+    """Probabilidade do span no beam (0.0 se nenhuma análise do beam o contém)."""
+    return confiancas.get((start_char, end_char, label), 0.0)
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Config de treino otimizada para CPU (tok2vec + ner), parametrizada.
+
+É a mesma config que estava embutida em treinar_modelo (Treinando_Data.py e
+Treinando_TIPO_DOC.py), agora com tamanho do modelo e hiperparâmetros de
+treino como argumentos, para destilação e sweeps.
+
+O batcher padrão continua o spacy.batch_by_words.v1 (batcher="palavras").
+batcher="tamanho" é opcional: usa os lotes agrupados por tamanho
+(lotes_por_tamanho.py, batch_size = limite de palavras com padding); fora do
+treino.py, o spacy train precisa de "--code lotes_por_tamanho.py" para achar
+o batcher registrado.
+"""
+
+# Batchers disponíveis para o parâmetro "batcher"
+BATCHERS = {
+    "tamanho": "atestados.LotesPorTamanho.v1",
+    "palavras": "spacy.batch_by_words.v1",
+}
+
+# Valores padrão = config original dos scripts de treino
+PARAMETROS_PADRAO = {
+    "width": 96,
+    "depth": 4,
+    "rows": [5000, 1000, 2500, 2500],
+    "window_size": 1,
+    "maxout_pieces": 3,
+    "hidden_width": 64,
+    "batch_size": 1000,
+    "batcher": "palavras",
+    "learn_rate": 0.001,
+    "max_epochs": 50,
+    "max_steps": 20000,
+    "patience": 1600,
+    "seed": 42,
+}
+
+
+def gerar_config(train_path, dev_path, **parametros):
+    """Retorna o texto da config (.cfg) com os parâmetros informados sobre os padrões."""
+    desconhecidos = set(parametros) - set(PARAMETROS_PADRAO)
+    if desconhecidos:
+        raise ValueError(f"Parâmetros de config desconhecidos: {sorted(desconhecidos)}")
+    p = {**PARAMETROS_PADRAO, **parametros}
+    if p["batcher"] not in BATCHERS:
+        raise ValueError(f"Batcher desconhecido: {p['batcher']} (use {sorted(BATCHERS)})")
+    rows = ",".join(str(r) for r in p["rows"])
+    # tolerance só existe no batch_by_words
+    tolerancia = "\ntolerance = 0.2" if p["batcher"] == "palavras" else ""
+
+    return f"""
+[paths]
+train = "{train_path}"
+dev = "{dev_path}"
+
+[system]
+gpu_allocator = null
+
+[nlp]
+lang = "pt"
+pipeline = ["tok2vec","ner"]
+
+[components]
+
+[components.tok2vec]
+factory = "tok2vec"
+
+[components.tok2vec.model]
+@architectures = "spacy.Tok2Vec.v2"
+
+[components.tok2vec.model.embed]
+@architectures = "spacy.MultiHashEmbed.v2"
+width = {p["width"]}
+attrs = ["NORM","PREFIX","SUFFIX","SHAPE"]
+rows = [{rows}]
+include_static_vectors = false
+
+[components.tok2vec.model.encode]
+@architectures = "spacy.MaxoutWindowEncoder.v2"
+width = {p["width"]}
+depth = {p["depth"]}
+window_size = {p["window_size"]}
+maxout_pieces = {p["maxout_pieces"]}
+
+[components.ner]
+factory = "ner"
+
+[components.ner.model]
+@architectures = "spacy.TransitionBasedParser.v2"
+state_type = "ner"
+extra_state_tokens = false
+hidden_width = {p["hidden_width"]}
+maxout_pieces = 2
+use_upper = true
+nO = null
+
+[components.ner.model.tok2vec]
+@architectures = "spacy.Tok2VecListener.v1"
+width = ${{components.tok2vec.model.encode.width}}
+
+[corpora]
+
+[corpora.train]
+@readers = "spacy.Corpus.v1"
+path = ${{paths.train}}
+
+[corpora.dev]
+@readers = "spacy.Corpus.v1"
+path = ${{paths.dev}}
+
+[training]
+dev_corpus = "corpora.dev"
+train_corpus = "corpora.train"
+seed = {p["seed"]}
+gpu_allocator = null
+accumulate_gradient = 1
+patience = {p["patience"]}
+max_epochs = {p["max_epochs"]}
+max_steps = {p["max_steps"]}
+
+[training.batcher]
+@batchers = "{BATCHERS[p["batcher"]]}"
+discard_oversize = false{tolerancia}
+size = {p["batch_size"]}
+
+[training.optimizer]
+@optimizers = "Adam.v1"
+beta1 = 0.9
+beta2 = 0.999
+L2_is_weight_decay = true
+L2 = 0.01
+grad_clip = 1.0
+use_averages = false
+eps = 0.00000001
+learn_rate = {p["learn_rate"]}
+
+[training.logger]
+@loggers = "spacy.ConsoleLogger.v1"
+progress_bar = false
+
+[initialize]
+vectors = null
+"""
+
+
+def salvar_config(caminho, train_path, dev_path, **parametros):
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write(gerar_config(train_path, dev_path, **parametros))
+    return caminho
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+Compilador do corpus multirrótulo em uma passada.
+
+ner_treino_split.json / ner_validacao_split.json trazem os oito labels em
+cada documento, mas cada Treinando_* relia o arquivo e filtrava só o seu.
+Aqui o arquivo é lido uma vez e, para cada documento:
+- o texto é extraído e tokenizado uma única vez (nlp.make_doc);
+- a função de reparo de cada grupo (a mesma usada pelo script de treino
+  dele) é aplicada às anotações;
+- o Doc entra no DocBin de cada grupo que tem spans e no DocBin combinado
+  ("todos"), com as sobreposições entre grupos resolvidas por filter_spans.
+Os grupos do treino saem sem duplicatas e os da validação sem cópias do
+treino (duplicatas.py).
+
+Os scripts que treinam com o split (CID, DATA, TIPO_DOC, TEMPO, CONSELHOS)
+usam corpus_com_sinteticos(): carrega o DocBin compilado do grupo (compila
+antes se os .spacy faltam ou são mais velhos que os JSON) e junta os
+sintéticos do script. Horários e NOME_PACIENTE treinam com arquivos próprios.
+
+Uso:
+    python corpus_multirrotulo.py --treino ner_treino_split.json \\
+        --dev ner_validacao_split.json --saida corpus_compilado
+    -> corpus_compilado/train_CID.spacy, dev_CID.spacy, ..., train_todos.spacy
+"""
+
+import os
+import json
+import argparse
+from functools import lru_cache
+from importlib.machinery import SourceFileLoader
+from importlib.util import module_from_spec, spec_from_file_location
+
+import spacy
+from spacy.tokens import DocBin
+from spacy.util import filter_spans
+
+from duplicatas import LIMIAR, duplicatas
+from registro_log import obter_logger
+
+log = obter_logger("corpus_multirrotulo")
+
+TODOS = "todos"
+HORARIOS = ("HORARIO_INICIO_ATENDIMENTO", "HORARIO_FIM_ATENDIMENTO")
+ARQUIVOS = {"train": "ner_treino_split.json", "dev": "ner_validacao_split.json"}
+SAIDA = "corpus_compilado"
+
+# Nome do grupo = sufixo dos .spacy de cada script (train_CID.spacy, ...)
+GRUPOS = ("nome_paciente", "DATA", "horarios", "CID", "TEMPO", "CONSELHOS", "DOCUMENTO")
+
+# Treinando_CONSELHOS contrai os spans ao limite dos tokens; os demais exigem alinhamento exato
+ALINHAMENTO = {"CONSELHOS": "contract"}
+
+
+def _carregar_script(nome, arquivo):
+    """Importa um script pelo caminho (a extensão .PY maiúscula não é encontrada pelo import)."""
+    caminho = os.path.join(os.path.dirname(os.path.abspath(__file__)), arquivo)
+    spec = spec_from_file_location(nome, caminho, loader=SourceFileLoader(nome, caminho))
+    modulo = module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def _em_lista(entities, labels):
+    """Entidades [start, end, label] dos labels; aceita também {"start", "end", "label"}."""
+    ents = []
+    for ent in entities:
+        if isinstance(ent, list) and len(ent) >= 3 and ent[2] in labels:
+            ents.append(ent)
+        elif isinstance(ent, dict) and {"start", "end", "label"} <= ent.keys() and ent["label"] in labels:
+            ents.append([ent["start"], ent["end"], ent["label"]])
+    return ents
+
+
+# -------------------------------
+# Reparos por grupo (um por modelo)
+# -------------------------------
+@lru_cache(maxsize=None)
+def reparos():
+    """
+    {grupo: reparar(texto, entities)}. Os scripts de treino importam este
+    módulo, então as funções deles só são importadas aqui, na primeira compilação.
+    """
+    from Treinando_CID import reparar_cid
+    from Treinando_Data import ajustar_anotacoes_data
+    from Treinando_TIPO_DOC import ajustar_anotacoes_documento
+    from Treinando_TEMPO_AFASTAMENTO import reparar_tempo
+    from Treinando_NOME_PACIENTE import is_valid_span
+    reparar_conselhos = _carregar_script("Treinando_CONSELHOS", "Treinando_CONSELHOS.PY").reparar_conselhos
+
+    def reparar_nome(texto, entities):
+        return [ent for ent in _em_lista(entities, ("NOME_PACIENTE",)) if is_valid_span(texto, ent[0], ent[1])]
+
+    def reparar_horarios(texto, entities):
+        # Mesmos formatos aceitos por Treinando_horarios.carregar_dados_horarios
+        return _em_lista(entities, HORARIOS)
+
+    return {
+        "nome_paciente": reparar_nome,
+        # Treinando_Data e Treinando_TIPO_DOC reanotam pelo regex
+        "DATA": lambda texto, entities: ajustar_anotacoes_data(texto),
+        "horarios": reparar_horarios,
+        "CID": reparar_cid,
+        "TEMPO": reparar_tempo,
+        "CONSELHOS": reparar_conselhos,
+        "DOCUMENTO": lambda texto, entities: ajustar_anotacoes_documento(texto),
+    }
+
+
+# -------------------------------
+# Compilação
+# -------------------------------
+def _entidades(anotacao):
+    if isinstance(anotacao, dict):
+        return anotacao.get("entities", [])
+    if isinstance(anotacao, list):
+        for elem in anotacao:
+            if isinstance(elem, dict) and "entities" in elem:
+                return elem["entities"]
+        # Formato direto: lista de entidades
+        return anotacao
+    return []
+
+
+def compilar_dados(caminho):
+    """
+    Lê 'caminho' uma vez e aplica todos os reparos.
+    Retorna [(texto, {grupo: [[start, end, label], ...]})], só com os grupos que têm spans.
+    """
+    from Treinando_CID import extrair_texto
+
+    with open(caminho, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    documentos = []
+    for i, item in enumerate(data):
+        if not isinstance(item, list) or len(item) < 2:
+            log.warning("Item %s inválido em %s", i, caminho)
+            continue
+        texto = extrair_texto(item)
+        entities = _entidades(item[1])
+        por_grupo = {}
+        for grupo, reparar in reparos().items():
+            ents = reparar(texto, entities)
+            if ents:
+                por_grupo[grupo] = ents
+        documentos.append((texto, por_grupo))
+    return documentos
+
+
+def dados_grupo(documentos, grupo):
+    """Formato (texto, {"entities": ...}) dos scripts de treino, só para um grupo."""
+    return [(texto, {"entities": g[grupo]}) for texto, g in documentos if grupo in g]
+
+
+def sem_duplicatas(documentos, referencia=None, limiar=LIMIAR):
+    """
+    Tira de cada grupo os documentos repetidos (exatos ou quase): sem
+    'referencia', as cópias de um documento anterior do mesmo grupo (treino);
+    com ela, as cópias de um documento do grupo na referência (validação sem
+    vazamento). Um texto repetido só sai dos grupos em que se repete.
+    """
+    limpos = [(texto, dict(por_grupo)) for texto, por_grupo in documentos]
+    for grupo in GRUPOS:
+        indices = [i for i, (_, por_grupo) in enumerate(limpos) if grupo in por_grupo]
+        textos_ref = [texto for texto, por_grupo in referencia or () if grupo in por_grupo]
+        marcas = duplicatas([limpos[i][0] for i in indices], limiar, referencia=textos_ref)
+        for i, marca in zip(indices, marcas):
+            if marca is not None:
+                del limpos[i][1][grupo]
+    return [(texto, por_grupo) for texto, por_grupo in limpos if por_grupo]
+
+
+def _spans(doc, ents, modo):
+    spans = []
+    for start, end, label in (ent[:3] for ent in ents):
+        span = doc.char_span(start, end, label=label, alignment_mode=modo)
+        if span is not None:
+            spans.append(span)
+    return filter_spans(spans)
+
+
+def compilar_docbins(nlp, documentos):
+    """{grupo: DocBin} + {"todos": DocBin}, tokenizando cada texto uma única vez."""
+    docbins = {grupo: DocBin() for grupo in (*GRUPOS, TODOS)}
+    for texto, por_grupo in documentos:
+        doc = nlp.make_doc(texto)
+        todos = []
+        for grupo, ents in por_grupo.items():
+            spans = _spans(doc, ents, ALINHAMENTO.get(grupo, "strict"))
+            todos.extend(spans)
+            # DocBin.add copia os arrays do Doc: o mesmo Doc serve para o próximo grupo
+            doc.ents = spans
+            docbins[grupo].add(doc)
+        doc.ents = filter_spans(todos)
+        docbins[TODOS].add(doc)
+    return docbins
+
+
+def compilar_corpus(arquivos, saida, lang="pt", limiar=LIMIAR):
+    """
+    arquivos: {prefixo: caminho json} (ex.: {"train": ..., "dev": ...}).
+    Grava <saida>/<prefixo>_<grupo>.spacy e retorna {prefixo: {grupo: n_docs}}.
+    Os grupos de "train" saem sem duplicatas; os dos demais prefixos, sem
+    cópias do treino.
+    """
+    nlp = spacy.blank(lang)
+    os.makedirs(saida, exist_ok=True)
+    documentos = {prefixo: compilar_dados(caminho) for prefixo, caminho in arquivos.items()}
+    treino = documentos.get("train")
+    contagens = {}
+    for prefixo, docs in documentos.items():
+        referencia = None if prefixo == "train" else treino
+        docbins = compilar_docbins(nlp, sem_duplicatas(docs, referencia, limiar))
+        contagens[prefixo] = {}
+        for grupo, db in docbins.items():
+            db.to_disk(os.path.join(saida, f"{prefixo}_{grupo}.spacy"))
+            contagens[prefixo][grupo] = len(db)
+    return contagens
+
+
+# -------------------------------
+# Uso pelos scripts de treino
+# -------------------------------
+def _desatualizado(arquivos, saida):
+    """True se falta algum .spacy ou se algum JSON é mais novo que eles."""
+    caminhos = [os.path.join(saida, f"{prefixo}_{grupo}.spacy") for prefixo in arquivos for grupo in (*GRUPOS, TODOS)]
+    if not all(os.path.exists(c) for c in caminhos):
+        return True
+    return max(os.path.getmtime(c) for c in arquivos.values()) > min(os.path.getmtime(c) for c in caminhos)
+
+
+def carregar_compilado(grupo, arquivos=ARQUIVOS, saida=SAIDA, lang="pt"):
+    """{prefixo: DocBin} do grupo, compilando antes (todos os grupos de uma vez) se preciso."""
+    if _desatualizado(arquivos, saida):
+        log.info("Compilando %s em %s", ", ".join(arquivos.values()), saida)
+        compilar_corpus(arquivos, saida, lang)
+    return {prefixo: DocBin().from_disk(os.path.join(saida, f"{prefixo}_{grupo}.spacy")) for prefixo in arquivos}
+
+
+def corpus_com_sinteticos(grupo, nlp, criar_docbin, sinteticos, sinteticos_dev=(), nome="",
+                          arquivos=ARQUIVOS, saida=SAIDA, limiar=LIMIAR):
+    """
+    (DocBin de treino, DocBin de validação) de um script Treinando_*: o
+    corpus real é o DocBin compilado do grupo (já sem duplicatas) e os
+    sintéticos do script entram por cima, sem deduplicar, convertidos pelo
+    criar_docbin(dados) do próprio script. A validação (real + sintéticos de
+    validação) perde o que já está no treino. Imprime as contagens.
+    """
+    reais = carregar_compilado(grupo, arquivos, saida, nlp.lang)
+    docs_dev = list(reais["dev"].get_docs(nlp.vocab))
+    sinteticos, sinteticos_dev = list(sinteticos), list(sinteticos_dev)
+
+    referencia = [doc.text for doc in reais["train"].get_docs(nlp.vocab)] + [texto for texto, _ in sinteticos]
+    candidatos = [doc.text for doc in docs_dev] + [texto for texto, _ in sinteticos_dev]
+    manter = [marca is None for marca in duplicatas(candidatos, limiar, referencia=referencia)]
+
+    treino = reais["train"]
+    n_reais = len(treino)
+    treino.merge(criar_docbin(sinteticos))
+    dev = DocBin(docs=[doc for doc, ok in zip(docs_dev, manter) if ok])
+    dev.merge(criar_docbin([item for item, ok in zip(sinteticos_dev, manter[len(docs_dev):]) if ok]))
+
+    print(f"🧹 {nome or grupo}: treino real {n_reais} (compilado, sem duplicatas) + {len(sinteticos)} sintéticos "
+          f"= {len(treino)} | validação {len(candidatos)} -> {len(dev)} sem vazamento")
+    return treino, dev
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DocBins por grupo e combinado em uma passada")
+    parser.add_argument("--treino", default=ARQUIVOS["train"])
+    parser.add_argument("--dev", default=ARQUIVOS["dev"])
+    parser.add_argument("--saida", default=SAIDA)
+    args = parser.parse_args()
+
+    contagens = compilar_corpus({"train": args.treino, "dev": args.dev}, args.saida)
+
+    print(f"{'grupo':>14} | {'train':>6} | {'dev':>6}")
+    for grupo in (*GRUPOS, TODOS):
+        print(f"{grupo:>14} | {contagens['train'][grupo]:6d} | {contagens['dev'][grupo]:6d}")
+    print(f"\n✅ DocBins salvos em '{args.saida}'")
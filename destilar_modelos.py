@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Destilação: os modelos atuais (professores) rotulam um corpus grande sem
+anotação e modelos "alunos" menores (rows/width/depth reduzidos) são
+treinados sobre esses rótulos, por entidade.
+
+Entradas:
+- corpus sem rótulo: .txt (um documento por linha), .jsonl ({"texto": ...})
+  ou .json no formato dos splits ([texto, anotacao]); vários arquivos aceitos
+- corpus de validação anotado de cada entidade (CORPORA_DEV)
+
+Saídas:
+- distil_<ENTIDADE>.spacy                   -> docs rotulados pelo professor
+- modelo_NER_<ENTIDADE>-aluno_<tamanho>/    -> alunos treinados
+- relatorio_destilacao.json                 -> F1 e docs/s aluno x professor
+
+Uso:
+    python destilar_modelos.py corpus.txt --entidades TIPO_DOC DATA CID
+"""
+
+import os
+import json
+import argparse
+
+import spacy
+from spacy.tokens import DocBin
+
+from app_OCR import carregar_modelos
+from avaliacao import avaliar_docbin
+from config_treino import salvar_config
+from pacote_modelos import CAMINHOS_MODELOS, CORPORA_DEV, CAMINHO_PACOTE
+from treino import treinar
+
+# Tamanhos de aluno (o professor usa width=96, depth=4, rows=[5000,1000,2500,2500])
+TAMANHOS_ALUNO = {
+    "pequeno": {"width": 64, "depth": 2, "rows": [2000, 500, 1000, 1000], "hidden_width": 48},
+    "minimo": {"width": 32, "depth": 1, "rows": [1000, 250, 500, 500], "hidden_width": 32},
+}
+
+ENTIDADES_PADRAO = ["TIPO_DOC", "DATA", "CID"]
+
+
+def ler_corpus(caminhos):
+    """Lê textos sem rótulo de um ou mais arquivos, sem duplicatas."""
+    textos = []
+    for caminho in caminhos:
+        with open(caminho, "r", encoding="utf-8") as f:
+            if caminho.endswith(".jsonl"):
+                textos.extend(json.loads(linha)["texto"] for linha in f if linha.strip())
+            elif caminho.endswith(".json"):
+                textos.extend(item[0] for item in json.load(f) if item and isinstance(item[0], str))
+            else:
+                textos.extend(linha.rstrip("\n") for linha in f if linha.strip())
+    return list(dict.fromkeys(textos))
+
+
+def rotular_com_professor(professor, textos, destino, batch_size=64):
+    """Roda o professor em lote e salva os docs (com ents previstas) num DocBin."""
+    doc_bin = DocBin(attrs=["ENT_IOB", "ENT_TYPE"])
+    for doc in professor.pipe(textos, batch_size=batch_size):
+        doc_bin.add(doc)
+    doc_bin.to_disk(destino)
+    return destino
+
+
+def treinar_aluno(entidade, tamanho, caminho_train):
+    """Treina o aluno com a config de CPU reduzida (em processo, CPU)."""
+    caminho_modelo = f"modelo_NER_{entidade}-aluno_{tamanho}"
+    config_path = salvar_config(
+        f"config_{entidade}_aluno_{tamanho}.cfg",
+        caminho_train, CORPORA_DEV[entidade],
+        **TAMANHOS_ALUNO[tamanho],
+    )
+    return treinar(config_path, caminho_modelo)["model_best"]
+
+
+def imprimir_relatorio(linhas):
+    print("\n" + "=" * 72)
+    print(f"{'entidade':<18} | {'modelo':<16} | {'F1':>7} | {'docs/s':>9} | {'x prof.':>7}")
+    print("-" * 72)
+    for l in linhas:
+        print(f"{l['entidade']:<18} | {l['modelo']:<16} | {l['f1']:7.4f} | {l['docs_s']:9.1f} | "
+              f"{l['aceleracao']:6.2f}x")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Destila alunos menores a partir dos modelos atuais")
+    parser.add_argument("corpus", nargs="+")
+    parser.add_argument("--entidades", nargs="*", default=ENTIDADES_PADRAO)
+    parser.add_argument("--tamanhos", nargs="*", default=list(TAMANHOS_ALUNO))
+    parser.add_argument("--pacote", default=os.environ.get("PACOTE_MODELOS", CAMINHO_PACOTE))
+    args = parser.parse_args()
+
+    textos = ler_corpus(args.corpus)
+    print(f"📚 Corpus sem rótulo: {len(textos)} documentos")
+
+    modelos = carregar_modelos(args.pacote)
+    linhas = []
+    for entidade in args.entidades:
+        if entidade not in CAMINHOS_MODELOS:
+            raise KeyError(f"Entidade desconhecida: {entidade}")
+        professor = modelos[entidade]
+        caminho_train = rotular_com_professor(professor, textos, f"distil_{entidade}.spacy")
+
+        base = avaliar_docbin(professor, CORPORA_DEV[entidade])
+        linhas.append({"entidade": entidade, "modelo": "professor", **base, "aceleracao": 1.0})
+
+        for tamanho in args.tamanhos:
+            aluno = spacy.load(treinar_aluno(entidade, tamanho, caminho_train))
+            metricas = avaliar_docbin(aluno, CORPORA_DEV[entidade])
+            linhas.append({
+                "entidade": entidade, "modelo": f"aluno_{tamanho}", **metricas,
+                "aceleracao": metricas["docs_s"] / max(base["docs_s"], 1e-9),
+            })
+
+    imprimir_relatorio(linhas)
+    with open("relatorio_destilacao.json", "w", encoding="utf-8") as f:
+        json.dump(linhas, f, indent=2, ensure_ascii=False)
+    print("\n✅ Relatório salvo em 'relatorio_destilacao.json'")
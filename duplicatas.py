@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Duplicatas exatas e quase duplicatas (MinHash + LSH) nos dados de treino.
+
+Os geradores sintéticos repetem muito os mesmos moldes, os arquivos
+_expandido repetem os originais e vários scripts usavam os mesmos
+sintéticos no treino e na validação. Aqui:
+- cada texto é normalizado (caixa, acentos, espaços) e vira um conjunto de
+  shingles de caracteres (TAMANHO_SHINGLE);
+- duplicata exata = mesmo hash do texto normalizado;
+- quase duplicata = candidatos do LSH (FAIXAS x LINHAS da assinatura
+  MinHash, calculada com numpy) confirmados pela similaridade de Jaccard
+  dos shingles >= limiar.
+
+deduplicar_dados() mantém o primeiro de cada grupo; sem_vazamento() tira da
+validação o que já está (quase igual) no treino.
+
+Uso:
+    python duplicatas.py --treino ner_treino_split.json --dev ner_validacao_split.json \\
+        --relatorio relatorio_duplicatas.json --saida dedup
+"""
+
+import os
+import json
+import hashlib
+import argparse
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+
+TAMANHO_SHINGLE = 5
+FAIXAS, LINHAS = 8, 8           # 64 permutações; candidatos a partir de ~0.77 de Jaccard
+LIMIAR = 0.9
+
+# Hash multiply-shift: (a*x + b) mod 2^64, 32 bits de cima (uint64 dá a volta sozinho)
+_rng = np.random.default_rng(1234)
+_A = _rng.integers(1, 2**63, size=FAIXAS * LINHAS, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_B = _rng.integers(0, 2**63, size=FAIXAS * LINHAS, dtype=np.uint64)
+_DESLOCAMENTO = np.uint64(32)
+
+
+@lru_cache(maxsize=65536)
+def normalizar(texto):
+    sem_acento = unicodedata.normalize("NFKD", texto.lower()).encode("ascii", "ignore").decode("ascii")
+    return " ".join(sem_acento.split())
+
+
+def _hash64(dados):
+    return int.from_bytes(hashlib.blake2b(dados.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def shingles(texto, tamanho=TAMANHO_SHINGLE):
+    norm = normalizar(texto)
+    if len(norm) <= tamanho:
+        return {_hash64(norm)}
+    return {_hash64(norm[i:i + tamanho]) for i in range(len(norm) - tamanho + 1)}
+
+
+def assinatura(conjunto):
+    """MinHash: o menor valor de cada uma das FAIXAS*LINHAS funções de hash."""
+    valores = np.fromiter(conjunto, dtype=np.uint64, count=len(conjunto))
+    return ((_A[:, None] * valores[None, :] + _B[:, None]) >> _DESLOCAMENTO).min(axis=1)
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class IndiceLSH:
+    """Faixas da assinatura -> chaves; candidatos são os que colidem em alguma faixa."""
+
+    def __init__(self):
+        self.faixas = [{} for _ in range(FAIXAS)]
+
+    def _chaves(self, sig):
+        return [sig[i * LINHAS:(i + 1) * LINHAS].tobytes() for i in range(FAIXAS)]
+
+    def adicionar(self, chave, sig):
+        for faixa, k in zip(self.faixas, self._chaves(sig)):
+            faixa.setdefault(k, []).append(chave)
+
+    def candidatos(self, sig):
+        encontrados = set()
+        for faixa, k in zip(self.faixas, self._chaves(sig)):
+            encontrados.update(faixa.get(k, ()))
+        return encontrados
+
+
+def _texto(item):
+    # (texto, anotação), texto puro ou o item aninhado [[texto, anotação], ...] do split
+    while isinstance(item, (list, tuple)) and item:
+        item = item[0]
+    return item if isinstance(item, str) else str(item)
+
+
+def duplicatas(textos, limiar=LIMIAR, referencia=()):
+    """
+    Para cada texto, (índice do texto anterior ou da referência de que ele é
+    cópia, tipo, similaridade) ou None. Índices da referência vêm como ("ref", i).
+    tipo é "exata" ou "quase".
+    """
+    indice = IndiceLSH()
+    exatos, conjuntos = {}, {}
+
+    def registrar(chave, texto):
+        conj = shingles(texto)
+        conjuntos[chave] = conj
+        exatos.setdefault(normalizar(texto), chave)
+        indice.adicionar(chave, assinatura(conj))
+        return conj
+
+    for i, texto in enumerate(referencia):
+        registrar(("ref", i), texto)
+
+    resultado = []
+    for i, texto in enumerate(textos):
+        original = exatos.get(normalizar(texto))
+        if original is not None:
+            resultado.append((original, "exata", 1.0))
+            continue
+        conj = shingles(texto)
+        sig = assinatura(conj)
+        melhor = max(
+            ((jaccard(conj, conjuntos[c]), c) for c in indice.candidatos(sig)),
+            key=lambda par: par[0], default=(0.0, None),
+        )
+        if melhor[0] >= limiar:
+            resultado.append((melhor[1], "quase", round(melhor[0], 4)))
+            continue
+        resultado.append(None)
+        conjuntos[i] = conj
+        exatos.setdefault(normalizar(texto), i)
+        indice.adicionar(i, sig)
+    return resultado
+
+
+def deduplicar_dados(dados, limiar=LIMIAR):
+    """Dados (texto, anotação) sem duplicatas exatas nem quase duplicatas (fica o primeiro)."""
+    marcas = duplicatas([_texto(item) for item in dados], limiar)
+    return [item for item, marca in zip(dados, marcas) if marca is None]
+
+
+def sem_vazamento(dev, treino, limiar=LIMIAR):
+    """Itens da validação sem cópia (exata ou quase) no treino nem repetidos na própria validação."""
+    marcas = duplicatas([_texto(item) for item in dev], limiar, referencia=[_texto(item) for item in treino])
+    return [item for item, marca in zip(dev, marcas) if marca is None]
+
+
+def treino_e_validacao(base_treino, sinteticos, base_dev, sinteticos_dev=(), nome="", limiar=LIMIAR):
+    """
+    (treino, validação) de um script Treinando_*: só o corpus real é
+    deduplicado (os sintéticos saem dos mesmos moldes e a deduplicação os
+    colapsaria, desbalanceando as classes); a validação (real + sintéticos de
+    validação) perde o que já está no treino. Imprime as contagens antes/depois.
+    """
+    base_dedup = deduplicar_dados(base_treino, limiar)
+    treino = base_dedup + list(sinteticos)
+    candidatos = list(base_dev) + list(sinteticos_dev)
+    dev = sem_vazamento(candidatos, treino, limiar)
+    print(f"🧹 {nome}: treino real {len(base_treino)} -> {len(base_dedup)} sem duplicatas "
+          f"+ {len(sinteticos)} sintéticos = {len(treino)} | validação {len(candidatos)} -> {len(dev)} sem vazamento")
+    return treino, dev
+
+
+def relatorio(treino, dev, limiar=LIMIAR):
+    """Contagens e exemplos de duplicatas no treino, na validação e entre os dois (vazamento)."""
+    textos_treino = [_texto(item) for item in treino]
+    textos_dev = [_texto(item) for item in dev]
+
+    marcas_treino = duplicatas(textos_treino, limiar)
+    marcas_dev = duplicatas(textos_dev, limiar)
+    marcas_vazamento = duplicatas(textos_dev, limiar, referencia=textos_treino)
+
+    def resumo(marcas, textos, textos_ref):
+        exemplos = []
+        for i, marca in enumerate(marcas):
+            if marca is None or len(exemplos) >= 20:
+                continue
+            origem, tipo, sim = marca
+            texto_origem = textos_ref[origem[1]] if isinstance(origem, tuple) else textos[origem]
+            exemplos.append({"item": i, "de": origem[1] if isinstance(origem, tuple) else origem,
+                             "tipo": tipo, "similaridade": sim,
+                             "texto": textos[i][:120], "texto_origem": texto_origem[:120]})
+        return {
+            "exatas": sum(1 for m in marcas if m and m[1] == "exata"),
+            "quase": sum(1 for m in marcas if m and m[1] == "quase"),
+            "exemplos": exemplos,
+        }
+
+    vazamento = [m for m in marcas_vazamento if m and isinstance(m[0], tuple)]
+    return {
+        "limiar": limiar,
+        "treino": {"itens": len(treino), **resumo(marcas_treino, textos_treino, textos_treino)},
+        "dev": {"itens": len(dev), **resumo(marcas_dev, textos_dev, textos_dev)},
+        "vazamento": {
+            "itens_dev_no_treino": len(vazamento),
+            "fracao": round(len(vazamento) / len(dev), 4) if dev else 0.0,
+            **resumo([m if m and isinstance(m[0], tuple) else None for m in marcas_vazamento], textos_dev, textos_treino),
+        },
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Duplicatas e vazamento treino/validação (MinHash + LSH)")
+    parser.add_argument("--treino", default="ner_treino_split.json")
+    parser.add_argument("--dev", default="ner_validacao_split.json")
+    parser.add_argument("--limiar", type=float, default=LIMIAR, help="Jaccard mínimo para quase duplicata")
+    parser.add_argument("--relatorio", default="relatorio_duplicatas.json")
+    parser.add_argument("--saida", help="diretório para gravar treino e validação deduplicados")
+    args = parser.parse_args()
+
+    with open(args.treino, "r", encoding="utf-8") as f:
+        treino = json.load(f)
+    with open(args.dev, "r", encoding="utf-8") as f:
+        dev = json.load(f)
+
+    rel = relatorio(treino, dev, args.limiar)
+    with open(args.relatorio, "w", encoding="utf-8") as f:
+        json.dump(rel, f, indent=2, ensure_ascii=False)
+
+    print(f"Treino: {rel['treino']['itens']} itens | {rel['treino']['exatas']} exatas | {rel['treino']['quase']} quase")
+    print(f"Validação: {rel['dev']['itens']} itens | {rel['dev']['exatas']} exatas | {rel['dev']['quase']} quase")
+    print(f"Vazamento: {rel['vazamento']['itens_dev_no_treino']} itens da validação no treino ({rel['vazamento']['fracao']:.1%})")
+
+    if args.saida:
+        os.makedirs(args.saida, exist_ok=True)
+        treino_dedup = deduplicar_dados(treino, args.limiar)
+        dev_dedup = sem_vazamento(dev, treino_dedup, args.limiar)
+        for caminho, dados in ((args.treino, treino_dedup), (args.dev, dev_dedup)):
+            destino = os.path.join(args.saida, os.path.basename(caminho))
+            with open(destino, "w", encoding="utf-8") as f:
+                json.dump(dados, f, ensure_ascii=False)
+            print(f"✅ {destino}: {len(dados)} itens")
+    print(f"Relatório em '{args.relatorio}'")
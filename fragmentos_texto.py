@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Fragmentação de textos longos (OCR de várias páginas) antes do NER.
+
+Um texto maior que 'max_chars' é dividido em fragmentos nas quebras de
+página (\\f), de parágrafo (linha em branco), de linha ou de frase, nessa
+ordem de preferência; só em último caso o corte é no meio de uma palavra.
+Fragmentos vizinhos se sobrepõem em ~'sobreposicao' caracteres para que
+uma entidade na fronteira apareça inteira em pelo menos um deles.
+
+As entidades de cada fragmento voltam para offsets globais (SpanGlobal) e
+as repetidas na sobreposição são removidas (fica o span mais longo).
+"""
+
+import re
+from collections import namedtuple
+
+MAX_CHARS = 3000
+SOBREPOSICAO = 200
+
+# Quebras preferidas, da mais forte para a mais fraca
+QUEBRAS = [
+    re.compile(r"\f"),
+    re.compile(r"\n[ \t]*\n"),
+    re.compile(r"\n"),
+    re.compile(r"(?<=[.;:!?])\s"),
+    re.compile(r"\s"),
+]
+
+Fragmento = namedtuple("Fragmento", "inicio texto")
+
+# Mesmos atributos usados de um Span do spaCy (start_char, end_char, label_, text)
+SpanGlobal = namedtuple("SpanGlobal", "start_char end_char label_ text")
+
+
+def _ponto_de_corte(texto, inicio, limite):
+    """Maior posição de quebra em (inicio, limite], pela quebra mais forte disponível."""
+    minimo = inicio + (limite - inicio) // 2  # evita fragmentos pequenos demais
+    for quebra in QUEBRAS:
+        cortes = [m.end() for m in quebra.finditer(texto, minimo, limite)]
+        if cortes:
+            return cortes[-1]
+    return limite
+
+
+def _inicio_sobreposto(texto, corte, sobreposicao, inicio_anterior):
+    """Recua 'sobreposicao' caracteres a partir do corte, alinhado a um espaço."""
+    if sobreposicao <= 0:
+        return corte
+    alvo = max(corte - sobreposicao, inicio_anterior + 1)
+    espaco = texto.find(" ", alvo, corte)
+    return espaco + 1 if espaco != -1 else alvo
+
+
+def dividir_texto(texto, max_chars=MAX_CHARS, sobreposicao=SOBREPOSICAO):
+    """Lista de Fragmento(inicio, texto); um só fragmento se o texto já é curto."""
+    if max_chars <= sobreposicao:
+        raise ValueError("max_chars precisa ser maior que sobreposicao")
+    if len(texto) <= max_chars:
+        return [Fragmento(0, texto)]
+
+    fragmentos = []
+    inicio = 0
+    while inicio < len(texto):
+        limite = inicio + max_chars
+        if limite >= len(texto):
+            fragmentos.append(Fragmento(inicio, texto[inicio:]))
+            break
+        corte = _ponto_de_corte(texto, inicio, limite)
+        fragmentos.append(Fragmento(inicio, texto[inicio:corte]))
+        inicio = _inicio_sobreposto(texto, corte, sobreposicao, inicio)
+    return fragmentos
+
+
+def spans_globais(fragmentos, docs):
+    """
+    Junta as entidades dos docs de cada fragmento em offsets do texto
+    original, removendo as repetidas nas sobreposições.
+    """
+    spans = [
+        SpanGlobal(frag.inicio + ent.start_char, frag.inicio + ent.end_char, ent.label_, ent.text)
+        for frag, doc in zip(fragmentos, docs)
+        for ent in doc.ents
+    ]
+    return deduplicar_spans(spans)
+
+
+def deduplicar_spans(spans):
+    """Entre spans de mesmo label que se sobrepõem, fica o mais longo (ordem por posição)."""
+    escolhidos = []
+    for span in sorted(spans, key=lambda s: (s.start_char, -(s.end_char - s.start_char))):
+        anterior = next((e for e in reversed(escolhidos)
+                         if e.label_ == span.label_ and e.end_char > span.start_char), None)
+        if anterior is None:
+            escolhidos.append(span)
+        elif span.end_char - span.start_char > anterior.end_char - anterior.start_char:
+            escolhidos[escolhidos.index(anterior)] = span
+    return escolhidos
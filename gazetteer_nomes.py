@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Gazetteer de nomes brasileiros como componente spaCy (NOME_PACIENTE).
+
+Os primeiros nomes e sobrenomes do banco_nomes (provider pt_BR do Faker,
+ou as listas base) ficam em um array NumPy ordenado de chaves (minúsculas,
+sem acento) com um array de bits paralelo (1 = primeiro nome, 2 =
+sobrenome); a consulta de cada token é uma busca binária (searchsorted)
+vetorizada para o doc inteiro. Não há uma frase por nome completo (como no
+PhraseMatcher), que cresceria com o produto de primeiros nomes e
+sobrenomes.
+
+Um nome é uma sequência de tokens capitalizados que começa em um primeiro
+nome conhecido, segue por primeiros nomes/sobrenomes conhecidos (e
+partículas da/de/do/dos/das/e) e termina em um sobrenome conhecido. Nomes
+precedidos de Dr./Dra. são ignorados (são do médico).
+
+O componente roda depois do NER e só acrescenta: entidades de outros
+labels têm prioridade e, entre spans de NOME_PACIENTE sobrepostos, fica o
+mais longo (o gazetteer completa um nome cortado pelo modelo).
+
+Uso:
+    import gazetteer_nomes
+    gazetteer_nomes.adicionar_gazetteer(nlp)   # depois do "ner"
+"""
+
+import io
+from pathlib import Path
+
+import numpy as np
+from spacy.language import Language
+from spacy.tokens import Span
+from spacy.util import filter_spans
+
+from banco_nomes import carregar_banco
+from duplicatas import normalizar
+
+PRIMEIRO_NOME, SOBRENOME = 1, 2
+PARTICULAS = {"da", "de", "do", "dos", "das", "e"}
+TITULOS_MEDICOS = {"dr", "dra", "doutor", "doutora"}
+ARQUIVO = "gazetteer.npz"
+
+
+class Gazetteer:
+    __slots__ = ("chaves", "tipos")
+
+    def __init__(self, chaves, tipos):
+        self.chaves = chaves    # np.ndarray de str, ordenado
+        self.tipos = tipos      # np.ndarray uint8, bits PRIMEIRO_NOME | SOBRENOME
+
+    @classmethod
+    def de_listas(cls, primeiros, sobrenomes):
+        bits = {}
+        for nomes, bit in ((primeiros, PRIMEIRO_NOME), (sobrenomes, SOBRENOME)):
+            for nome in nomes:
+                # Nomes compostos do provider ("Maria Eduarda") entram palavra por palavra
+                for palavra in normalizar(str(nome)).split():
+                    if palavra not in PARTICULAS:
+                        bits[palavra] = bits.get(palavra, 0) | bit
+        chaves = sorted(bits)
+        return cls(np.array(chaves), np.array([bits[c] for c in chaves], dtype=np.uint8))
+
+    @classmethod
+    def do_banco(cls):
+        banco = carregar_banco()
+        return cls.de_listas(banco["primeiros_nomes"].tolist(), banco["sobrenomes"].tolist())
+
+    def __len__(self):
+        return len(self.chaves)
+
+    def tipos_de(self, palavras):
+        """Bits de cada palavra (0 se não está no gazetteer), em uma busca binária vetorizada."""
+        if not palavras or not len(self.chaves):
+            return np.zeros(len(palavras), dtype=np.uint8)
+        consulta = np.array([normalizar(p) for p in palavras])
+        pos = np.minimum(np.searchsorted(self.chaves, consulta), len(self.chaves) - 1)
+        return np.where(self.chaves[pos] == consulta, self.tipos[pos], 0).astype(np.uint8)
+
+    def encontrar(self, palavras):
+        """[(inicio, fim)] em índices de 'palavras' das sequências que formam um nome."""
+        tipos = self.tipos_de(palavras)
+        capitalizadas = [p[:1].isupper() for p in palavras]
+        nomes, i, n = [], 0, len(palavras)
+        while i < n:
+            if capitalizadas[i] and tipos[i] & PRIMEIRO_NOME:
+                j, ultimo = i + 1, i
+                while j < n:
+                    if capitalizadas[j] and tipos[j]:
+                        if tipos[j] & SOBRENOME:
+                            ultimo = j
+                    elif palavras[j].lower() not in PARTICULAS:
+                        break
+                    j += 1
+                if ultimo > i:
+                    nomes.append((i, ultimo + 1))
+                    i = ultimo + 1
+                    continue
+            i += 1
+        return nomes
+
+    # -------------------------------
+    # Serialização (vai junto do modelo e do pacote de modelos)
+    # -------------------------------
+    def to_bytes(self):
+        buffer = io.BytesIO()
+        np.savez(buffer, chaves=self.chaves, tipos=self.tipos)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, dados):
+        with np.load(io.BytesIO(dados), allow_pickle=False) as arquivo:
+            return cls(arquivo["chaves"], arquivo["tipos"])
+
+
+def _precedido_por_titulo(doc, inicio):
+    anteriores = [t.text.rstrip(".").lower() for t in doc[max(0, inicio - 2):inicio] if t.text != "."]
+    return bool(anteriores) and normalizar(anteriores[-1]) in TITULOS_MEDICOS
+
+
+# -------------------------------
+# Componente spaCy
+# -------------------------------
+class GazetteerNomes:
+    def __init__(self, label, gazetteer=None):
+        self.label = label
+        self._gazetteer = gazetteer
+
+    @property
+    def gazetteer(self):
+        # Só no primeiro uso: ao carregar um modelo salvo, from_disk/from_bytes já trazem o gazetteer
+        if self._gazetteer is None:
+            self._gazetteer = Gazetteer.do_banco()
+        return self._gazetteer
+
+    def __call__(self, doc):
+        novos = [
+            Span(doc, inicio, fim, label=self.label)
+            for inicio, fim in self.gazetteer.encontrar([t.text for t in doc])
+            if not _precedido_por_titulo(doc, inicio)
+        ]
+        if not novos:
+            return doc
+        outros = [ent for ent in doc.ents if ent.label_ != self.label]
+        ocupados = {i for ent in outros for i in range(ent.start, ent.end)}
+        novos = [span for span in novos if not ocupados.intersection(range(span.start, span.end))]
+        mesmos = [ent for ent in doc.ents if ent.label_ == self.label]
+        doc.ents = sorted(outros + filter_spans(mesmos + novos), key=lambda span: span.start)
+        return doc
+
+    def pipe(self, docs, batch_size=128):
+        # Mesma interface dos componentes do spaCy (confianca_ner chama .pipe nos componentes depois do NER)
+        for doc in docs:
+            yield self(doc)
+
+    def to_bytes(self, *, exclude=tuple()):
+        return self.gazetteer.to_bytes()
+
+    def from_bytes(self, dados, *, exclude=tuple()):
+        self._gazetteer = Gazetteer.from_bytes(dados)
+        return self
+
+    def to_disk(self, caminho, *, exclude=tuple()):
+        caminho = Path(caminho)
+        caminho.mkdir(parents=True, exist_ok=True)
+        (caminho / ARQUIVO).write_bytes(self.to_bytes())
+
+    def from_disk(self, caminho, *, exclude=tuple()):
+        return self.from_bytes((Path(caminho) / ARQUIVO).read_bytes())
+
+
+@Language.factory("gazetteer_nomes", default_config={"label": "NOME_PACIENTE"})
+def criar_gazetteer_nomes(nlp, name, label):
+    return GazetteerNomes(label)
+
+
+def adicionar_gazetteer(nlp, label="NOME_PACIENTE"):
+    """Acrescenta o gazetteer depois do NER (se ainda não estiver no pipeline)."""
+    if "gazetteer_nomes" in nlp.pipe_names:
+        return nlp.get_pipe("gazetteer_nomes")
+    if "ner" in nlp.pipe_names:
+        return nlp.add_pipe("gazetteer_nomes", after="ner", config={"label": label})
+    return nlp.add_pipe("gazetteer_nomes", last=True, config={"label": label})
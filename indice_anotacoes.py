@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+Índice SQLite (FTS5) das anotações dos corpora de treino.
+
+Em vez de procurar exemplos com grep no JSON indentado, os arquivos
+(ner_*_split.json, ner_*_expandido.json, .jsonl) são indexados numa base
+local:
+- documentos(id, arquivo, posicao, texto)
+- spans(id, doc_id, inicio, fim, label, superficie, tamanho), com índices
+  por label, tamanho e documento
+- spans_fts: FTS5 sobre a superfície do span (sem acento/caixa; ".-/:"
+  fazem parte do token, então "M54.5", "12/03/2024" e "CRM-PE" são termos)
+
+Consultas combinam label, busca FTS5 ("M54*", "CID OR cid"), regex Python
+sobre a superfície, tamanho do span e arquivo de origem; o resultado vai
+direto para um DocBin.
+
+Uso:
+    python indice_anotacoes.py indexar ner_treino_split.json ner_validacao_split.json
+    python indice_anotacoes.py consultar --label CID --regex "^[A-Z]\\d{2}$" --limite 20
+    python indice_anotacoes.py consultar --label CID --fts "m54*" --docbin cid_m54.spacy
+"""
+
+import os
+import re
+import json
+import sqlite3
+import argparse
+from functools import lru_cache
+
+import spacy
+from spacy.tokens import DocBin
+from spacy.util import filter_spans
+
+BANCO_PADRAO = "anotacoes.db"
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS documentos (
+    id INTEGER PRIMARY KEY,
+    arquivo TEXT NOT NULL,
+    posicao INTEGER NOT NULL,
+    texto TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS spans (
+    id INTEGER PRIMARY KEY,
+    doc_id INTEGER NOT NULL REFERENCES documentos(id) ON DELETE CASCADE,
+    inicio INTEGER NOT NULL,
+    fim INTEGER NOT NULL,
+    label TEXT NOT NULL,
+    superficie TEXT NOT NULL,
+    tamanho INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_documentos_arquivo ON documentos(arquivo);
+CREATE INDEX IF NOT EXISTS idx_spans_label_tamanho ON spans(label, tamanho);
+CREATE INDEX IF NOT EXISTS idx_spans_doc ON spans(doc_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS spans_fts USING fts5(
+    superficie, content='spans', content_rowid='id',
+    tokenize="unicode61 remove_diacritics 2 tokenchars '.-/:'"
+);
+CREATE TRIGGER IF NOT EXISTS spans_ai AFTER INSERT ON spans BEGIN
+    INSERT INTO spans_fts(rowid, superficie) VALUES (new.id, new.superficie);
+END;
+CREATE TRIGGER IF NOT EXISTS spans_ad AFTER DELETE ON spans BEGIN
+    INSERT INTO spans_fts(spans_fts, rowid, superficie) VALUES ('delete', old.id, old.superficie);
+END;
+"""
+
+
+@lru_cache(maxsize=256)
+def _regex(padrao):
+    return re.compile(padrao)
+
+
+def _regexp(padrao, valor):
+    return valor is not None and _regex(padrao).search(valor) is not None
+
+
+def abrir(caminho=BANCO_PADRAO):
+    """Conexão com o esquema criado e a função REGEXP registrada."""
+    con = sqlite3.connect(caminho)
+    con.execute("PRAGMA foreign_keys = ON")
+    con.execute("PRAGMA journal_mode = WAL")
+    con.create_function("REGEXP", 2, _regexp, deterministic=True)
+    con.executescript(ESQUEMA)
+    return con
+
+
+# -------------------------------
+# Indexação
+# -------------------------------
+def ler_anotacoes(caminho):
+    """(texto, [[inicio, fim, label], ...]) de cada item de um .json ou .jsonl."""
+    with open(caminho, "r", encoding="utf-8") as f:
+        if caminho.endswith(".jsonl"):
+            itens = [json.loads(linha) for linha in f if linha.strip()]
+        else:
+            itens = json.load(f)
+    for item in itens:
+        if not isinstance(item, list) or len(item) < 2 or not isinstance(item[0], str):
+            continue
+        anotacao = item[1]
+        if isinstance(anotacao, list):
+            anotacao = next((a for a in anotacao if isinstance(a, dict)), {})
+        entities = anotacao.get("entities", []) if isinstance(anotacao, dict) else []
+        yield item[0], [ent for ent in entities if isinstance(ent, (list, tuple)) and len(ent) >= 3]
+
+
+def indexar(con, caminho):
+    """(Re)indexa um arquivo: as linhas antigas dele são substituídas. Retorna (docs, spans)."""
+    arquivo = os.path.basename(caminho)
+    n_docs = n_spans = 0
+    with con:
+        con.execute("DELETE FROM documentos WHERE arquivo = ?", (arquivo,))
+        for posicao, (texto, entities) in enumerate(ler_anotacoes(caminho)):
+            doc_id = con.execute(
+                "INSERT INTO documentos (arquivo, posicao, texto) VALUES (?, ?, ?)", (arquivo, posicao, texto)
+            ).lastrowid
+            con.executemany(
+                "INSERT INTO spans (doc_id, inicio, fim, label, superficie, tamanho) VALUES (?, ?, ?, ?, ?, ?)",
+                [(doc_id, ini, fim, label, texto[ini:fim], fim - ini) for ini, fim, label, *_ in entities],
+            )
+            n_docs += 1
+            n_spans += len(entities)
+    return n_docs, n_spans
+
+
+# -------------------------------
+# Consulta
+# -------------------------------
+def consultar(con, label=None, fts=None, regex=None, tamanho_min=None, tamanho_max=None,
+              arquivo=None, limite=None):
+    """
+    Spans que atendem a todos os filtros informados, como dicts
+    {doc_id, arquivo, posicao, inicio, fim, label, superficie}.
+    fts usa a sintaxe do FTS5 ("M54*", "cid AND a09"); regex é um re do Python.
+    """
+    filtros, params = [], []
+    if label:
+        filtros.append("s.label = ?")
+        params.append(label)
+    if fts:
+        filtros.append("s.id IN (SELECT rowid FROM spans_fts WHERE spans_fts MATCH ?)")
+        params.append(fts)
+    if regex:
+        filtros.append("s.superficie REGEXP ?")
+        params.append(regex)
+    if tamanho_min is not None:
+        filtros.append("s.tamanho >= ?")
+        params.append(tamanho_min)
+    if tamanho_max is not None:
+        filtros.append("s.tamanho <= ?")
+        params.append(tamanho_max)
+    if arquivo:
+        filtros.append("d.arquivo = ?")
+        params.append(arquivo)
+
+    sql = (
+        "SELECT s.doc_id, d.arquivo, d.posicao, s.inicio, s.fim, s.label, s.superficie "
+        "FROM spans s JOIN documentos d ON d.id = s.doc_id"
+    )
+    if filtros:
+        sql += " WHERE " + " AND ".join(filtros)
+    sql += " ORDER BY s.doc_id, s.inicio"
+    if limite:
+        sql += " LIMIT ?"
+        params.append(limite)
+
+    campos = ("doc_id", "arquivo", "posicao", "inicio", "fim", "label", "superficie")
+    return [dict(zip(campos, linha)) for linha in con.execute(sql, params)]
+
+
+def contagem_por_label(con):
+    return dict(con.execute("SELECT label, COUNT(*) FROM spans GROUP BY label ORDER BY 2 DESC"))
+
+
+# -------------------------------
+# Exportação
+# -------------------------------
+def exportar_docbin(con, resultados, caminho=None, todos_spans=False, lang="pt"):
+    """
+    DocBin com os documentos dos resultados. Por padrão só os spans
+    encontrados viram entidades; com todos_spans, todas as anotações do documento.
+    """
+    por_doc = {}
+    for r in resultados:
+        por_doc.setdefault(r["doc_id"], []).append((r["inicio"], r["fim"], r["label"]))
+
+    nlp = spacy.blank(lang)
+    doc_bin = DocBin()
+    for doc_id, spans in por_doc.items():
+        (texto,) = con.execute("SELECT texto FROM documentos WHERE id = ?", (doc_id,)).fetchone()
+        if todos_spans:
+            spans = con.execute("SELECT inicio, fim, label FROM spans WHERE doc_id = ?", (doc_id,)).fetchall()
+        doc = nlp.make_doc(texto)
+        ents = [doc.char_span(ini, fim, label=label) for ini, fim, label in spans]
+        doc.ents = filter_spans([e for e in ents if e is not None])
+        doc_bin.add(doc)
+
+    if caminho:
+        doc_bin.to_disk(caminho)
+    return doc_bin
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Índice SQLite/FTS5 das anotações de treino")
+    parser.add_argument("--banco", default=BANCO_PADRAO)
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_indexar = sub.add_parser("indexar", help="indexa (ou reindexa) arquivos .json/.jsonl")
+    p_indexar.add_argument("arquivos", nargs="+")
+
+    p_consultar = sub.add_parser("consultar", help="busca spans e opcionalmente exporta um DocBin")
+    p_consultar.add_argument("--label")
+    p_consultar.add_argument("--fts", help='consulta FTS5 na superfície, ex.: "M54*"')
+    p_consultar.add_argument("--regex", help="regex Python na superfície")
+    p_consultar.add_argument("--tamanho-min", type=int)
+    p_consultar.add_argument("--tamanho-max", type=int)
+    p_consultar.add_argument("--arquivo", help="nome do arquivo de origem")
+    p_consultar.add_argument("--limite", type=int)
+    p_consultar.add_argument("--docbin", help="grava os documentos encontrados em um .spacy")
+    p_consultar.add_argument("--todos-spans", action="store_true", help="no DocBin, todas as anotações do documento")
+    args = parser.parse_args()
+
+    con = abrir(args.banco)
+
+    if args.comando == "indexar":
+        for caminho in args.arquivos:
+            n_docs, n_spans = indexar(con, caminho)
+            print(f"{caminho}: {n_docs} documentos, {n_spans} spans")
+        print(json.dumps(contagem_por_label(con), indent=2, ensure_ascii=False))
+    else:
+        resultados = consultar(
+            con, label=args.label, fts=args.fts, regex=args.regex,
+            tamanho_min=args.tamanho_min, tamanho_max=args.tamanho_max,
+            arquivo=args.arquivo, limite=args.limite,
+        )
+        for r in resultados:
+            print(f"{r['arquivo']}#{r['posicao']} [{r['inicio']}:{r['fim']}] {r['label']}: {r['superficie']!r}")
+        print(f"\n{len(resultados)} spans em {len({r['doc_id'] for r in resultados})} documentos")
+        if args.docbin:
+            exportar_docbin(con, resultados, args.docbin, todos_spans=args.todos_spans)
+            print(f"✅ DocBin salvo em '{args.docbin}'")
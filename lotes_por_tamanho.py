@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Lotes agrupados por tamanho (length bucketing) para treino e inferência.
+
+Os textos vão de uma linha ("ATESTADO ... compareceu") a laudos de vários
+parágrafos. Agrupar documentos de tamanho parecido no mesmo lote reduz o
+preenchimento (padding) e deixa o custo de cada passo mais previsível: o
+lote é limitado por n_docs * maior_doc, e não pela soma de palavras.
+
+- batcher de treino "atestados.LotesPorTamanho.v1" (opcional em config_treino.py, batcher="tamanho")
+- pipe_por_tamanho(nlp, textos): nlp.pipe sobre os textos ordenados por
+  tamanho, devolvendo os docs na ordem original
+"""
+
+import random
+
+from spacy.util import registry
+
+
+def tamanho_item(item):
+    """Tokens de um Example/Doc, ou palavras de um texto."""
+    if isinstance(item, str):
+        return len(item.split())
+    return len(item)
+
+
+def lotes_por_tamanho(itens, tamanho, buffer=256, tamanho_de=tamanho_item, descartar_grandes=False, embaralhar=True):
+    """
+    Lê 'buffer' itens por vez, ordena por tamanho e corta em lotes cujo custo
+    com padding (n_itens * maior_item) não passa de 'tamanho'. Um item maior
+    que 'tamanho' vira um lote sozinho (ou é descartado). Com 'embaralhar',
+    a ordem dos lotes dentro de cada buffer é sorteada, para o treino não
+    ver sempre os curtos antes dos longos.
+    """
+    def cortar(bloco):
+        bloco.sort(key=tamanho_de)
+        lotes, lote, maior = [], [], 0
+        for item in bloco:
+            n = tamanho_de(item)
+            if n > tamanho:
+                if not descartar_grandes:
+                    lotes.append([item])
+                continue
+            if lote and max(maior, n) * (len(lote) + 1) > tamanho:
+                lotes.append(lote)
+                lote, maior = [], 0
+            lote.append(item)
+            maior = max(maior, n)
+        if lote:
+            lotes.append(lote)
+        if embaralhar:
+            random.shuffle(lotes)
+        return lotes
+
+    bloco = []
+    for item in itens:
+        bloco.append(item)
+        if len(bloco) >= buffer:
+            yield from cortar(bloco)
+            bloco = []
+    if bloco:
+        yield from cortar(bloco)
+
+
+@registry.batchers("atestados.LotesPorTamanho.v1")
+def configurar_lotes_por_tamanho(size: int, buffer: int = 256, discard_oversize: bool = False):
+    """Batcher para a config de treino: size = limite de palavras com padding por lote."""
+    def batcher(itens):
+        return lotes_por_tamanho(itens, size, buffer=buffer, descartar_grandes=discard_oversize)
+    return batcher
+
+
+def desperdicio_padding(lotes, tamanho_de=tamanho_item):
+    """Fração de posições de padding: 1 - palavras reais / (n_itens * maior_item) somados."""
+    reais = preenchidas = 0
+    for lote in lotes:
+        tamanhos = [tamanho_de(item) for item in lote]
+        reais += sum(tamanhos)
+        preenchidas += len(tamanhos) * max(tamanhos, default=0)
+    return 1.0 - reais / preenchidas if preenchidas else 0.0
+
+
+# -------------------------------
+# Inferência
+# -------------------------------
+def pipe_por_tamanho(nlp, textos, batch_size=64, **kwargs):
+    """
+    nlp.pipe com os textos ordenados por tamanho (lotes homogêneos); os docs
+    voltam na ordem de 'textos'.
+    """
+    ordem = sorted(range(len(textos)), key=lambda i: len(textos[i]))
+    docs = [None] * len(textos)
+    for i, doc in zip(ordem, nlp.pipe((textos[i] for i in ordem), batch_size=batch_size, **kwargs)):
+        docs[i] = doc
+    return docs
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Normalização do texto de OCR antes do NER, com mapa de offsets reversível.
+
+Duas etapas:
+1. str.translate com uma tabela 1:1 (espaços especiais, travessões, aspas,
+   tabulação) -> não muda o tamanho do texto;
+2. uma única passada de um regex compilado com as correções de OCR:
+   - palavras conhecidas: "Atesdo" -> "Atesto", "Períod:" -> "Período:",
+     "hoário" -> "horário";
+   - prefixo de CID: "CID_ A09", "CiD- G43.909", "cid: H10.2", "CID:M54.5"
+     -> "CID A09" (forma dos dados de treino);
+   - horários com espaço: "das 09 00 às 10 15" -> "das 09:00 às 10:15"
+     ("e" só conta depois de outro horário: "09 00 e 10 15").
+
+TextoNormalizado.para_original(inicio, fim) converte um span do texto
+normalizado para o texto original, para que as entidades continuem sendo
+reportadas nas posições do documento recebido.
+"""
+
+import re
+from bisect import bisect_right
+
+# Etapa 1: troca de caractere por caractere (mesmo tamanho)
+TABELA = str.maketrans({
+    "\u00a0": " ",   # espaço não separável
+    "\u2007": " ",
+    "\u202f": " ",
+    "\t": " ",
+    "\u2010": "-",   # hífens e travessões
+    "\u2011": "-",
+    "\u2012": "-",
+    "\u2013": "-",
+    "\u2014": "-",
+    "\u2212": "-",
+    "\u2018": "'",   # aspas tipográficas
+    "\u2019": "'",
+    "\u201c": '"',
+    "\u201d": '"',
+})
+
+# Erros de OCR conhecidos (comparação sem diferenciar maiúsculas)
+PALAVRAS = {
+    "atesdo": "atesto",
+    "períod": "período",
+    "hoário": "horário",
+}
+
+# Etapa 2: todas as correções num só regex (um grupo nomeado por regra)
+_CORRECOES = re.compile(
+    r"(?P<palavra>\b(?:" + "|".join(PALAVRAS) + r")\b)"
+    r"|(?P<cid>\bCID\s*[:_\-]?\s*(?=[A-Z]\d{2}))"
+    # "e" só vale logo depois de um horário ("09 00 e 10 15"): "1 e 2 20 dias" não é horário
+    r"|(?P<horario>(?:\b(?:das|às|as|entre|até)|(?<=\d[\s:h][0-5]\d)\s+e)\s+(?:[01]?\d|2[0-3]))\s(?P<minuto>[0-5]\d)\b",
+    re.IGNORECASE,
+)
+
+
+def _mesma_caixa(modelo, palavra):
+    if modelo.isupper():
+        return palavra.upper()
+    if modelo[0].isupper():
+        return palavra[0].upper() + palavra[1:]
+    return palavra
+
+
+def _substituir(m):
+    if m.group("palavra"):
+        original = m.group("palavra")
+        return _mesma_caixa(original, PALAVRAS[original.lower()])
+    if m.group("cid"):
+        return "CID "
+    return f"{m.group('horario')}:{m.group('minuto')}"
+
+
+class TextoNormalizado:
+    """Texto normalizado + mapa de offsets para o texto original."""
+
+    # Sem __dict__: um por documento, mantido junto com o resultado da extração
+    __slots__ = ("original", "texto", "_segmentos", "_inicios")
+
+    def __init__(self, original, texto, segmentos):
+        self.original = original
+        self.texto = texto
+        # (inicio_norm, fim_norm, inicio_orig, fim_orig) de cada trecho substituído
+        self._segmentos = tuple(segmentos)
+        self._inicios = tuple(s[0] for s in segmentos)
+
+    def _converter(self, pos, fim):
+        i = bisect_right(self._inicios, pos) - 1
+        if i < 0:
+            return pos
+        n0, n1, o0, o1 = self._segmentos[i]
+        if fim and pos == n0:
+            return o0
+        if pos >= n1:
+            return o1 + (pos - n1)
+        # dentro de um trecho substituído: o span cobre o trecho original inteiro
+        return o1 if fim else o0
+
+    def para_original(self, inicio, fim):
+        """(inicio, fim) no texto normalizado -> (inicio, fim) no original."""
+        return self._converter(inicio, False), self._converter(fim, True)
+
+    def trecho_original(self, inicio, fim):
+        i, f = self.para_original(inicio, fim)
+        return self.original[i:f]
+
+
+def _diferenca(antigo, novo):
+    """Tamanho do prefixo e do sufixo comuns (o segmento do mapa é só o meio)."""
+    limite = min(len(antigo), len(novo))
+    prefixo = 0
+    while prefixo < limite and antigo[prefixo] == novo[prefixo]:
+        prefixo += 1
+    sufixo = 0
+    while sufixo < limite - prefixo and antigo[-1 - sufixo] == novo[-1 - sufixo]:
+        sufixo += 1
+    return prefixo, sufixo
+
+
+def normalizar(texto):
+    """Aplica a tabela e as correções; retorna um TextoNormalizado."""
+    traduzido = texto.translate(TABELA)
+    partes, segmentos = [], []
+    anterior = 0
+    tamanho_norm = 0
+    for m in _CORRECOES.finditer(traduzido):
+        antigo, novo = m.group(0), _substituir(m)
+        if novo == antigo:
+            continue
+        partes.append(traduzido[anterior:m.start()])
+        tamanho_norm += m.start() - anterior
+        prefixo, sufixo = _diferenca(antigo, novo)
+        segmentos.append((
+            tamanho_norm + prefixo, tamanho_norm + len(novo) - sufixo,
+            m.start() + prefixo, m.end() - sufixo,
+        ))
+        partes.append(novo)
+        tamanho_norm += len(novo)
+        anterior = m.end()
+    if not segmentos:
+        # Nada mudou de tamanho: sem cópia extra quando o texto já estava limpo
+        return TextoNormalizado(texto, texto if traduzido == texto else traduzido, segmentos)
+    partes.append(traduzido[anterior:])
+    return TextoNormalizado(texto, "".join(partes), segmentos)
@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+"""
+Pacote único com todos os modelos NER de entidades (formato .zip).
+
+Conteúdo do arquivo:
+- manifest.json            -> versões, labels, pipeline e sha256 de cada entrada
+- <ENTIDADE>/config.cfg    -> config do pipeline (para reconstruir o nlp)
+- <ENTIDADE>/nlp.bin       -> nlp.to_bytes() com os parâmetros esvaziados
+- <ENTIDADE>/pesos.bin     -> pesos brutos (float32 etc.), alinhados, para mmap
+
+Os pesos ficam só no pesos.bin. As entradas são gravadas sem compressão
+(ZIP_STORED), de modo que o loader lê direto do arquivo mapeado em memória,
+sem extrair nada para o disco. Com usar_mmap=True os parâmetros dos modelos
+viram views sobre o mapeamento (copy-on-write): vários processos que
+carregam o mesmo pacote compartilham as mesmas páginas. Com usar_mmap=False
+os pesos são copiados e o mapeamento é fechado na carga.
+
+Uso:
+    python pacote_modelos.py empacotar [--saida Models/modelos_NER.zip]
+    python pacote_modelos.py verificar Models/modelos_NER.zip
+"""
+
+import os
+import io
+import gc
+import json
+import mmap
+import struct
+import hashlib
+import zipfile
+import argparse
+from datetime import datetime
+
+import numpy as np
+import spacy
+from thinc.api import Config
+
+VERSAO_FORMATO = 2  # 1: nlp.bin ainda com os pesos
+CAMINHO_PACOTE = os.path.join("Models", "modelos_NER.zip")
+ALINHAMENTO = 64
+
+# Diretórios dos modelos treinados individualmente por entidade
+CAMINHOS_MODELOS = {
+    "CID": "modelo_NER_CID/model-last",
+    "NOME_PACIENTE": "modelo_NER_NOME_PACIENTE",
+    "DATA": "modelo_NER_DATA/model-last",
+    "TIPO_DOC": "modelo_NER_DOCUMENTO/model-last",
+    "TEMPO_AFASTAMENTO": "modelo_NER_TEMPO_AFASTAMENTO/model-last",
+    "CRM": "modelo_NER_CONSELHOS/model-last",
+    "HORARIOS": "modelo_NER_horarios/model-last",
+}
+
+# Corpora de validação gerados pelos scripts Treinando_* (usados nos relatórios)
+CORPORA_DEV = {
+    "CID": "dev_CID.spacy",
+    "NOME_PACIENTE": "dev_nome_paciente.spacy",
+    "DATA": "dev_DATA.spacy",
+    "TIPO_DOC": "dev_DOCUMENTO.spacy",
+    "TEMPO_AFASTAMENTO": "dev_TEMPO.spacy",
+    "CRM": "dev_CONSELHOS.spacy",
+    "HORARIOS": "dev_horarios.spacy",
+}
+
+
+# -------------------------------
+# Utilidades
+# -------------------------------
+def _sha256(dados):
+    return hashlib.sha256(dados).hexdigest()
+
+
+def iterar_parametros(nlp):
+    """
+    Percorre (componente, índice do nó, nome do parâmetro, nó) em ordem
+    determinística: a mesma config gera a mesma sequência em qualquer processo.
+    """
+    for nome_comp, proc in nlp.components:
+        modelo = getattr(proc, "model", None)
+        if modelo is None or not hasattr(modelo, "walk"):
+            continue
+        for i, no in enumerate(modelo.walk()):
+            for nome_param in no.param_names:
+                if no.has_param(nome_param):
+                    yield nome_comp, i, nome_param, no
+
+
+def _labels(nlp):
+    labels = set()
+    for _, proc in nlp.components:
+        labels.update(getattr(proc, "labels", ()) or ())
+    return sorted(labels)
+
+
+def _serializar_pesos(nlp):
+    """Concatena todos os parâmetros num único buffer alinhado + índice."""
+    buffer = io.BytesIO()
+    indice = []
+    for nome_comp, i, nome_param, no in iterar_parametros(nlp):
+        arr = np.ascontiguousarray(no.get_param(nome_param))
+        resto = buffer.tell() % ALINHAMENTO
+        if resto:
+            buffer.write(b"\0" * (ALINHAMENTO - resto))
+        inicio = buffer.tell()
+        buffer.write(arr.tobytes())
+        indice.append({
+            "componente": nome_comp, "no": i, "param": nome_param,
+            "dtype": arr.dtype.str, "shape": list(arr.shape),
+            "inicio": inicio, "fim": buffer.tell(),
+        })
+    return buffer.getvalue(), indice
+
+
+def registrar_componentes():
+    """
+    Registra as factories dos componentes próprios dos modelos antes de
+    reconstruí-los ou de um spacy.load (o NOME_PACIENTE tem o
+    "gazetteer_nomes"). Fica aqui, e
+    não no topo do módulo, para quem só usa iterar_parametros (checkpoints)
+    não carregar o banco de nomes.
+    """
+    import gazetteer_nomes  # noqa: F401 (o import registra a factory)
+
+
+def _offset_dados(mm, info):
+    """Offset absoluto dos dados de uma entrada (após o local file header)."""
+    cabecalho = mm[info.header_offset:info.header_offset + 30]
+    if cabecalho[:4] != b"PK\x03\x04":
+        raise ValueError(f"Cabeçalho local inválido em {info.filename}")
+    tam_nome, tam_extra = struct.unpack("<HH", cabecalho[26:30])
+    return info.header_offset + 30 + tam_nome + tam_extra
+
+
+# -------------------------------
+# Empacotar
+# -------------------------------
+def empacotar_modelos(caminhos=None, destino=CAMINHO_PACOTE):
+    """Carrega cada modelo do disco e grava o pacote único em 'destino'."""
+    caminhos = caminhos or CAMINHOS_MODELOS
+    registrar_componentes()
+    manifest = {
+        "formato": VERSAO_FORMATO,
+        "criado_em": datetime.now().isoformat(timespec="seconds"),
+        "spacy": spacy.__version__,
+        "modelos": {},
+    }
+
+    os.makedirs(os.path.dirname(destino) or ".", exist_ok=True)
+    with zipfile.ZipFile(destino, "w", compression=zipfile.ZIP_STORED) as zf:
+        for entidade, caminho in caminhos.items():
+            nlp = spacy.load(caminho)
+            config = nlp.config.to_str().encode("utf-8")
+            pesos, indice = _serializar_pesos(nlp)
+            # Esvazia os parâmetros: os pesos vão só no pesos.bin
+            for _, _, nome_param, no in iterar_parametros(nlp):
+                no.set_param(nome_param, np.zeros((0,), dtype=no.get_param(nome_param).dtype))
+            dados = nlp.to_bytes()
+
+            zf.writestr(f"{entidade}/config.cfg", config)
+            zf.writestr(f"{entidade}/nlp.bin", dados)
+            zf.writestr(f"{entidade}/pesos.bin", pesos)
+
+            manifest["modelos"][entidade] = {
+                "origem": caminho,
+                "versao": nlp.meta.get("version", "0.0.0"),
+                "pipeline": list(nlp.pipe_names),
+                "labels": _labels(nlp),
+                "sha256": {
+                    "config.cfg": _sha256(config),
+                    "nlp.bin": _sha256(dados),
+                    "pesos.bin": _sha256(pesos),
+                },
+                "pesos": indice,
+            }
+            print(f"📦 {entidade}: {(len(dados) + len(pesos)) / 1e6:.1f} MB ({caminho})")
+
+        zf.writestr("manifest.json", json.dumps(manifest, indent=2, ensure_ascii=False))
+
+    print(f"✅ Pacote salvo em: {destino}")
+    return destino
+
+
+# -------------------------------
+# Carregar
+# -------------------------------
+def ler_manifest(caminho=CAMINHO_PACOTE):
+    with zipfile.ZipFile(caminho) as zf:
+        manifest = json.loads(zf.read("manifest.json"))
+    if manifest.get("formato") not in (1, VERSAO_FORMATO):
+        raise ValueError(f"Formato de pacote não suportado: {manifest.get('formato')}")
+    return manifest
+
+
+class ModelosPacote(dict):
+    """
+    {entidade: nlp} no mesmo formato de 'modelos' em app_OCR, com o mmap do
+    pacote. fechar() descarta os modelos e fecha o mapeamento (com
+    usar_mmap=True, só depois que nenhum nlp do pacote estiver em uso).
+    """
+
+    def __init__(self, modelos, mm):
+        super().__init__(modelos)
+        self.mm = mm
+
+    def fechar(self):
+        self.clear()
+        gc.collect()  # o nlp tem ciclos de referência: sem isso as views sobre o mmap seguem vivas
+        if not self.mm.closed:
+            self.mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+def carregar_pacote(caminho=CAMINHO_PACOTE, entidades=None, verificar=True, usar_mmap=True):
+    """
+    Carrega os modelos do pacote, sem extrair para o disco.
+    Retorna um ModelosPacote ({entidade: nlp}).
+    """
+    manifest = ler_manifest(caminho)
+    entidades = entidades or list(manifest["modelos"])
+    registrar_componentes()
+
+    # ACCESS_COPY: as views são graváveis (o thinc exige), mas as páginas só
+    # deixam de ser compartilhadas se alguém escrever nelas
+    with open(caminho, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    with zipfile.ZipFile(caminho) as zf:
+        infos = {info.filename: info for info in zf.infolist()}
+
+    fatias = []
+
+    def fatia(nome):
+        info = infos[nome]
+        if info.compress_type != zipfile.ZIP_STORED:
+            raise ValueError(f"Entrada comprimida não suportada: {nome}")
+        inicio = _offset_dados(mm, info)
+        with memoryview(mm) as mv:
+            fatias.append(mv[inicio:inicio + info.file_size])
+        return fatias[-1]
+
+    modelos = {}
+    for entidade in entidades:
+        if entidade not in manifest["modelos"]:
+            raise KeyError(f"Entidade '{entidade}' não está no pacote {caminho}")
+        meta = manifest["modelos"][entidade]
+
+        config_bin = fatia(f"{entidade}/config.cfg")
+        dados = fatia(f"{entidade}/nlp.bin")
+        pesos = fatia(f"{entidade}/pesos.bin")
+
+        if verificar:
+            for nome, entrada in (("config.cfg", config_bin), ("nlp.bin", dados), ("pesos.bin", pesos)):
+                if _sha256(entrada) != meta["sha256"][nome]:
+                    raise ValueError(f"Checksum divergente: {entidade}/{nome}")
+
+        config = Config().from_str(bytes(config_bin).decode("utf-8"))
+        lang_cls = spacy.util.get_lang_class(config["nlp"]["lang"])
+        nlp = lang_cls.from_config(config)
+        nlp.from_bytes(bytes(dados))
+        _mapear_pesos(nlp, pesos, meta["pesos"], copiar=not usar_mmap)
+
+        modelos[entidade] = nlp
+
+    if not usar_mmap:
+        # Os pesos foram copiados: solta todas as fatias e fecha o mapeamento
+        for mv in fatias:
+            mv.release()
+        mm.close()
+    return ModelosPacote(modelos, mm)
+
+
+def _mapear_pesos(nlp, pesos, indice, copiar=False):
+    """Aplica os parâmetros do pesos.bin: views sobre o mmap ou, com 'copiar', cópias."""
+    parametros = list(iterar_parametros(nlp))
+    if len(parametros) != len(indice):
+        raise ValueError("Índice de pesos não corresponde ao pipeline reconstruído")
+
+    for (nome_comp, i, nome_param, no), item in zip(parametros, indice):
+        if (nome_comp, i, nome_param) != (item["componente"], item["no"], item["param"]):
+            raise ValueError(f"Parâmetro fora de ordem: {nome_comp}/{i}/{nome_param}")
+        with pesos[item["inicio"]:item["fim"]] as trecho:
+            view = np.frombuffer(trecho, dtype=np.dtype(item["dtype"])).reshape(item["shape"])
+            no.set_param(nome_param, view.copy() if copiar else view)
+
+
+def verificar_pacote(caminho=CAMINHO_PACOTE):
+    """Confere checksums de todas as entradas. Retorna o manifest se tudo estiver ok."""
+    manifest = ler_manifest(caminho)
+    with zipfile.ZipFile(caminho) as zf:
+        for entidade, meta in manifest["modelos"].items():
+            for nome, esperado in meta["sha256"].items():
+                if _sha256(zf.read(f"{entidade}/{nome}")) != esperado:
+                    raise ValueError(f"Checksum divergente: {entidade}/{nome}")
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Empacota/verifica os modelos NER num arquivo único")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_emp = sub.add_parser("empacotar")
+    p_emp.add_argument("--saida", default=CAMINHO_PACOTE)
+
+    p_ver = sub.add_parser("verificar")
+    p_ver.add_argument("arquivo", nargs="?", default=CAMINHO_PACOTE)
+
+    args = parser.parse_args()
+    if args.comando == "empacotar":
+        empacotar_modelos(destino=args.saida)
+    else:
+        manifest = verificar_pacote(args.arquivo)
+        for entidade, meta in manifest["modelos"].items():
+            print(f"✅ {entidade} v{meta['versao']} | pipeline={meta['pipeline']} | labels={meta['labels']}")
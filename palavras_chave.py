@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+Busca de várias palavras-chave em uma passada (autômato de Aho–Corasick),
+sem diferenciar caixa nem acentos.
+
+Cada caractere é comparado pela letra base minúscula (É -> e, Ç -> c), um
+para um, então os offsets devolvidos são os do texto original. Com
+ignorar_espacos=True os espaços são pulados na busca ("ATESTADO   MÉDICO" e
+"ATESTADOMÉDICO" casam com "ATESTADO MÉDICO"); sem isso, uma sequência de
+espaços vale um espaço.
+
+Autômatos prontos:
+- TIPOS_DOC: vocabulário fechado de tipos de documento (tipo_documento()
+  para validar um span, componente spaCy para achar o tipo no texto);
+- TERMOS_NOME / PREFIXOS_NOME: os termos e partes que invalidam um nome de
+  paciente (termo_invalido_no_nome(), usado por validar_nome_paciente no
+  app_OCR). Os termos só contam como palavra inteira ("CID" não invalida
+  "APARECIDA", "manhã" não invalida "MANHAES"); os prefixos, no começo de
+  uma palavra ("consult" -> "consulta", "consultório").
+
+Componente spaCy (marca a primeira ocorrência, sem sobrescrever entidades):
+    import palavras_chave
+    nlp.add_pipe("palavras_chave_atestados", config={"label": "TIPO_DOC"})
+
+Uso:
+    python palavras_chave.py "DECLARAÇÃO MEDICA  Declaro que ..."
+"""
+
+import argparse
+import unicodedata
+from collections import deque
+
+from spacy.language import Language
+from spacy.util import filter_spans
+
+# Canônico -> variantes (a ordem dá preferência ao mais específico)
+TIPOS_DOCUMENTO = {
+    "RELATÓRIO MÉDICO": ["RELATÓRIO MÉDICO"],
+    "DECLARAÇÃO MÉDICA": ["DECLARAÇÃO MÉDICA", "DECLARAÇÃO MÉDICO"],
+    "ATESTADO MÉDICO": ["ATESTADO MÉDICO"],
+    "RECEITUÁRIO MÉDICO": ["RECEITUÁRIO MÉDICO"],
+    "LAUDO MÉDICO": ["LAUDO MÉDICO"],
+    "ATESTADO": ["ATESTADO"],
+    "RELATÓRIO": ["RELATÓRIO"],
+    "DECLARAÇÃO": ["DECLARAÇÃO"],
+}
+
+# Termos médicos/administrativos e partes de endereço que não fazem parte de um nome
+TERMOS_INVALIDOS_NOME = [
+    "afastamento", "indicado", "necessário", "tratamento", "diagnóstico", "repouso",
+    "paciente", "compareceu", "atendimento", "avaliação", "clínica", "hospital",
+    "unidade", "serviço", "período", "dias", "dia", "CID", "crm", "código", "documento",
+    "declaro", "consta", "confirmo", "atesto", "realizou", "avaliado", "diagnosticado",
+    "recomendado", "necessario", "realizado", "acompanhamento", "cuidados",
+    "dieta", "protocolo", "fins", "devidos", "fim", "inicio", "manhã", "tarde", "noite",
+    "horário", "cpf", "laudo", "atestado", "declaração", "relatório", "receituário",
+]
+PARTES_INVALIDAS_NOME = ["cidade", "estado", "país", "rua", "avenida", "bairro", "nº", "número"]
+# Radicais: valem no começo de qualquer palavra
+PREFIXOS_INVALIDOS_NOME = ["consult"]
+
+
+def _chave(c):
+    """Letra base minúscula de um caractere (um caractere -> um caractere)."""
+    return " " if c.isspace() else unicodedata.normalize("NFD", c)[0].lower()
+
+
+# Latin-1 e Latin Extended-A (tudo o que aparece nos atestados) via str.translate
+_TABELA = {i: _chave(chr(i)) for i in range(0x180)}
+
+
+def _normalizar(texto):
+    norm = texto.translate(_TABELA)
+    if norm.isascii():
+        return norm
+    return "".join(c if ord(c) < 0x180 else _chave(c) for c in norm)
+
+
+class Automato:
+    """
+    Autômato de Aho–Corasick sobre 'termos' (lista de strings ou dict
+    {termo: valor}). encontrar() devolve (inicio, fim, termo, valor).
+    """
+
+    def __init__(self, termos, ignorar_espacos=False):
+        self.ignorar_espacos = ignorar_espacos
+        itens = termos.items() if isinstance(termos, dict) else ((termo, termo) for termo in termos)
+        self._termos, self._valores, self._tamanhos = [], [], []
+        self._transicoes, self._falha, self._saida = [{}], [0], [[]]
+
+        for termo, valor in itens:
+            chaves = "".join(c for _, c in self._chaves(termo))
+            if not chaves:
+                raise ValueError(f"Termo vazio no autômato: {termo!r}")
+            estado = 0
+            for c in chaves:
+                proximo = self._transicoes[estado].get(c)
+                if proximo is None:
+                    proximo = len(self._transicoes)
+                    self._transicoes[estado][c] = proximo
+                    self._transicoes.append({})
+                    self._falha.append(0)
+                    self._saida.append([])
+                estado = proximo
+            self._saida[estado].append(len(self._termos))
+            self._termos.append(termo)
+            self._valores.append(valor)
+            self._tamanhos.append(len(chaves))
+
+        # Ligações de falha em largura; a saída de um estado inclui a do seu estado de falha
+        fila = deque(self._transicoes[0].values())
+        while fila:
+            estado = fila.popleft()
+            for c, proximo in self._transicoes[estado].items():
+                fila.append(proximo)
+                falha = self._falha[estado]
+                while falha and c not in self._transicoes[falha]:
+                    falha = self._falha[falha]
+                self._falha[proximo] = self._transicoes[falha].get(c, 0)
+                self._saida[proximo] = self._saida[proximo] + self._saida[self._falha[proximo]]
+
+    def _chaves(self, texto):
+        """[(posição no texto, caractere normalizado)] com os espaços tratados."""
+        chaves, espaco = [], False
+        for i, c in enumerate(_normalizar(texto)):
+            if c == " ":
+                if self.ignorar_espacos or espaco:
+                    continue
+                espaco = True
+            else:
+                espaco = False
+            chaves.append((i, c))
+        return chaves
+
+    def _ocorrencias(self, texto):
+        transicoes, falha, saida = self._transicoes, self._falha, self._saida
+        chaves = self._chaves(texto)
+        estado = 0
+        for j, (pos, c) in enumerate(chaves):
+            while estado and c not in transicoes[estado]:
+                estado = falha[estado]
+            estado = transicoes[estado].get(c, 0)
+            for indice in saida[estado]:
+                inicio = chaves[j - self._tamanhos[indice] + 1][0]
+                yield inicio, pos + 1, indice
+
+    def encontrar(self, texto, palavras_inteiras=False, sobrepostos=False, inicio_de_palavra=False):
+        """
+        Ocorrências (inicio, fim, termo, valor) em ordem de posição. Sem
+        'sobrepostos', fica a mais longa entre as que se sobrepõem;
+        'palavras_inteiras' exige que a ocorrência não esteja colada em
+        letras/dígitos; 'inicio_de_palavra', só do lado esquerdo (prefixos).
+        """
+        esquerda = palavras_inteiras or inicio_de_palavra
+        ocorrencias = [
+            (inicio, fim, indice) for inicio, fim, indice in self._ocorrencias(texto)
+            if (not esquerda or inicio == 0 or not texto[inicio - 1].isalnum())
+            and (not palavras_inteiras or fim == len(texto) or not texto[fim].isalnum())
+        ]
+        if not sobrepostos:
+            escolhidas, ultimo_fim = [], -1
+            for inicio, fim, indice in sorted(ocorrencias, key=lambda o: (o[0], o[0] - o[1], o[2])):
+                if inicio >= ultimo_fim:
+                    escolhidas.append((inicio, fim, indice))
+                    ultimo_fim = fim
+            ocorrencias = escolhidas
+        return [(inicio, fim, self._termos[indice], self._valores[indice]) for inicio, fim, indice in ocorrencias]
+
+    def contem(self, texto):
+        """True na primeira ocorrência de qualquer termo (como 'any(termo in texto ...)')."""
+        transicoes, falha, saida = self._transicoes, self._falha, self._saida
+        estado, espaco = 0, False
+        for c in _normalizar(texto):
+            if c == " ":
+                if self.ignorar_espacos or espaco:
+                    continue
+                espaco = True
+            else:
+                espaco = False
+            while estado and c not in transicoes[estado]:
+                estado = falha[estado]
+            estado = transicoes[estado].get(c, 0)
+            if saida[estado]:
+                return True
+        return False
+
+
+TIPOS_DOC = Automato(
+    {variante: canonico for canonico, variantes in TIPOS_DOCUMENTO.items() for variante in variantes},
+    ignorar_espacos=True,
+)
+TERMOS_NOME = Automato(TERMOS_INVALIDOS_NOME + PARTES_INVALIDAS_NOME)
+PREFIXOS_NOME = Automato(PREFIXOS_INVALIDOS_NOME)
+
+
+def termo_invalido_no_nome(nome):
+    """True se o nome tem um termo inválido como palavra inteira ou uma palavra que começa com um prefixo inválido."""
+    return bool(
+        TERMOS_NOME.encontrar(nome, palavras_inteiras=True, sobrepostos=True)
+        or PREFIXOS_NOME.encontrar(nome, inicio_de_palavra=True, sobrepostos=True)
+    )
+
+
+def tipo_documento(texto):
+    """Tipo canônico se o texto todo (sem espaços nas pontas) é um tipo do vocabulário, senão None."""
+    texto = texto.strip()
+    for inicio, fim, _, canonico in TIPOS_DOC.encontrar(texto):
+        if inicio == 0 and fim == len(texto):
+            return canonico
+    return None
+
+
+def tipos_no_texto(texto, automato=TIPOS_DOC):
+    """[(inicio, fim, tipo canônico)] das palavras inteiras do vocabulário no texto."""
+    return [(inicio, fim, canonico) for inicio, fim, _, canonico in automato.encontrar(texto, palavras_inteiras=True)]
+
+
+# -------------------------------
+# Componente spaCy
+# -------------------------------
+class PalavrasChave:
+    def __init__(self, label, termos=None, ignorar_espacos=True, primeira_ocorrencia=True):
+        self.label = label
+        self.primeira_ocorrencia = primeira_ocorrencia
+        self.automato = Automato(termos, ignorar_espacos) if termos else TIPOS_DOC
+
+    def __call__(self, doc):
+        ocorrencias = self.automato.encontrar(doc.text, palavras_inteiras=True)
+        if self.primeira_ocorrencia:
+            ocorrencias = ocorrencias[:1]
+        novos = [doc.char_span(inicio, fim, label=self.label, alignment_mode="expand") for inicio, fim, *_ in ocorrencias]
+        novos = [span for span in novos if span is not None]
+        if novos:
+            # Entidades já presentes (do NER ou de outro componente) têm prioridade
+            ocupados = {i for ent in doc.ents for i in range(ent.start, ent.end)}
+            novos = [span for span in filter_spans(novos) if not ocupados.intersection(range(span.start, span.end))]
+            doc.ents = list(doc.ents) + novos
+        return doc
+
+
+@Language.factory(
+    "palavras_chave_atestados",
+    default_config={"label": "TIPO_DOC", "termos": None, "ignorar_espacos": True, "primeira_ocorrencia": True},
+)
+def criar_palavras_chave(nlp, name, label, termos, ignorar_espacos, primeira_ocorrencia):
+    """'termos': lista de termos; None usa o vocabulário de TIPOS_DOCUMENTO."""
+    return PalavrasChave(label, termos, ignorar_espacos, primeira_ocorrencia)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tipos de documento e termos inválidos de nome em um texto")
+    parser.add_argument("texto")
+    args = parser.parse_args()
+
+    for inicio, fim, canonico in tipos_no_texto(args.texto):
+        print(f"TIPO_DOC  {inicio:5d}-{fim:<5d} {args.texto[inicio:fim]!r} -> {canonico}")
+    for inicio, fim, termo, _ in TERMOS_NOME.encontrar(args.texto, palavras_inteiras=True, sobrepostos=True):
+        print(f"TERMO     {inicio:5d}-{fim:<5d} {args.texto[inicio:fim]!r} ({termo})")
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Exportação pós-treino dos modelos NER com pesos em precisão reduzida
+(float16 ou int8) e loader para inferência em CPU.
+
+Formato de saída (um diretório por modelo, ex.: modelo_NER_CID-int8/):
+- config.cfg         -> config do pipeline
+- nlp.bin            -> nlp.to_bytes() com os parâmetros esvaziados
+- pesos.npz          -> parâmetros quantizados (+ escalas por linha no int8)
+- quantizacao.json   -> precisão, tamanhos e índice dos parâmetros
+
+int8: quantização simétrica por linha (escala = max|linha| / 127); vetores
+1D (bias) ficam em float32. As operações de CPU do thinc rodam em float32,
+então o loader desquantiza na carga: só o tamanho em disco (e o I/O de
+carga) diminui; em memória o modelo ocupa o mesmo que o float32. O
+relatório mede a perda de acurácia, a velocidade e o tamanho em disco.
+
+Uso:
+    python quantizar_modelos.py --precisao int8
+    python quantizar_modelos.py --precisao float16 --entidades CID DATA
+"""
+
+import os
+import json
+import argparse
+
+import numpy as np
+import spacy
+from thinc.api import Config
+
+from pacote_modelos import CAMINHOS_MODELOS, CORPORA_DEV, iterar_parametros, registrar_componentes
+from avaliacao import avaliar_docbin
+
+PRECISOES = ("float16", "int8")
+
+
+# -------------------------------
+# Quantização
+# -------------------------------
+def _quantizar(arr, precisao):
+    """Retorna dict de arrays a salvar para um parâmetro."""
+    if arr.dtype.kind != "f":
+        return {"valores": arr}
+    if precisao == "float16" or arr.ndim < 2:
+        return {"valores": arr.astype(np.float16 if precisao == "float16" else np.float32)}
+
+    linhas = arr.reshape(arr.shape[0], -1)
+    escala = np.abs(linhas).max(axis=1) / 127.0
+    escala[escala == 0] = 1.0
+    valores = np.clip(np.rint(linhas / escala[:, None]), -127, 127).astype(np.int8)
+    return {"valores": valores.reshape(arr.shape), "escala": escala.astype(np.float32)}
+
+
+def _desquantizar(valores, escala=None):
+    if escala is None:
+        return valores.astype(np.float32) if valores.dtype.kind == "f" else valores
+    linhas = valores.reshape(valores.shape[0], -1).astype(np.float32) * escala[:, None]
+    return linhas.reshape(valores.shape)
+
+
+def exportar_quantizado(caminho_modelo, destino, precisao="int8"):
+    """Carrega o modelo em 'caminho_modelo' e grava a variante quantizada em 'destino'."""
+    if precisao not in PRECISOES:
+        raise ValueError(f"Precisão inválida: {precisao} (use {PRECISOES})")
+
+    registrar_componentes()
+    nlp = spacy.load(caminho_modelo)
+    arrays = {}
+    indice = []
+    for k, (nome_comp, i, nome_param, no) in enumerate(iterar_parametros(nlp)):
+        arr = np.asarray(no.get_param(nome_param))
+        for sufixo, valor in _quantizar(arr, precisao).items():
+            arrays[f"{k}_{sufixo}"] = valor
+        indice.append({"componente": nome_comp, "no": i, "param": nome_param, "shape": list(arr.shape)})
+        # Esvazia o parâmetro: os pesos vão só no pesos.npz
+        no.set_param(nome_param, np.zeros((0,), dtype=arr.dtype))
+
+    os.makedirs(destino, exist_ok=True)
+    with open(os.path.join(destino, "config.cfg"), "w", encoding="utf-8") as f:
+        f.write(nlp.config.to_str())
+    with open(os.path.join(destino, "nlp.bin"), "wb") as f:
+        f.write(nlp.to_bytes())
+    np.savez(os.path.join(destino, "pesos.npz"), **arrays)
+
+    info = {
+        "origem": caminho_modelo,
+        "precisao": precisao,
+        "tamanho_original": _tamanho_diretorio(caminho_modelo),
+        "tamanho_quantizado": _tamanho_diretorio(destino),
+        "parametros": indice,
+    }
+    with open(os.path.join(destino, "quantizacao.json"), "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2, ensure_ascii=False)
+    return destino
+
+
+def carregar_quantizado(caminho):
+    """
+    Reconstrói o pipeline e aplica os pesos desquantizados (float32, CPU):
+    a memória ocupada é a do modelo original.
+    """
+    with open(os.path.join(caminho, "quantizacao.json"), "r", encoding="utf-8") as f:
+        info = json.load(f)
+    with open(os.path.join(caminho, "config.cfg"), "r", encoding="utf-8") as f:
+        config = Config().from_str(f.read())
+
+    registrar_componentes()
+    nlp = spacy.util.get_lang_class(config["nlp"]["lang"]).from_config(config)
+    with open(os.path.join(caminho, "nlp.bin"), "rb") as f:
+        nlp.from_bytes(f.read())
+
+    parametros = list(iterar_parametros(nlp))
+    if len(parametros) != len(info["parametros"]):
+        raise ValueError(f"Índice de parâmetros não corresponde ao pipeline em {caminho}")
+
+    with np.load(os.path.join(caminho, "pesos.npz"), allow_pickle=False) as pesos:
+        for k, ((_, _, nome_param, no), item) in enumerate(zip(parametros, info["parametros"])):
+            escala = pesos[f"{k}_escala"] if f"{k}_escala" in pesos.files else None
+            valor = _desquantizar(pesos[f"{k}_valores"], escala)
+            no.set_param(nome_param, valor.reshape(item["shape"]))
+    return nlp
+
+
+def _tamanho_diretorio(caminho):
+    total = 0
+    for raiz, _, arquivos in os.walk(caminho):
+        total += sum(os.path.getsize(os.path.join(raiz, a)) for a in arquivos)
+    return total
+
+
+# -------------------------------
+# Relatório
+# -------------------------------
+def comparar(entidade, caminho_original, caminho_quantizado):
+    """Avalia original vs quantizado no corpus de validação da entidade."""
+    caminho_dev = CORPORA_DEV[entidade]
+    registrar_componentes()
+    original = avaliar_docbin(spacy.load(caminho_original), caminho_dev)
+    quantizado = avaliar_docbin(carregar_quantizado(caminho_quantizado), caminho_dev)
+    return {
+        "entidade": entidade,
+        "f1_original": original["f1"],
+        "f1_quantizado": quantizado["f1"],
+        "docs_s_original": original["docs_s"],
+        "docs_s_quantizado": quantizado["docs_s"],
+        "mb_disco_original": _tamanho_diretorio(caminho_original) / 1e6,
+        "mb_disco_quantizado": _tamanho_diretorio(caminho_quantizado) / 1e6,
+    }
+
+
+def imprimir_relatorio(linhas, precisao):
+    print("\n" + "=" * 101)
+    print(f"Comparação float32 x {precisao}")
+    print("=" * 101)
+    print(f"{'entidade':<18} | {'F1 orig':>7} | {'F1 quant':>8} | {'docs/s orig':>11} | "
+          f"{'docs/s quant':>12} | {'MB disco orig':>13} | {'MB disco quant':>14}")
+    print("-" * 101)
+    for l in linhas:
+        print(f"{l['entidade']:<18} | {l['f1_original']:7.4f} | {l['f1_quantizado']:8.4f} | "
+              f"{l['docs_s_original']:11.1f} | {l['docs_s_quantizado']:12.1f} | "
+              f"{l['mb_disco_original']:13.1f} | {l['mb_disco_quantizado']:14.1f}")
+    print("=" * 101)
+    print("Só o tamanho em disco diminui: na carga os pesos voltam a float32 (mesma memória do original).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta variantes quantizadas dos modelos NER (menores em disco; carregadas em float32)")
+    parser.add_argument("--precisao", choices=PRECISOES, default="int8")
+    parser.add_argument("--entidades", nargs="*", default=list(CAMINHOS_MODELOS))
+    parser.add_argument("--sem-relatorio", action="store_true")
+    args = parser.parse_args()
+
+    linhas = []
+    for entidade in args.entidades:
+        origem = CAMINHOS_MODELOS[entidade]
+        destino = f"{origem.split('/')[0]}-{args.precisao}"
+        exportar_quantizado(origem, destino, args.precisao)
+        print(f"✅ {entidade}: {destino}")
+
+        if not args.sem_relatorio and os.path.exists(CORPORA_DEV[entidade]):
+            linhas.append(comparar(entidade, origem, destino))
+
+    if linhas:
+        imprimir_relatorio(linhas, args.precisao)
+        with open(f"relatorio_quantizacao_{args.precisao}.json", "w", encoding="utf-8") as f:
+            json.dump(linhas, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Logging dos scripts e da extração (substitui os prints de depuração).
+
+- níveis pelo logging padrão; NIVEL_LOG=DEBUG|INFO|WARNING (padrão INFO)
+- formatação preguiçosa: log.debug("... %s", x) não formata nada quando o
+  nível está desligado; Preguicoso(func) adia até cálculos caros (ex.: JSON)
+- amostragem: depois das primeiras AMOSTRAGEM_INICIAL mensagens de um mesmo
+  modelo (ex.: "Item %s inválido: %s"), só 1 a cada AMOSTRAGEM_LOG passa;
+  ERROR e acima nunca são amostrados
+- FORMATO_LOG=json grava uma linha JSON por registro (campos do extra=
+  incluídos), para ingestão estruturada
+
+Uso:
+    from registro_log import obter_logger
+    log = obter_logger(__name__)
+    log.debug("Modelo NOME_PACIENTE encontrou: %r", texto_ent)
+"""
+
+import os
+import sys
+import json
+import logging
+from collections import Counter
+
+RAIZ = "atestados"
+AMOSTRAGEM_INICIAL = 10
+
+# Atributos padrão de um LogRecord (o resto veio do extra=)
+_ATRIBUTOS_PADRAO = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_configurado = False
+
+
+class Preguicoso:
+    """Adia um cálculo até o registro ser realmente formatado."""
+
+    __slots__ = ("funcao",)
+
+    def __init__(self, funcao):
+        self.funcao = funcao
+
+    def __str__(self):
+        return str(self.funcao())
+
+
+class FiltroAmostragem(logging.Filter):
+    """Deixa passar as primeiras 'inicial' mensagens de cada modelo e depois 1 a cada 'taxa'."""
+
+    def __init__(self, taxa=1, inicial=AMOSTRAGEM_INICIAL):
+        super().__init__()
+        self.taxa = max(1, int(taxa))
+        self.inicial = inicial
+        self.contagem = Counter()
+
+    def filter(self, record):
+        if self.taxa == 1 or record.levelno >= logging.ERROR:
+            return True
+        chave = (record.name, record.msg)
+        self.contagem[chave] += 1
+        n = self.contagem[chave]
+        if n <= self.inicial or (n - self.inicial) % self.taxa == 0:
+            if n > self.inicial:
+                record.amostragem = f"1/{self.taxa} (total {n})"
+            return True
+        return False
+
+
+class FormatadorJson(logging.Formatter):
+    def format(self, record):
+        registro = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        registro.update({k: v for k, v in vars(record).items() if k not in _ATRIBUTOS_PADRAO})
+        if record.exc_info:
+            registro["exc"] = self.formatException(record.exc_info)
+        return json.dumps(registro, ensure_ascii=False, default=str)
+
+
+def configurar_logs(nivel=None, formato=None, amostragem=None, destino=None):
+    """Configura o logger raiz "atestados" (uma vez; chamar de novo reconfigura)."""
+    global _configurado
+    raiz = logging.getLogger(RAIZ)
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+
+    handler = logging.StreamHandler(destino or sys.stderr)
+    if (formato or os.environ.get("FORMATO_LOG", "texto")) == "json":
+        handler.setFormatter(FormatadorJson())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s", "%H:%M:%S"))
+    handler.addFilter(FiltroAmostragem(amostragem or os.environ.get("AMOSTRAGEM_LOG", 1)))
+
+    raiz.addHandler(handler)
+    nivel = nivel or os.environ.get("NIVEL_LOG", "INFO")
+    raiz.setLevel(nivel.upper() if isinstance(nivel, str) else nivel)
+    raiz.propagate = False
+    _configurado = True
+    return raiz
+
+
+def obter_logger(nome):
+    """Logger filho de "atestados" (configura com as variáveis de ambiente no primeiro uso)."""
+    if not _configurado:
+        configurar_logs()
+    nome = nome if nome != "__main__" else os.path.splitext(os.path.basename(sys.argv[0] or "main"))[0]
+    return logging.getLogger(f"{RAIZ}.{nome}")
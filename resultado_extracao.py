@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Resultado compacto da extração de entidades.
+
+Em vez de um dict com oito listas de strings (e uma cópia do texto), cada
+ResultadoExtracao guarda:
+- uma referência ao TextoNormalizado do documento (o texto original e o
+  normalizado que os modelos viram);
+- os spans de saída como array de inteiros (inicio, fim, id do label),
+  offsets no texto normalizado;
+- só para valores que não são um trecho do texto, uma lista à parte;
+- opcionalmente (extração com confianca=True), a probabilidade no beam do
+  span do modelo de onde veio cada span de saída, em um array paralelo.
+
+As strings só são criadas quando 'entidades' é lido, e para_json() devolve
+o mesmo formato JSON de antes ({"id", "texto", "entidades", "valores"}),
+mais "confianca" e "revisao" quando há probabilidades.
+"""
+
+from array import array
+
+from valores_entidades import valores_entidades, valores_json
+
+# Ordem = id do label nos spans
+ENTIDADES = (
+    "NOME_PACIENTE", "CID", "DATA", "TIPO_DOC",
+    "TEMPO_AFASTAMENTO", "CRM",
+    "HORARIO_INICIO_ATENDIMENTO", "HORARIO_FIM_ATENDIMENTO",
+)
+ID_ENTIDADE = {entidade: i for i, entidade in enumerate(ENTIDADES)}
+
+# Confiança mínima para aceitar uma entidade sem revisão (por entidade em 'limiares')
+LIMIAR_REVISAO = 0.8
+SEM_CONFIANCA = -1.0
+
+
+def _localizar(texto, valor, candidatos):
+    """(offset, span) de 'valor' dentro de um dos spans candidatos, ou (offset no texto todo, None)."""
+    for span in candidatos:
+        pos = texto.find(valor, span.start_char, span.end_char)
+        if pos != -1:
+            return pos, span
+    return texto.find(valor), None
+
+
+class ResultadoExtracao:
+    __slots__ = ("id", "_texto", "_spans", "_extras", "_confiancas")
+
+    def __init__(self, id, texto, spans, extras=None, confiancas=None):
+        self.id = id
+        self._texto = texto            # TextoNormalizado
+        self._spans = spans            # array("l"): inicio, fim, id do label, ...
+        self._extras = extras          # [(id do label, string)] ou None
+        self._confiancas = confiancas  # array("d"), uma por span (SEM_CONFIANCA se desconhecida), ou None
+
+    @classmethod
+    def de_entidades(cls, id, texto, entidades, spans_modelos, confiancas=None):
+        """
+        Monta o resultado a partir do dict de strings pós-processadas e dos
+        spans (offsets no texto normalizado) que os modelos devolveram.
+        'confiancas': {(start_char, end_char, label): probabilidade} dos spans
+        dos modelos (ver confianca_ner.py); cada span de saída herda a do
+        span do modelo em que foi encontrado.
+        """
+        candidatos = [span for spans in spans_modelos.values() for span in spans]
+        fonte = texto.texto
+        offsets = array("l")
+        probs = array("d") if confiancas is not None else None
+        extras = []
+        for entidade in ENTIDADES:
+            rotulo = ID_ENTIDADE[entidade]
+            for valor in entidades.get(entidade, ()):
+                pos, span = _localizar(fonte, valor, candidatos)
+                if pos == -1:
+                    extras.append((rotulo, valor))
+                    continue
+                offsets.extend((pos, pos + len(valor), rotulo))
+                if probs is not None:
+                    chave = (span.start_char, span.end_char, span.label_) if span else None
+                    probs.append(confiancas.get(chave, 0.0) if chave else SEM_CONFIANCA)
+        return cls(id, texto, offsets, extras or None, probs)
+
+    @property
+    def texto(self):
+        return self._texto.original
+
+    def spans(self):
+        """[(inicio, fim, label)] no texto normalizado."""
+        s = self._spans
+        return [(s[i], s[i + 1], ENTIDADES[s[i + 2]]) for i in range(0, len(s), 3)]
+
+    def spans_originais(self):
+        """[(inicio, fim, label)] no texto original."""
+        return [(*self._texto.para_original(inicio, fim), label) for inicio, fim, label in self.spans()]
+
+    @property
+    def entidades(self):
+        """Dict {entidade: [strings]} no formato de ENTIDADES_ESPERADAS (criado a cada leitura)."""
+        fonte = self._texto.texto
+        entidades = {entidade: [] for entidade in ENTIDADES}
+        for inicio, fim, label in self.spans():
+            entidades[label].append(fonte[inicio:fim])
+        for rotulo, valor in self._extras or ():
+            entidades[ENTIDADES[rotulo]].append(valor)
+        return entidades
+
+    @property
+    def valores(self):
+        return valores_entidades(self.entidades)
+
+    @property
+    def tem_confianca(self):
+        return self._confiancas is not None
+
+    @property
+    def confianca(self):
+        """Dict {entidade: [probabilidade ou None]} na mesma ordem de 'entidades' (None sem confiança calculada)."""
+        if self._confiancas is None:
+            return None
+        confianca = {entidade: [] for entidade in ENTIDADES}
+        for (_, _, label), p in zip(self.spans(), self._confiancas):
+            confianca[label].append(None if p == SEM_CONFIANCA else round(p, 4))
+        for rotulo, _ in self._extras or ():
+            confianca[ENTIDADES[rotulo]].append(None)
+        return confianca
+
+    def abaixo_do_limiar(self, limiares=None):
+        """
+        [(entidade, string, probabilidade)] com confiança menor que o limiar
+        da entidade ('limiares' {entidade: mínimo}; padrão LIMIAR_REVISAO).
+        Valores sem confiança conhecida não entram.
+        """
+        if self._confiancas is None:
+            return []
+        limiares = limiares or {}
+        fonte = self._texto.texto
+        return [
+            (label, fonte[inicio:fim], round(p, 4))
+            for (inicio, fim, label), p in zip(self.spans(), self._confiancas)
+            if p != SEM_CONFIANCA and p < limiares.get(label, LIMIAR_REVISAO)
+        ]
+
+    def precisa_revisao(self, limiares=None):
+        return bool(self.abaixo_do_limiar(limiares))
+
+    def para_json(self, incluir_texto=True, limiares=None):
+        entidades = self.entidades
+        resultado = {"id": self.id}
+        if incluir_texto:
+            resultado["texto"] = self.texto
+        resultado["entidades"] = entidades
+        resultado["valores"] = valores_json(valores_entidades(entidades))
+        if self._confiancas is not None:
+            resultado["confianca"] = self.confianca
+            resultado["revisao"] = [
+                {"entidade": label, "valor": valor, "confianca": p}
+                for label, valor, p in self.abaixo_do_limiar(limiares)
+            ]
+        return resultado
+
+    def __repr__(self):
+        return f"ResultadoExtracao(id={self.id!r}, spans={len(self._spans) // 3})"
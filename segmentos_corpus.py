@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""
+Corpus de treino em segmentos DocBin imutáveis, só com acréscimos.
+
+Layout:
+    <raiz>/manifesto.json          -> lista ordenada de segmentos
+    <raiz>/seg-000001.spacy        -> DocBin (nunca alterado depois de gravado)
+    <raiz>/seg-000001.hashes       -> hash do texto de cada doc, um por linha
+
+Um lote novo de atestados rotulados vira um segmento novo, só com os textos
+que ainda não estão no corpus (hash blake2b do texto): não é preciso
+reconverter o ner_treino_split.json nem os sintéticos. compactar() junta
+segmentos pequenos em um só (também pode rodar em uma thread); segmentos e
+manifesto são gravados em arquivo temporário + os.replace, então um leitor
+sempre vê um manifesto completo. Os segmentos juntados ficam em
+"descartados" no manifesto e só são apagados na compactação seguinte: um
+leitor que ainda percorre o manifesto antigo (docs() é preguiçoso) continua
+achando os arquivos.
+
+No treino, o reader "atestados.CorpusSegmentado.v1" lê todos os segmentos:
+    [corpora.train]
+    @readers = "atestados.CorpusSegmentado.v1"
+    path = "corpus_segmentado/train"
+
+Uso:
+    python segmentos_corpus.py adicionar corpus_segmentado/train ner_treino_split.json
+    python segmentos_corpus.py adicionar corpus_segmentado/train novos_rotulados.jsonl
+    python segmentos_corpus.py compactar corpus_segmentado/train --min-docs 500
+    python segmentos_corpus.py info corpus_segmentado/train
+"""
+
+import os
+import json
+import time
+import fcntl
+import hashlib
+import argparse
+import threading
+
+import spacy
+from spacy.tokens import DocBin
+from spacy.training import Example
+from spacy.util import filter_spans, registry
+
+from indice_anotacoes import ler_anotacoes
+
+MANIFESTO = "manifesto.json"
+TRAVA = ".trava"
+PREFIXO = "seg-"
+
+
+def hash_texto(texto):
+    return hashlib.blake2b(texto.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _gravar_atomico(caminho, dados):
+    temporario = caminho + ".tmp"
+    with open(temporario, "wb") as f:
+        f.write(dados)
+    os.replace(temporario, caminho)
+
+
+class _Trava:
+    """
+    Trava entre processos (acréscimos x compactação) com fcntl.flock no
+    arquivo .trava. O sistema solta a trava quando o processo termina, então
+    um processo que caiu não deixa o corpus travado.
+    """
+
+    def __init__(self, raiz, espera=60.0):
+        self.caminho = os.path.join(raiz, TRAVA)
+        self.espera = espera
+        self._fd = None
+
+    def __enter__(self):
+        self._fd = os.open(self.caminho, os.O_CREAT | os.O_WRONLY)
+        limite = time.monotonic() + self.espera
+        while True:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return self
+            except BlockingIOError:
+                if time.monotonic() > limite:
+                    os.close(self._fd)
+                    raise TimeoutError(f"Corpus travado por outro processo: {self.caminho}")
+                time.sleep(0.05)
+
+    def __exit__(self, *exc):
+        # O arquivo fica: apagá-lo deixaria outro processo travando um inode já sem nome
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+
+
+class CorpusSegmentado:
+    def __init__(self, raiz):
+        self.raiz = raiz
+        os.makedirs(raiz, exist_ok=True)
+        self._lock = threading.Lock()
+
+    # -------------------------------
+    # Manifesto
+    # -------------------------------
+    def manifesto(self):
+        caminho = os.path.join(self.raiz, MANIFESTO)
+        if not os.path.exists(caminho):
+            return {"proximo": 1, "segmentos": []}
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _salvar_manifesto(self, manifesto):
+        dados = json.dumps(manifesto, indent=2, ensure_ascii=False).encode("utf-8")
+        _gravar_atomico(os.path.join(self.raiz, MANIFESTO), dados)
+
+    def _caminho(self, nome, extensao):
+        return os.path.join(self.raiz, nome + extensao)
+
+    def hashes(self, manifesto=None):
+        """Hashes dos textos já presentes em todos os segmentos."""
+        vistos = set()
+        for seg in (manifesto or self.manifesto())["segmentos"]:
+            with open(self._caminho(seg["nome"], ".hashes"), "r", encoding="utf-8") as f:
+                vistos.update(linha.strip() for linha in f)
+        return vistos
+
+    def _gravar_segmento(self, manifesto, doc_bin, hashes, origem):
+        nome = f"{PREFIXO}{manifesto['proximo']:06d}"
+        _gravar_atomico(self._caminho(nome, ".spacy"), doc_bin.to_bytes())
+        _gravar_atomico(self._caminho(nome, ".hashes"), "".join(h + "\n" for h in hashes).encode("utf-8"))
+        manifesto["proximo"] += 1
+        return {"nome": nome, "docs": len(hashes), "origem": origem, "criado": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+    # -------------------------------
+    # Acréscimo
+    # -------------------------------
+    def adicionar(self, docs, origem=""):
+        """
+        Grava um segmento novo com os docs cujo texto ainda não está no corpus
+        (nem repetido no próprio lote). Retorna o nome do segmento ou None.
+        """
+        with self._lock, _Trava(self.raiz):
+            manifesto = self.manifesto()
+            vistos = self.hashes(manifesto)
+            novos, hashes = [], []
+            for doc in docs:
+                h = hash_texto(doc.text)
+                if h in vistos:
+                    continue
+                vistos.add(h)
+                novos.append(doc)
+                hashes.append(h)
+            if not novos:
+                return None
+            segmento = self._gravar_segmento(manifesto, DocBin(docs=novos), hashes, origem)
+            manifesto["segmentos"].append(segmento)
+            self._salvar_manifesto(manifesto)
+            return segmento["nome"]
+
+    def adicionar_arquivo(self, caminho, nlp=None, labels=None):
+        """Acrescenta um .json/.jsonl no formato [texto, {"entities": [...]}] (só 'labels', se informado)."""
+        nlp = nlp or spacy.blank("pt")
+        docs = []
+        for texto, entities in ler_anotacoes(caminho):
+            doc = nlp.make_doc(texto)
+            spans = [
+                doc.char_span(ini, fim, label=label)
+                for ini, fim, label, *_ in entities
+                if labels is None or label in labels
+            ]
+            doc.ents = filter_spans([s for s in spans if s is not None])
+            docs.append(doc)
+        return self.adicionar(docs, origem=os.path.basename(caminho))
+
+    # -------------------------------
+    # Leitura
+    # -------------------------------
+    def docs(self, vocab):
+        """Docs de todos os segmentos do manifesto lido agora (um segmento por vez em memória)."""
+        for seg in self.manifesto()["segmentos"]:
+            yield from DocBin().from_disk(self._caminho(seg["nome"], ".spacy")).get_docs(vocab)
+
+    def docbin(self):
+        """Todos os segmentos em um DocBin (para treinar(..., corpus_treino=...))."""
+        doc_bin = DocBin()
+        for seg in self.manifesto()["segmentos"]:
+            doc_bin.merge(DocBin().from_disk(self._caminho(seg["nome"], ".spacy")))
+        return doc_bin
+
+    # -------------------------------
+    # Compactação
+    # -------------------------------
+    def compactar(self, min_docs=500):
+        """
+        Junta cada sequência de segmentos com menos de 'min_docs' docs em um
+        segmento só (a ordem dos docs é mantida). Retorna quantos segmentos foram juntados.
+
+        Os segmentos juntados não são apagados agora (um leitor do manifesto
+        anterior pode ainda precisar deles): vão para "descartados" e são
+        apagados na próxima compactação.
+        """
+        with self._lock, _Trava(self.raiz):
+            manifesto = self.manifesto()
+            self._apagar_descartados(manifesto)
+            novos_segmentos, grupo, removidos = [], [], []
+
+            def fechar_grupo():
+                if len(grupo) < 2:
+                    novos_segmentos.extend(grupo)
+                else:
+                    doc_bin, hashes = DocBin(), []
+                    for seg in grupo:
+                        doc_bin.merge(DocBin().from_disk(self._caminho(seg["nome"], ".spacy")))
+                        with open(self._caminho(seg["nome"], ".hashes"), "r", encoding="utf-8") as f:
+                            hashes.extend(linha.strip() for linha in f)
+                    origem = "+".join(seg["nome"] for seg in grupo)
+                    novos_segmentos.append(self._gravar_segmento(manifesto, doc_bin, hashes, origem))
+                    removidos.extend(grupo)
+                grupo.clear()
+
+            for seg in manifesto["segmentos"]:
+                if seg["docs"] < min_docs:
+                    grupo.append(seg)
+                    if sum(s["docs"] for s in grupo) >= min_docs:
+                        fechar_grupo()
+                else:
+                    fechar_grupo()
+                    novos_segmentos.append(seg)
+            fechar_grupo()
+
+            if removidos:
+                manifesto["segmentos"] = novos_segmentos
+                manifesto["descartados"] = [seg["nome"] for seg in removidos]
+            self._salvar_manifesto(manifesto)
+            return len(removidos)
+
+    def _apagar_descartados(self, manifesto):
+        """Apaga os segmentos juntados na compactação anterior e os tira do manifesto."""
+        for nome in manifesto.pop("descartados", []):
+            for extensao in (".spacy", ".hashes"):
+                try:
+                    os.remove(self._caminho(nome, extensao))
+                except FileNotFoundError:
+                    pass
+
+    def compactar_em_segundo_plano(self, min_docs=500):
+        thread = threading.Thread(target=self.compactar, args=(min_docs,), daemon=False)
+        thread.start()
+        return thread
+
+
+@registry.readers("atestados.CorpusSegmentado.v1")
+def corpus_segmentado(path: str):
+    """Reader de corpus sobre todos os segmentos listados no manifesto."""
+    def corpus(nlp):
+        for referencia in CorpusSegmentado(path).docs(nlp.vocab):
+            yield Example(nlp.make_doc(referencia.text), referencia)
+    return corpus
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Corpus em segmentos DocBin com manifesto")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_adicionar = sub.add_parser("adicionar", help="acrescenta um .json/.jsonl rotulado como segmento novo")
+    p_adicionar.add_argument("raiz")
+    p_adicionar.add_argument("arquivos", nargs="+")
+    p_adicionar.add_argument("--labels", nargs="*", help="mantém só estes labels")
+
+    p_compactar = sub.add_parser("compactar", help="junta segmentos pequenos")
+    p_compactar.add_argument("raiz")
+    p_compactar.add_argument("--min-docs", type=int, default=500)
+
+    p_info = sub.add_parser("info", help="lista os segmentos")
+    p_info.add_argument("raiz")
+    args = parser.parse_args()
+
+    corpus = CorpusSegmentado(args.raiz)
+    if args.comando == "adicionar":
+        nlp = spacy.blank("pt")
+        for caminho in args.arquivos:
+            nome = corpus.adicionar_arquivo(caminho, nlp, set(args.labels) if args.labels else None)
+            print(f"{caminho}: {nome or 'nenhum texto novo'}")
+    elif args.comando == "compactar":
+        print(f"{corpus.compactar(args.min_docs)} segmentos compactados")
+
+    manifesto = corpus.manifesto()
+    for seg in manifesto["segmentos"]:
+        print(f"{seg['nome']} | {seg['docs']:6d} docs | {seg['criado']} | {seg['origem']}")
+    print(f"Total: {sum(s['docs'] for s in manifesto['segmentos'])} docs em {len(manifesto['segmentos'])} segmentos")
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Serialização dos resultados da extração.
+
+- JSON compacto (sem indentação) por padrão; indentado só com pretty=True
+  (modo de depuração)
+- backend JSON mais rápido quando instalado: orjson > msgspec > json da stdlib
+- MessagePack binário para respostas de serviço (msgspec ou msgpack)
+- JSON Lines (um resultado por linha) para exportar lotes grandes
+
+Formato de arquivo pela extensão em salvar(): .json, .jsonl, .msgpack.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+BACKEND_JSON = "orjson" if orjson else "msgspec" if msgspec else "json"
+
+FORMATOS = {".json": "json", ".jsonl": "jsonl", ".msgpack": "msgpack"}
+
+
+def para_json(obj, pretty=False):
+    """Serializa em JSON (bytes UTF-8): compacto, ou indentado com 'pretty'."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if msgspec is not None:
+        dados = msgspec.json.encode(obj)
+        return msgspec.json.format(dados, indent=2) if pretty else dados
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def para_jsonl(objs):
+    """Um JSON compacto por linha."""
+    return b"".join(para_json(obj) + b"\n" for obj in objs)
+
+
+def para_msgpack(obj):
+    """Serializa em MessagePack (requer msgspec ou msgpack)."""
+    if msgspec is not None:
+        return msgspec.msgpack.encode(obj)
+    if msgpack is not None:
+        return msgpack.packb(obj, use_bin_type=True)
+    raise ImportError("MessagePack requer 'msgspec' ou 'msgpack' instalado")
+
+
+def de_msgpack(dados):
+    if msgspec is not None:
+        return msgspec.msgpack.decode(dados)
+    if msgpack is not None:
+        return msgpack.unpackb(dados, raw=False)
+    raise ImportError("MessagePack requer 'msgspec' ou 'msgpack' instalado")
+
+
+def serializar(obj, formato="json", pretty=False):
+    """bytes de 'obj' no formato pedido (json, jsonl ou msgpack)."""
+    if formato == "json":
+        return para_json(obj, pretty)
+    if formato == "jsonl":
+        return para_jsonl(obj)
+    if formato == "msgpack":
+        return para_msgpack(obj)
+    raise ValueError(f"Formato desconhecido: {formato} (use json, jsonl ou msgpack)")
+
+
+def formato_do_arquivo(caminho):
+    for extensao, formato in FORMATOS.items():
+        if caminho.endswith(extensao):
+            return formato
+    raise ValueError(f"Extensão não suportada: {caminho} (use {', '.join(FORMATOS)})")
+
+
+def salvar(obj, caminho, formato=None, pretty=False):
+    """Grava 'obj' em 'caminho'; formato pela extensão se não informado."""
+    with open(caminho, "wb") as f:
+        f.write(serializar(obj, formato or formato_do_arquivo(caminho), pretty))
+    return caminho
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Modo pré-fork: o processo pai carrega os modelos uma única vez, congela o
+heap (gc.freeze) e faz fork dos workers, que compartilham a memória dos
+modelos por copy-on-write em vez de cada um fazer seu próprio spacy.load.
+
+Os buffers de pesos (arrays NumPy) não são tocados pela contagem de
+referências, então continuam compartilhados enquanto os workers só fazem
+inferência. O gc.freeze evita que o coletor cíclico percorra (e suje) as
+páginas dos objetos já carregados pelo pai.
+
+Uso:
+    python servidor_prefork.py textos.jsonl --workers 4 --saida resultados.json
+
+Entrada: .jsonl com {"texto": ...} por linha, ou .txt com um documento por linha.
+Relatório: memória única (Private) vs compartilhada (Shared) por worker,
+lida de /proc/<pid>/smaps_rollup (Linux).
+"""
+
+import os
+import gc
+import json
+import argparse
+import multiprocessing as mp
+
+from app_OCR import carregar_modelos, extrair_entidades_multimodelo, extrair_resultados
+from pacote_modelos import CAMINHO_PACOTE
+from serializacao import salvar
+
+# Modelos herdados pelos workers via fork (preenchido no processo pai)
+_MODELOS = None
+
+TEXTO_AQUECIMENTO = (
+    "ATESTADO Atesto para os devidos fins que MARIA SILVA compareceu no dia 05/04/2023 "
+    "das 11h30 às 12:00. CID M54.5. Afastamento de 3 dias. CRM-PE 123456."
+)
+
+
+# -------------------------------
+# Memória por processo
+# -------------------------------
+def memoria_processo(pid=None):
+    """
+    Lê /proc/<pid>/smaps_rollup e retorna kB de memória única e compartilhada.
+    Retorna {} se o sistema não expõe smaps_rollup.
+    """
+    caminho = f"/proc/{pid or os.getpid()}/smaps_rollup"
+    if not os.path.exists(caminho):
+        return {}
+
+    campos = {}
+    with open(caminho, "r", encoding="utf-8") as f:
+        for linha in f:
+            partes = linha.split()
+            if len(partes) >= 2 and partes[0].endswith(":") and partes[1].isdigit():
+                campos[partes[0][:-1]] = int(partes[1])
+
+    return {
+        "rss_kb": campos.get("Rss", 0),
+        "pss_kb": campos.get("Pss", 0),
+        "unica_kb": campos.get("Private_Clean", 0) + campos.get("Private_Dirty", 0),
+        "compartilhada_kb": campos.get("Shared_Clean", 0) + campos.get("Shared_Dirty", 0),
+    }
+
+
+# -------------------------------
+# Pai e workers
+# -------------------------------
+def preparar_pai(caminho_pacote=CAMINHO_PACOTE):
+    """Carrega os modelos no pai, aquece cada pipeline e congela o heap."""
+    global _MODELOS
+    _MODELOS = carregar_modelos(caminho_pacote)
+
+    # Uma passada de aquecimento aloca caches/lazy-init antes do fork
+    extrair_entidades_multimodelo(TEXTO_AQUECIMENTO, _MODELOS)
+
+    gc.collect()
+    gc.freeze()
+    return _MODELOS
+
+
+def _processar_lote(lote):
+    """Executado no worker: usa os modelos herdados do pai."""
+    ids, textos = zip(*lote)
+    resultados = [r.para_json() for r in extrair_resultados(list(textos), _MODELOS, ids=ids)]
+    return os.getpid(), resultados, memoria_processo()
+
+
+def servir(textos, n_workers=2, caminho_pacote=CAMINHO_PACOTE, tamanho_lote=32):
+    """
+    Processa 'textos' em n_workers processos filhos que compartilham os modelos.
+    Retorna (resultados, relatorio) onde relatorio = {pid: memória do worker}.
+    """
+    if _MODELOS is None:
+        preparar_pai(caminho_pacote)
+
+    # Ordenados por tamanho: cada lote enviado a um worker tem textos parecidos
+    itens = sorted(enumerate(textos, start=1), key=lambda item: len(item[1]))
+    lotes = [itens[i:i + tamanho_lote] for i in range(0, len(itens), tamanho_lote)]
+
+    resultados = []
+    relatorio = {"pai": memoria_processo()}
+    contexto = mp.get_context("fork")
+    with contexto.Pool(processes=n_workers) as pool:
+        for pid, parciais, memoria in pool.imap_unordered(_processar_lote, lotes):
+            resultados.extend(parciais)
+            relatorio[pid] = memoria  # fica a medição mais recente de cada worker
+
+    resultados.sort(key=lambda r: r["id"])
+    return resultados, relatorio
+
+
+def imprimir_relatorio(relatorio):
+    print("\n" + "=" * 60)
+    print(f"{'processo':>10} | {'RSS (MB)':>9} | {'única (MB)':>10} | {'compart. (MB)':>13}")
+    print("-" * 60)
+    for pid, mem in relatorio.items():
+        if not mem:
+            print(f"{pid!s:>10} | smaps_rollup indisponível")
+            continue
+        print(f"{pid!s:>10} | {mem['rss_kb'] / 1024:9.1f} | {mem['unica_kb'] / 1024:10.1f} | "
+              f"{mem['compartilhada_kb'] / 1024:13.1f}")
+    print("=" * 60)
+
+
+def ler_textos(caminho):
+    with open(caminho, "r", encoding="utf-8") as f:
+        if caminho.endswith(".jsonl"):
+            return [json.loads(linha)["texto"] for linha in f if linha.strip()]
+        return [linha.rstrip("\n") for linha in f if linha.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inferência com workers pré-fork compartilhando os modelos")
+    parser.add_argument("entrada")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--pacote", default=os.environ.get("PACOTE_MODELOS", CAMINHO_PACOTE))
+    parser.add_argument("--saida", default="resultados_entidades.json", help=".json, .jsonl ou .msgpack")
+    parser.add_argument("--debug", action="store_true", help="grava JSON indentado")
+    args = parser.parse_args()
+
+    textos = ler_textos(args.entrada)
+    resultados, relatorio = servir(textos, n_workers=args.workers, caminho_pacote=args.pacote)
+
+    salvar(resultados, args.saida, pretty=args.debug)
+
+    imprimir_relatorio(relatorio)
+    print(f"\n✅ {len(resultados)} documentos processados com {args.workers} workers -> '{args.saida}'")
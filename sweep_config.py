@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Sweep de hiperparâmetros sobre a config de CPU (config_treino.py).
+
+Gera variantes a partir de um espaço de busca, treina em paralelo (um
+processo por variante, 1 thread de BLAS cada, treino.treinar em processo e
+sem checkpoints), mede F1 de validação e latência de inferência (em
+sequência, após os treinos) e calcula a fronteira de Pareto acurácia x
+latência.
+
+Uso:
+    python sweep_config.py --train train_DATA.spacy --dev dev_DATA.spacy --amostras 12
+    python sweep_config.py --train train_DATA.spacy --dev dev_DATA.spacy --espaco espaco.json
+
+Saídas:
+- sweep/<id>/config.cfg e sweep/<id>/model-best
+- sweep/resultados.json (todas as variantes + fronteira de Pareto)
+"""
+
+import os
+import json
+import random
+import argparse
+import itertools
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import spacy
+
+from avaliacao import avaliar_docbin
+from config_treino import salvar_config
+from pacote_modelos import registrar_componentes
+from treino import treinar
+
+# Cada treino usa 1 thread de BLAS; o paralelismo vem do número de processos
+UMA_THREAD = {"OMP_NUM_THREADS": "1", "OPENBLAS_NUM_THREADS": "1", "MKL_NUM_THREADS": "1"}
+
+# Espaço de busca padrão (valores por parâmetro de config_treino.PARAMETROS_PADRAO)
+ESPACO_PADRAO = {
+    "width": [32, 64, 96, 128],
+    "depth": [1, 2, 4],
+    "rows": [[1000, 250, 500, 500], [2000, 500, 1000, 1000], [5000, 1000, 2500, 2500]],
+    "hidden_width": [32, 64],
+    "batch_size": [500, 1000, 2000],
+    "learn_rate": [0.0005, 0.001, 0.002],
+    "max_steps": [5000, 20000],
+}
+
+
+def gerar_variantes(espaco, amostras=None, semente=42):
+    """Produto cartesiano do espaço; se 'amostras', sorteia esse número de combinações."""
+    chaves = sorted(espaco)
+    combinacoes = [dict(zip(chaves, valores)) for valores in itertools.product(*(espaco[c] for c in chaves))]
+    if amostras and amostras < len(combinacoes):
+        combinacoes = random.Random(semente).sample(combinacoes, amostras)
+    return combinacoes
+
+
+def _treinar_variante(indice, parametros, train_path, dev_path, diretorio):
+    """Executado num processo do pool: treina uma variante."""
+    saida = os.path.join(diretorio, f"{indice:03d}")
+    os.makedirs(saida, exist_ok=True)
+    config_path = salvar_config(os.path.join(saida, "config.cfg"), train_path, dev_path, **parametros)
+
+    # Em processo, sem checkpoints: uma variante do sweep não é retomada
+    try:
+        metricas = treinar(config_path, saida, checkpoint_a_cada=0)
+    except Exception:
+        return {"id": indice, "parametros": parametros, "erro": traceback.format_exc()[-2000:]}
+    return {"id": indice, "parametros": parametros, "modelo": metricas["model_best"]}
+
+
+def _avaliar_variante(resultado, dev_path):
+    """Mede F1 e latência (batch de 1 doc) de uma variante já treinada."""
+    registrar_componentes()
+    nlp = spacy.load(resultado["modelo"])
+    metricas = avaliar_docbin(nlp, dev_path, batch_size=1)
+    resultado["f1"] = metricas["f1"]
+    resultado["docs_s"] = metricas["docs_s"]
+    resultado["latencia_ms"] = 1000.0 / max(metricas["docs_s"], 1e-9)
+    return resultado
+
+
+def fronteira_pareto(resultados):
+    """Variantes não dominadas (maior F1, menor latência), ordenadas por latência."""
+    validos = sorted((r for r in resultados if "erro" not in r), key=lambda r: (r["latencia_ms"], -r["f1"]))
+    fronteira = []
+    melhor_f1 = -1.0
+    for r in validos:
+        if r["f1"] > melhor_f1:
+            fronteira.append(r)
+            melhor_f1 = r["f1"]
+    return fronteira
+
+
+def executar_sweep(train_path, dev_path, espaco=None, amostras=None, n_processos=None, diretorio="sweep"):
+    variantes = gerar_variantes(espaco or ESPACO_PADRAO, amostras)
+    print(f"🔎 {len(variantes)} variantes | {n_processos or os.cpu_count()} processos")
+
+    resultados = []
+    # Processos novos ("spawn") herdam UMA_THREAD antes de carregar o BLAS; o ambiente
+    # deste processo volta ao original depois do pool
+    ambiente = {chave: os.environ.get(chave) for chave in UMA_THREAD}
+    os.environ.update(UMA_THREAD)
+    try:
+        with ProcessPoolExecutor(max_workers=n_processos, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futuros = [
+                pool.submit(_treinar_variante, i, parametros, train_path, dev_path, diretorio)
+                for i, parametros in enumerate(variantes)
+            ]
+            for futuro in as_completed(futuros):
+                r = futuro.result()
+                resultados.append(r)
+                print(f"  {'❌' if 'erro' in r else '🏁'} variante {r['id']:03d} {'falhou' if 'erro' in r else 'treinada'}")
+    finally:
+        for chave, valor in ambiente.items():
+            if valor is None:
+                os.environ.pop(chave, None)
+            else:
+                os.environ[chave] = valor
+
+    # Latência medida depois, em sequência, para não competir com os treinos por CPU
+    for r in resultados:
+        if "erro" not in r:
+            _avaliar_variante(r, dev_path)
+            print(f"  ✅ variante {r['id']:03d} | F1={r['f1']:.4f} | {r['latencia_ms']:.2f} ms/doc")
+
+    resultados.sort(key=lambda r: r["id"])
+    return resultados, fronteira_pareto(resultados)
+
+
+def imprimir_fronteira(fronteira):
+    print("\n" + "=" * 90)
+    print("Fronteira de Pareto (F1 x latência)")
+    print("=" * 90)
+    for r in fronteira:
+        p = r["parametros"]
+        print(f"{r['id']:03d} | F1={r['f1']:.4f} | {r['latencia_ms']:6.2f} ms/doc | "
+              f"width={p.get('width')} depth={p.get('depth')} rows={p.get('rows')} "
+              f"hidden={p.get('hidden_width')}")
+    print("=" * 90)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep de hiperparâmetros da config de CPU")
+    parser.add_argument("--train", required=True)
+    parser.add_argument("--dev", required=True)
+    parser.add_argument("--espaco", help="JSON com o espaço de busca (padrão: ESPACO_PADRAO)")
+    parser.add_argument("--amostras", type=int, default=None)
+    parser.add_argument("--processos", type=int, default=None)
+    parser.add_argument("--diretorio", default="sweep")
+    args = parser.parse_args()
+
+    espaco = None
+    if args.espaco:
+        with open(args.espaco, "r", encoding="utf-8") as f:
+            espaco = json.load(f)
+
+    resultados, fronteira = executar_sweep(
+        args.train, args.dev, espaco, args.amostras, args.processos, args.diretorio
+    )
+    imprimir_fronteira(fronteira)
+
+    with open(os.path.join(args.diretorio, "resultados.json"), "w", encoding="utf-8") as f:
+        json.dump({"resultados": resultados, "pareto": [r["id"] for r in fronteira]}, f, indent=2, ensure_ascii=False)
+    print(f"\n✅ Resultados salvos em '{os.path.join(args.diretorio, 'resultados.json')}'")
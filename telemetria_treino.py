@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Telemetria de treino: velocidade e memória por época.
+
+Por época registra palavras/s, exemplos/s, latência do passo (média e p95),
+tempo de avaliação e pico de RSS. Cada época vira uma linha em CSV ou JSONL
+(pela extensão do arquivo) e, no fim, uma tabela-resumo é impressa.
+
+Uso no loop de treino:
+    telemetria = TelemetriaTreino("modelo_NER_CID/telemetria.csv")
+    for ...:
+        with telemetria.passo(palavras, exemplos):
+            nlp.update(...)
+        with telemetria.avaliacao():
+            scores = ...
+        telemetria.fim_epoca(epoca, f1=...)
+    telemetria.imprimir_resumo()
+
+O pico de RSS é o VmHWM de /proc/self/status, zerado a cada época via
+/proc/self/clear_refs (Linux). Sem isso, cai no ru_maxrss do processo, que é
+o pico desde o início (não por época).
+"""
+
+import os
+import csv
+import json
+import time
+import resource
+from contextlib import contextmanager
+
+CAMPOS = [
+    "epoca", "passos", "exemplos", "palavras", "segundos", "palavras_s", "exemplos_s",
+    "passo_ms_medio", "passo_ms_p95", "avaliacao_s", "pico_rss_mb",
+]
+
+
+# -------------------------------
+# Memória
+# -------------------------------
+def pico_rss_mb():
+    """Pico de RSS (MB) desde o último zerar_pico_rss(); ru_maxrss como alternativa."""
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for linha in f:
+                if linha.startswith("VmHWM:"):
+                    return int(linha.split()[1]) / 1024.0
+    except OSError:
+        pass
+    # ru_maxrss: kB no Linux, bytes no macOS
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maximo / (1024.0 * 1024.0) if os.uname().sysname == "Darwin" else maximo / 1024.0
+
+
+def zerar_pico_rss():
+    """Zera o VmHWM do processo (Linux); sem efeito se não for permitido."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100.0 * (len(ordenados) - 1))))]
+
+
+# -------------------------------
+# Logger
+# -------------------------------
+class TelemetriaTreino:
+    """Acumula as medidas da época corrente e grava uma linha por época."""
+
+    def __init__(self, caminho=None, extras=(), continuar=False):
+        self.caminho = caminho
+        self.campos = CAMPOS + [c for c in extras if c not in CAMPOS]
+        self.epocas = []
+        if caminho:
+            os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+            # Arquivo novo a cada treino; na retomada (continuar=True) acrescenta ao existente
+            if not (continuar and os.path.exists(caminho)):
+                with open(caminho, "w", newline="", encoding="utf-8") as f:
+                    if caminho.endswith(".csv"):
+                        csv.DictWriter(f, fieldnames=self.campos).writeheader()
+        self._zerar_epoca()
+
+    def _zerar_epoca(self):
+        self._inicio = time.perf_counter()
+        self._passos_ms = []
+        self._palavras = 0
+        self._exemplos = 0
+        self._avaliacao_s = 0.0
+        zerar_pico_rss()
+
+    @contextmanager
+    def passo(self, palavras, exemplos):
+        inicio = time.perf_counter()
+        yield
+        self._passos_ms.append((time.perf_counter() - inicio) * 1000.0)
+        self._palavras += palavras
+        self._exemplos += exemplos
+
+    @contextmanager
+    def avaliacao(self):
+        inicio = time.perf_counter()
+        yield
+        self._avaliacao_s += time.perf_counter() - inicio
+
+    def fim_epoca(self, epoca, **extras):
+        """Fecha a época: calcula as taxas, grava a linha e começa a próxima."""
+        segundos = time.perf_counter() - self._inicio
+        treino_s = sum(self._passos_ms) / 1000.0
+        linha = {
+            "epoca": epoca,
+            "passos": len(self._passos_ms),
+            "exemplos": self._exemplos,
+            "palavras": self._palavras,
+            "segundos": round(segundos, 3),
+            "palavras_s": round(self._palavras / treino_s, 1) if treino_s else 0.0,
+            "exemplos_s": round(self._exemplos / treino_s, 2) if treino_s else 0.0,
+            "passo_ms_medio": round(treino_s * 1000.0 / len(self._passos_ms), 2) if self._passos_ms else 0.0,
+            "passo_ms_p95": round(_percentil(self._passos_ms, 95), 2),
+            "avaliacao_s": round(self._avaliacao_s, 3),
+            "pico_rss_mb": round(pico_rss_mb(), 1),
+            **extras,
+        }
+        self.epocas.append(linha)
+        if self.caminho:
+            self._gravar(linha)
+        self._zerar_epoca()
+        return linha
+
+    def _gravar(self, linha):
+        if self.caminho.endswith(".csv"):
+            with open(self.caminho, "a", newline="", encoding="utf-8") as f:
+                csv.DictWriter(f, fieldnames=self.campos, extrasaction="ignore").writerow(linha)
+        else:
+            with open(self.caminho, "a", encoding="utf-8") as f:
+                f.write(json.dumps(linha, ensure_ascii=False) + "\n")
+
+    def imprimir_resumo(self):
+        if not self.epocas:
+            return
+        print("\n" + "=" * 96)
+        print(f"{'época':>5} | {'passos':>6} | {'palavras/s':>10} | {'exemplos/s':>10} | "
+              f"{'passo ms':>8} | {'p95 ms':>8} | {'aval. s':>7} | {'pico MB':>8} | {'total s':>8}")
+        print("-" * 96)
+        for l in self.epocas:
+            print(f"{l['epoca']:>5} | {l['passos']:>6} | {l['palavras_s']:>10.1f} | {l['exemplos_s']:>10.2f} | "
+                  f"{l['passo_ms_medio']:>8.2f} | {l['passo_ms_p95']:>8.2f} | {l['avaliacao_s']:>7.2f} | "
+                  f"{l['pico_rss_mb']:>8.1f} | {l['segundos']:>8.1f}")
+        palavras = sum(l["palavras"] for l in self.epocas)
+        treino_s = sum(l["passo_ms_medio"] * l["passos"] for l in self.epocas) / 1000.0
+        print("-" * 96)
+        print(f"total: {len(self.epocas)} épocas | {palavras} palavras | "
+              f"{palavras / treino_s if treino_s else 0.0:.1f} palavras/s | "
+              f"pico {max(l['pico_rss_mb'] for l in self.epocas):.1f} MB")
+        print("=" * 96)
+        if self.caminho:
+            print(f"📈 Telemetria salva em '{self.caminho}'")
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Checkpoints e retomada do treino (checkpoints.py / treino.py) num pipeline
+tok2vec + ner pequeno.
+
+Uso:
+    python -m unittest discover -s tests
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import spacy
+from spacy.tokens import DocBin
+
+import treino
+from checkpoints import carregar_checkpoint, estado_otimizador, listar_checkpoints, salvar_checkpoint
+from config_treino import gerar_config
+from pacote_modelos import iterar_parametros
+
+NOMES = ["Ana", "Bruno", "Carla", "Diego", "Elisa", "Fábio", "Gina", "Hugo"]
+MOLDES = [
+    "Paciente {nome} atendido em {data} no ambulatório.",
+    "Atesto que {nome} esteve em consulta no dia {data}.",
+    "Retorno marcado para {data} com o médico.",
+    "Declaro para os devidos fins que em {data} houve atendimento.",
+]
+CONFIG = gerar_config(
+    "train.spacy", "dev.spacy", width=32, depth=1, rows=[500, 100, 250, 250],
+    hidden_width=32, batch_size=60, max_steps=40,
+)
+OVERRIDES = {"training.eval_frequency": 10}
+
+
+def _corpus(n, semente):
+    rng = random.Random(semente)
+    nlp = spacy.blank("pt")
+    doc_bin = DocBin()
+    for _ in range(n):
+        data = f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/20{rng.randint(10, 25)}"
+        texto = rng.choice(MOLDES).format(nome=rng.choice(NOMES), data=data)
+        doc = nlp.make_doc(texto)
+        inicio = texto.index(data)
+        doc.ents = [doc.char_span(inicio, inicio + len(data), label="DATA")]
+        doc_bin.add(doc)
+    return doc_bin
+
+
+def _pesos(caminho):
+    return [np.array(no.get_param(nome)) for _, _, nome, no in iterar_parametros(spacy.load(caminho))]
+
+
+class Interrompido(Exception):
+    pass
+
+
+class TestCheckpoints(unittest.TestCase):
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio, ignore_errors=True)
+        self.treino, self.dev = _corpus(40, 1), _corpus(12, 2)
+
+    def _treinar(self, nome, **kwargs):
+        saida = os.path.join(self.diretorio, nome)
+        return treino.treinar(CONFIG, saida, self.treino, self.dev, overrides=OVERRIDES, **kwargs)
+
+    def test_salvar_e_carregar(self):
+        nlp = spacy.blank("pt")
+        nlp.add_pipe("ner").add_label("DATA")
+        optimizer = nlp.initialize()
+        with mock.patch.dict(treino._CORPORA, {"x": self.treino}):
+            exemplos = list(treino.docs_em_memoria("x")(nlp))
+        nlp.update(exemplos[:8], sgd=optimizer)
+
+        caminho = salvar_checkpoint(os.path.join(self.diretorio, "ck"), 1, nlp, optimizer, {"epoca": 0})
+        esperado = estado_otimizador(nlp, optimizer)
+
+        nlp2 = spacy.blank("pt")
+        nlp2.add_pipe("ner").add_label("DATA")
+        optimizer2 = nlp2.initialize()
+        estado = carregar_checkpoint(caminho, nlp2, optimizer2)
+
+        self.assertEqual(estado, {"passo": 1, "epoca": 0})
+        obtido = estado_otimizador(nlp2, optimizer2)
+        self.assertEqual(sorted(obtido["mom1"]), sorted(esperado["mom1"]))
+        for chave, valor in esperado["mom1"].items():
+            np.testing.assert_array_equal(obtido["mom1"][chave], valor)
+
+    def test_retomada(self):
+        salvar = treino.salvar_checkpoint
+
+        def interromper(diretorio, passo, *args, **kwargs):
+            caminho = salvar(diretorio, passo, *args, **kwargs)
+            if passo == 20:
+                raise Interrompido()
+            return caminho
+
+        with mock.patch.object(treino, "salvar_checkpoint", side_effect=interromper):
+            with self.assertRaises(Interrompido):
+                self._treinar("retomado", checkpoint_a_cada=10)
+        self.assertEqual(len(listar_checkpoints(os.path.join(self.diretorio, "retomado", "checkpoints"))), 2)
+
+        metricas = self._treinar("retomado", checkpoint_a_cada=10, retomar=True)
+        self.assertEqual(metricas["passos"], 40)
+
+        # Mesmos pesos finais de um treino sem interrupção (interrompido no meio da época 2)
+        continuo = self._treinar("continuo")
+        for retomado, esperado in zip(_pesos(metricas["model_last"]), _pesos(continuo["model_last"])):
+            np.testing.assert_array_equal(retomado, esperado)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+Componente gazetteer_nomes (gazetteer_nomes.py) com um gazetteer pequeno.
+
+Uso:
+    python -m unittest discover -s tests
+"""
+
+import unittest
+
+import spacy
+
+from gazetteer_nomes import Gazetteer, adicionar_gazetteer
+
+TEXTOS = [
+    "Atesto que Maria Aparecida da Silva esteve em consulta.",
+    "Assinado por Dra. Maria Souza.",
+    "Sem nomes aqui.",
+]
+
+
+class TestGazetteerNomes(unittest.TestCase):
+    def setUp(self):
+        self.nlp = spacy.blank("pt")
+        componente = adicionar_gazetteer(self.nlp)
+        componente.from_bytes(Gazetteer.de_listas(["Maria", "Aparecida"], ["Silva", "Souza"]).to_bytes())
+        self.componente = componente
+
+    def _ents(self, doc):
+        return [(ent.text, ent.label_) for ent in doc.ents]
+
+    def test_call(self):
+        self.assertEqual(self._ents(self.nlp(TEXTOS[0])), [("Maria Aparecida da Silva", "NOME_PACIENTE")])
+        self.assertEqual(self._ents(self.nlp(TEXTOS[1])), [])
+
+    def test_pipe_igual_ao_call(self):
+        docs = list(self.componente.pipe(self.nlp.make_doc(t) for t in TEXTOS))
+        self.assertEqual([self._ents(d) for d in docs], [self._ents(self.nlp(t)) for t in TEXTOS])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Empacotar e carregar o pacote único (pacote_modelos.py), com e sem mmap,
+num pipeline ner pequeno.
+
+Uso:
+    python -m unittest discover -s tests
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import spacy
+from spacy.training import Example
+
+from pacote_modelos import carregar_pacote, empacotar_modelos, iterar_parametros
+
+TEXTOS = [
+    ("Atendido em 12/03/2024 no ambulatório.", "12/03/2024"),
+    ("Retorno marcado para 05/11/2023 com o médico.", "05/11/2023"),
+]
+
+
+class TestPacoteModelos(unittest.TestCase):
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio, ignore_errors=True)
+
+        nlp = spacy.blank("pt")
+        nlp.add_pipe("ner")
+        exemplos = []
+        for texto, data in TEXTOS:
+            inicio = texto.index(data)
+            exemplos.append(Example.from_dict(nlp.make_doc(texto), {"entities": [(inicio, inicio + len(data), "DATA")]}))
+        optimizer = nlp.initialize(lambda: exemplos)
+        for _ in range(5):
+            nlp.update(exemplos, sgd=optimizer)
+
+        modelo = os.path.join(self.diretorio, "modelo")
+        nlp.to_disk(modelo)
+        self.pacote = empacotar_modelos({"DATA": modelo}, os.path.join(self.diretorio, "pacote.zip"))
+        self.original = spacy.load(modelo)
+
+    def _conferir(self, modelos):
+        nlp = modelos["DATA"]
+        for (_, _, _, esperado), (_, _, _, obtido) in zip(iterar_parametros(self.original), iterar_parametros(nlp)):
+            for nome in esperado.param_names:
+                np.testing.assert_array_equal(obtido.get_param(nome), esperado.get_param(nome))
+        for texto, _ in TEXTOS:
+            doc = nlp(texto)
+            self.assertEqual([(e.text, e.label_) for e in doc.ents], [(e.text, e.label_) for e in self.original(texto).ents])
+
+    def test_com_mmap(self):
+        with carregar_pacote(self.pacote) as modelos:
+            self._conferir(modelos)
+
+    def test_sem_mmap(self):
+        modelos = carregar_pacote(self.pacote, usar_mmap=False)
+        self.assertTrue(modelos.mm.closed)
+        self._conferir(modelos)
+
+
+if __name__ == "__main__":
+    unittest.main()
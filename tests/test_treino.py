@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+Driver de treino em processo (treino.py).
+
+Uso:
+    python -m unittest discover -s tests
+"""
+
+import shutil
+import tempfile
+import unittest
+
+import treino
+from test_checkpoints import CONFIG, _corpus
+
+
+class TestTreino(unittest.TestCase):
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio, ignore_errors=True)
+
+    def test_avalia_no_primeiro_passo(self):
+        # max_steps < eval_frequency: só a avaliação do passo 1, como no spacy train
+        metricas = treino.treinar(
+            CONFIG, self.diretorio, _corpus(20, 1), _corpus(6, 2),
+            overrides={"training.max_steps": 5, "training.eval_frequency": 200},
+        )
+        self.assertEqual(metricas["passos"], 5)
+        self.assertEqual(metricas["melhor_passo"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
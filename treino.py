@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+"""
+Driver de treino em processo para as configs spaCy dos scripts Treinando_*.
+
+Equivale ao "spacy init config" + "spacy train" (mesma inicialização,
+batcher, avaliação, paciência e layout de saída model-best/model-last), mas
+roda no processo chamador:
+- a config é montada em Python (config_padrao_ner / config_treino.py);
+- os DocBins já criados em memória são usados direto, sem ir ao disco;
+- treinar() devolve as métricas e levanta exceção em caso de falha.
+
+Checkpoints (modelo, otimizador, gradientes e RNG) são gravados a cada N
+passos, junto com a época em curso, o random e a ordem dos exemplos de antes
+do embaralhamento dela e quantos batches dela já foram treinados. Com
+retomar=True a época é embaralhada de novo a partir desse estado, os batches
+já treinados são pulados e o RNG volta ao do passo salvo: os pesos finais
+são os de um treino sem interrupção.
+
+Uso como script (equivalente ao spacy train):
+    python treino.py config.cfg --output modelo_NER_CID --paths.train train_CID.spacy \\
+        --paths.dev dev_CID.spacy --checkpoint-a-cada 500 [--retomar]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import hashlib
+import argparse
+
+from spacy import util
+from spacy.cli.init_config import init_config
+from spacy.errors import Errors
+from spacy.schemas import ConfigSchemaTraining
+from spacy.tokens import DocBin
+from spacy.training import Example
+from spacy.training.initialize import init_nlp
+from spacy.training.loop import create_evaluation_callback, create_before_to_disk_callback
+from spacy.util import registry, resolve_dot_names
+from thinc.api import Config
+
+import lotes_por_tamanho  # registra o batcher "atestados.LotesPorTamanho.v1"
+import segmentos_corpus  # registra o reader "atestados.CorpusSegmentado.v1"
+from checkpoints import salvar_checkpoint, carregar_checkpoint, ultimo_checkpoint, ler_estado, ler_inicio_epoca
+from telemetria_treino import TelemetriaTreino
+
+# DocBins em memória, lidos pelo reader "atestados.DocsEmMemoria.v1"
+_CORPORA = {}
+
+
+@registry.readers("atestados.DocsEmMemoria.v1")
+def docs_em_memoria(chave: str):
+    """Reader de corpus que lê um DocBin registrado em memória (sem disco)."""
+    def corpus(nlp):
+        for referencia in _CORPORA[chave].get_docs(nlp.vocab):
+            yield Example(nlp.make_doc(referencia.text), referencia)
+    return corpus
+
+
+# -------------------------------
+# Config e corpora
+# -------------------------------
+def config_padrao_ner(lang="pt"):
+    """Mesma config do 'spacy init config --lang pt --pipeline ner', sem subprocess."""
+    return init_config(lang=lang, pipeline=["ner"], optimize="efficiency", gpu=False, silent=True)
+
+
+def carregar_config(config):
+    """Aceita Config, texto da config ou caminho de arquivo .cfg."""
+    if isinstance(config, Config):
+        return config
+    if os.path.isfile(str(config)):
+        return util.load_config(config, interpolate=False)
+    return Config().from_str(config, interpolate=False)
+
+
+def preparar_corpus(caminho, gerar, retomar=False):
+    """
+    Retorna o DocBin do corpus. Na retomada reaproveita o .spacy salvo pelo
+    treino interrompido (mesmos dados); senão gera, salva e devolve.
+    """
+    if retomar and os.path.exists(caminho):
+        return DocBin().from_disk(caminho)
+    doc_bin = gerar()
+    doc_bin.to_disk(caminho)
+    return doc_bin
+
+
+def _sha256_arquivo(caminho):
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _assinatura_corpus(config, corpora):
+    """sha256 dos corpora de treino/validação: a retomada exige os mesmos dados."""
+    if corpora:
+        return {nome: hashlib.sha256(db.to_bytes()).hexdigest() for nome, db in corpora.items()}
+    paths = config.get("paths", {})
+    return {
+        nome: _sha256_arquivo(caminho)
+        for nome, caminho in paths.items()
+        if isinstance(caminho, str) and os.path.isfile(caminho)
+    }
+
+
+# -------------------------------
+# Batches retomáveis
+# -------------------------------
+class BatchesRetomaveis:
+    """
+    O create_train_batches do spaCy (embaralha os exemplos a cada época e
+    passa pelo batcher), guardando o que o checkpoint precisa para refazer a
+    época: 'epoca', 'inicio_epoca' (random.getstate() e a ordem dos exemplos
+    antes do embaralhamento, que é cumulativo entre épocas) e 'posicao'
+    (batches da época já entregues). Os batches de cada época são montados de
+    uma vez, logo depois do embaralhamento: assim o random usado pelo batcher
+    (LotesPorTamanho) não se mistura com o do nlp.update.
+    """
+
+    def __init__(self, nlp, corpus, batcher, max_epochs):
+        self.nlp, self.corpus, self.batcher, self.max_epochs = nlp, corpus, batcher, max_epochs
+        self.exemplos = self.ordem = None
+        if max_epochs >= 0:
+            self.exemplos = list(corpus(nlp))
+            if not self.exemplos:
+                raise ValueError(Errors.E986)
+            self.ordem = list(range(len(self.exemplos)))
+        self.epoca, self.posicao, self.inicio_epoca = 0, 0, None
+        self._lotes = None
+
+    def _abrir_epoca(self):
+        self.inicio_epoca = {"random": random.getstate(), "ordem": None if self.ordem is None else list(self.ordem)}
+        if self.ordem is not None:
+            random.shuffle(self.ordem)
+            itens = [self.exemplos[i] for i in self.ordem]
+        else:
+            itens = self.corpus(self.nlp)
+        self._lotes = list(self.batcher(itens))
+        self.posicao = 0
+
+    def retomar(self, epoca, inicio_epoca, posicao):
+        """Refaz o embaralhamento da época salva e pula os batches já treinados (muda o random)."""
+        self.epoca = epoca
+        self.ordem = inicio_epoca["ordem"]
+        random.setstate(inicio_epoca["random"])
+        self._abrir_epoca()
+        self.posicao = posicao
+
+    def __iter__(self):
+        while self.max_epochs < 1 or self.epoca != self.max_epochs:
+            if self._lotes is None:
+                self._abrir_epoca()
+            while self.posicao < len(self._lotes):
+                self.posicao += 1
+                yield self.epoca, self._lotes[self.posicao - 1]
+            self._lotes = None
+            self.epoca += 1
+
+
+# -------------------------------
+# Treino
+# -------------------------------
+def treinar(config, saida, corpus_treino=None, corpus_dev=None, overrides=None,
+            checkpoint_a_cada=0, retomar=False, arquivo_telemetria=None):
+    """
+    Treina e salva model-best/model-last em 'saida' (checkpoints em
+    <saida>/checkpoints). 'corpus_treino'/'corpus_dev' são DocBins em memória;
+    se omitidos, valem os corpora da config (paths.train/paths.dev).
+    A telemetria por época vai para 'arquivo_telemetria' (.csv ou .jsonl;
+    padrão <saida>/telemetria.csv).
+
+    Retorna dict com: melhor_score, melhor_passo, passos, epocas, segundos,
+    scores (da melhor avaliação), model_best e model_last.
+    """
+    config = carregar_config(config)
+    if overrides:
+        config = util.load_config_from_str(config.to_str(), overrides=overrides, interpolate=False)
+
+    corpora = {}
+    if corpus_treino is not None or corpus_dev is not None:
+        if corpus_treino is None or corpus_dev is None:
+            raise ValueError("Informe corpus_treino e corpus_dev juntos")
+        corpora = {"train": corpus_treino, "dev": corpus_dev}
+        for nome, doc_bin in corpora.items():
+            if len(doc_bin) == 0:
+                raise ValueError(f"Corpus '{nome}' vazio: nada para treinar/avaliar")
+            chave = f"{os.path.abspath(saida)}:{nome}"
+            _CORPORA[chave] = doc_bin
+            config["corpora"][nome] = {"@readers": "atestados.DocsEmMemoria.v1", "chave": chave}
+
+    inicio = time.perf_counter()
+    nlp = init_nlp(config, use_gpu=-1)
+
+    config = nlp.config.interpolate()
+    T = registry.resolve(config["training"], schema=ConfigSchemaTraining)
+    train_corpus, dev_corpus = resolve_dot_names(config, [T["train_corpus"], T["dev_corpus"]])
+    optimizer = T["optimizer"]
+    if T["accumulate_gradient"] != 1:
+        raise ValueError("accumulate_gradient > 1 não é suportado pelo driver de treino")
+
+    before_to_disk = create_before_to_disk_callback(T["before_to_disk"])
+    evaluate = create_evaluation_callback(nlp, dev_corpus, T["score_weights"])
+    batches = BatchesRetomaveis(nlp, train_corpus, T["batcher"], T["max_epochs"])
+    exclude = T["frozen_components"]
+    annotates = T["annotating_components"]
+
+    dir_checkpoints = os.path.join(saida, "checkpoints")
+    assinatura = _assinatura_corpus(config, corpora)
+    estado = {"passo": 0, "melhor_score": None, "melhor_passo": 0, "scores": {}, "corpus": assinatura}
+
+    checkpoint = ultimo_checkpoint(dir_checkpoints) if retomar else None
+    if checkpoint is not None:
+        salvo = ler_estado(checkpoint)
+        if salvo.get("corpus") != assinatura:
+            raise ValueError(f"Os dados de treino mudaram desde {checkpoint}; não é possível retomar")
+        inicio_epoca = ler_inicio_epoca(checkpoint)
+        if inicio_epoca is None:
+            raise ValueError(f"{checkpoint} não guarda o estado da época; não é possível retomar")
+        # O embaralhamento da época parte do estado do início dela; depois o RNG volta ao do passo salvo
+        batches.retomar(salvo["epoca"], inicio_epoca, salvo["posicao"])
+        estado = carregar_checkpoint(checkpoint, nlp, optimizer)
+        del estado["epoca"], estado["posicao"]
+        print(f"♻️ Retomando de {checkpoint} (passo {estado['passo']})")
+
+    def salvar(nome):
+        before_to_disk(nlp).to_disk(os.path.join(saida, nome))
+
+    os.makedirs(saida, exist_ok=True)
+    telemetria = TelemetriaTreino(
+        arquivo_telemetria or os.path.join(saida, "telemetria.csv"),
+        extras=["passo", "score"], continuar=checkpoint is not None,
+    )
+    passo = estado["passo"]
+    epoca = epoca_atual = None
+    losses = {}
+    for epoca, batch in batches:
+        if epoca != epoca_atual:
+            if epoca_atual is not None:
+                telemetria.fim_epoca(epoca_atual, passo=passo, score=estado["melhor_score"])
+            epoca_atual = epoca
+
+        with telemetria.passo(sum(len(eg.predicted) for eg in batch), len(batch)):
+            nlp.update(batch, drop=T["dropout"], sgd=optimizer, losses=losses, exclude=exclude, annotates=annotates)
+            optimizer.step_schedules()
+        passo += 1
+
+        # Como no spacy train: avalia já depois do primeiro update e então a cada eval_frequency
+        if (passo - 1) % T["eval_frequency"] == 0:
+            with telemetria.avaliacao():
+                if optimizer.averages:
+                    with nlp.use_params(optimizer.averages):
+                        score, scores = evaluate()
+                else:
+                    score, scores = evaluate()
+            print(f"Época {epoca} | Passo {passo} | Loss: {losses} | Score: {score:.4f}")
+            losses = {}
+            if estado["melhor_score"] is None or score > estado["melhor_score"]:
+                estado["melhor_score"], estado["melhor_passo"] = score, passo
+                estado["scores"] = {k: v for k, v in scores.items() if isinstance(v, (int, float))}
+                salvar("model-best")
+
+        if checkpoint_a_cada and passo % checkpoint_a_cada == 0:
+            salvar_checkpoint(dir_checkpoints, passo, nlp, optimizer, {
+                **{k: v for k, v in estado.items() if k != "passo"},
+                "epoca": batches.epoca, "posicao": batches.posicao,
+            }, inicio_epoca=batches.inicio_epoca)
+
+        if T["patience"] and passo - estado["melhor_passo"] >= T["patience"]:
+            break
+        if T["max_steps"] and passo >= T["max_steps"]:
+            break
+
+    if epoca_atual is not None:
+        telemetria.fim_epoca(epoca_atual, passo=passo, score=estado["melhor_score"])
+    telemetria.imprimir_resumo()
+
+    if estado["melhor_score"] is None:
+        raise RuntimeError(f"Treino em '{saida}' terminou sem nenhuma avaliação (passos={passo})")
+
+    salvar("model-last")
+    shutil.rmtree(dir_checkpoints, ignore_errors=True)
+    for nome in corpora:
+        _CORPORA.pop(f"{os.path.abspath(saida)}:{nome}", None)
+
+    metricas = {
+        "melhor_score": estado["melhor_score"],
+        "melhor_passo": estado["melhor_passo"],
+        "passos": passo,
+        "epocas": (epoca or 0) + 1,
+        "segundos": time.perf_counter() - inicio,
+        "scores": estado["scores"],
+        "model_best": os.path.join(saida, "model-best"),
+        "model_last": os.path.join(saida, "model-last"),
+        "telemetria": telemetria.caminho,
+    }
+    print(f"✅ Treino concluído em {passo} passos | melhor score {estado['melhor_score']:.4f}")
+    return metricas
+
+
+def treinar_config(config_path, saida, overrides=None, checkpoint_a_cada=0, retomar=False):
+    """Compatibilidade: treina a partir de um arquivo .cfg e retorna o melhor score."""
+    return treinar(config_path, saida, overrides=overrides,
+                   checkpoint_a_cada=checkpoint_a_cada, retomar=retomar)["melhor_score"]
+
+
+def argumentos_retomada(argv=None):
+    """
+    Flags comuns aos scripts Treinando_*: --retomar continua do último
+    checkpoint em <saida>/checkpoints e --checkpoint-a-cada N grava um a cada
+    N passos (0 desliga). Na retomada os scripts reaproveitam os .spacy do
+    treino interrompido com preparar_corpus(..., retomar).
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--retomar", action="store_true")
+    parser.add_argument("--checkpoint-a-cada", type=int, default=500)
+    args, _ = parser.parse_known_args(argv)
+    return args
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Treino spaCy com checkpoints e retomada")
+    parser.add_argument("config")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--checkpoint-a-cada", type=int, default=500)
+    parser.add_argument("--retomar", action="store_true")
+    args, extras = parser.parse_known_args()
+
+    # Overrides no estilo do CLI do spaCy: --paths.train x.spacy
+    overrides = util.parse_config_overrides(extras)
+    metricas = treinar(args.config, args.output, overrides=overrides,
+                       checkpoint_a_cada=args.checkpoint_a_cada, retomar=args.retomar)
+    print(json.dumps(metricas, indent=2, ensure_ascii=False))
+    sys.exit(0)
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Valores tipados e normalizados das entidades extraídas.
+
+Cada texto de entidade é interpretado uma única vez (regex compilados +
+cache por texto) e vira:
+- DATA                       -> "AAAA-MM-DD" (ISO) a partir dos formatos de limpar_data
+- HORARIO_INICIO/FIM         -> datetime.time ("11h30", "12:00", "09 00", "11h")
+- TEMPO_AFASTAMENTO          -> int de dias ("3 (três) dias", "(5 dias)", "um dia")
+- CRM                        -> RegistroConselho(conselho, uf, numero)
+  ("CRM-PE 123456", "CRM/SP 56789", "CRM 44567/PR", "34876")
+- CID                        -> código em maiúsculas ("M54.5")
+
+Textos que não podem ser interpretados viram None.
+"""
+
+import re
+from datetime import date, time
+from functools import lru_cache
+from collections import namedtuple
+
+RegistroConselho = namedtuple("RegistroConselho", "conselho uf numero")
+
+UFS = {
+    "AC", "AL", "AP", "AM", "BA", "CE", "DF", "ES", "GO", "MA", "MT", "MS", "MG", "PA",
+    "PB", "PR", "PE", "PI", "RJ", "RN", "RS", "RO", "RR", "SC", "SP", "SE", "TO",
+}
+
+MESES = [
+    "janeiro", "fevereiro", "março", "abril", "maio", "junho",
+    "julho", "agosto", "setembro", "outubro", "novembro", "dezembro",
+]
+# Nome completo e abreviação de 3 letras ("set", "ago"...); "marco" sem cedilha
+_MES = {nome: i for i, nome in enumerate(MESES, start=1)}
+_MES.update({nome[:3]: i for i, nome in enumerate(MESES, start=1)})
+_MES["marco"] = 3
+
+NUMEROS_POR_EXTENSO = {
+    "um": 1, "uma": 1, "dois": 2, "duas": 2, "três": 3, "tres": 3, "quatro": 4, "cinco": 5,
+    "seis": 6, "sete": 7, "oito": 8, "nove": 9, "dez": 10, "onze": 11, "doze": 12,
+    "treze": 13, "catorze": 14, "quatorze": 14, "quinze": 15, "vinte": 20, "trinta": 30,
+}
+
+_DATA_NUMERICA = re.compile(r"\b(\d{1,2})([/\-.])(\d{1,2})\2(\d{2,4})\b")
+_DATA_EXTENSO = re.compile(r"\b(\d{1,2})\s*(?:de\s+|[/\-])([a-zç]{3,9})\.?(?:\s+de\s+|[/\-])(\d{4})\b", re.IGNORECASE)
+_HORARIO = re.compile(r"\b([01]?\d|2[0-3])\s*(?:[:hH]|\s)\s*([0-5]\d)?\b")
+_DIAS_NUMERO = re.compile(r"\d+")
+_DIAS_EXTENSO = re.compile(r"\b(" + "|".join(NUMEROS_POR_EXTENSO) + r")\b", re.IGNORECASE)
+_CONSELHO = re.compile(r"\b(CRM|CREFITO|COREN|CRO|CRP|CRFa)\b", re.IGNORECASE)
+_UF = re.compile(r"(?<![A-Za-z])(" + "|".join(sorted(UFS)) + r")(?![A-Za-z])")
+_NUMERO_REGISTRO = re.compile(r"\d[\d.]*")
+_CID = re.compile(r"\b([A-Z]\d{2}(?:\.\d{1,3})?)\b", re.IGNORECASE)
+
+
+def _ano(valor):
+    ano = int(valor)
+    return ano + 2000 if ano < 100 else ano
+
+
+def _data(dia, mes, ano):
+    try:
+        return date(_ano(ano), mes, int(dia)).isoformat()
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=65536)
+def normalizar_data(texto):
+    """Data em ISO (AAAA-MM-DD) a partir de DD/MM/AAAA, DD-MM-AA, "15 de setembro de 2025", "15-Ago-2025"."""
+    m = _DATA_NUMERICA.search(texto)
+    if m:
+        return _data(m.group(1), int(m.group(3)), m.group(4))
+    m = _DATA_EXTENSO.search(texto)
+    if m:
+        nome = m.group(2).lower()
+        mes = _MES.get(nome) or _MES.get(nome[:3])
+        return _data(m.group(1), mes, m.group(3)) if mes else None
+    return None
+
+
+@lru_cache(maxsize=65536)
+def normalizar_horario(texto):
+    """datetime.time a partir de "11h30", "12:00", "09 00" ou "11h"."""
+    m = _HORARIO.search(texto)
+    if not m or (m.group(2) is None and "h" not in texto.lower()):
+        return None
+    return time(int(m.group(1)), int(m.group(2) or 0))
+
+
+@lru_cache(maxsize=65536)
+def normalizar_tempo(texto):
+    """
+    Dias de afastamento como int: "3 (três) dias" -> 3, "(5 dias)" -> 5,
+    "um dia" -> 1. Em intervalos ("entre 1 a 15 dias") vale o maior.
+    """
+    numeros = [int(n) for n in _DIAS_NUMERO.findall(texto)]
+    if not numeros:
+        numeros = [NUMEROS_POR_EXTENSO[p.lower()] for p in _DIAS_EXTENSO.findall(texto)]
+    return max(numeros) if numeros else None
+
+
+@lru_cache(maxsize=65536)
+def normalizar_crm(texto):
+    """RegistroConselho(conselho, uf, numero); conselho padrão "CRM" quando só há o número."""
+    numero = _NUMERO_REGISTRO.search(texto)
+    if not numero:
+        return None
+    conselho = _CONSELHO.search(texto)
+    uf = _UF.search(texto.upper())
+    nome = conselho.group(1).upper() if conselho else "CRM"
+    return RegistroConselho(
+        "CRFa" if nome == "CRFA" else nome,
+        uf.group(1) if uf else None,
+        numero.group(0).replace(".", ""),
+    )
+
+
+@lru_cache(maxsize=65536)
+def normalizar_cid(texto):
+    m = _CID.search(texto)
+    return m.group(1).upper() if m else None
+
+
+NORMALIZADORES = {
+    "DATA": normalizar_data,
+    "HORARIO_INICIO_ATENDIMENTO": normalizar_horario,
+    "HORARIO_FIM_ATENDIMENTO": normalizar_horario,
+    "TEMPO_AFASTAMENTO": normalizar_tempo,
+    "CRM": normalizar_crm,
+    "CID": normalizar_cid,
+}
+
+
+def valor_tipado(entidade, texto):
+    """Valor normalizado de um texto de entidade (o próprio texto se não há normalizador)."""
+    normalizador = NORMALIZADORES.get(entidade)
+    return normalizador(texto) if normalizador else texto
+
+
+def valores_entidades(entidades):
+    """{entidade: [textos]} -> {entidade: [valores tipados]}, mesma ordem."""
+    return {entidade: [valor_tipado(entidade, texto) for texto in textos] for entidade, textos in entidades.items()}
+
+
+def valor_json(valor):
+    """Forma JSON de um valor tipado (time -> "HH:MM", RegistroConselho -> dict)."""
+    if isinstance(valor, time):
+        return valor.strftime("%H:%M")
+    if isinstance(valor, RegistroConselho):
+        return valor._asdict()
+    return valor
+
+
+def valores_json(valores):
+    return {entidade: [valor_json(v) for v in lista] for entidade, lista in valores.items()}